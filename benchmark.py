@@ -0,0 +1,707 @@
+"""
+Benchmark the Task Management Application on synthetic data.
+
+The script generates realistic user.txt/tasks.txt data sets, runs the task
+manager's functions against them with scripted answers to their prompts, and
+writes the timings as JSON so that runs can be compared. With --baseline, the
+results are checked against an earlier run and the script exits with status 1
+if any operation got slower than the allowed threshold.
+
+With --stress, several processes instead add, complete and edit tasks in the
+same files at once, and the result is checked for lost or corrupted updates.
+
+With --load-test, the JSON API server is started on a generated data set and
+loaded by concurrent clients; requests/sec and p50/p99 latencies are reported.
+
+With --codec, the task line codec is compared with plain split/join parsing
+for rows per second and memory allocated.
+
+With --startup, interactive sessions are timed from the outside: time to the
+login prompt and to the first task view, with and without a saved session
+snapshot. --app times another copy of the script instead, such as an older
+version to compare with.
+
+Example:
+    python benchmark.py --sizes 10k 1m --users 2000 --output results.json
+    python benchmark.py --sizes 10k 1m --baseline results.json --threshold 0.2
+    python benchmark.py --stress 1 2 4 8
+    python benchmark.py --load-test --clients 64 --duration 10
+    python benchmark.py --codec --sizes 1m
+    python benchmark.py --startup --sizes 1m
+"""
+
+import argparse
+import asyncio
+import builtins
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+# The task manager script, loaded as a module (its file name is not importable)
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'task_manager_ List_Function.py')
+
+# Row counts for the named data set sizes
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+WORDS = ("plan review update prepare submit organize finalize conduct analyze schedule budget report "
+         "meeting project contract workshop client documentation assignment release design test").split()
+
+
+def load_app():
+    """Load a fresh copy of the task manager module, with no cached state."""
+    spec = importlib.util.spec_from_file_location('task_manager', APP_FILE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['task_manager'] = module  # Lets report worker processes find the module's functions
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_dataset(directory, rows, users, skew, completion_ratio, seed=0):
+    """
+    Write a synthetic user.txt and tasks.txt into directory.
+
+    Parameters:
+    directory (str): Where to write the files.
+    rows (int): Number of tasks.
+    users (int): Number of users; 'admin' is always the first.
+    skew (float): Zipf exponent of how tasks are spread over users (0 spreads them evenly).
+    completion_ratio (float): Fraction of tasks that are completed.
+    seed (int): Seed for the random generator, so data sets can be reproduced.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    usernames = ['admin'] + [f"user{number}" for number in range(1, users)]
+    with open(os.path.join(directory, 'user.txt'), 'w') as file:
+        for username in usernames:
+            file.write(f"{username}, {'adm1n' if username == 'admin' else 'pass'}\n")
+
+    # Tasks are assigned over the last two years and due up to 90 days later
+    start = date.today() - timedelta(days=730)
+    days = [(start + timedelta(days=offset)).isoformat() for offset in range(730 + 90)]
+    weights = [1 / (rank + 1) ** skew for rank in range(users)]
+    cumulative = []
+    total = 0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    with open(os.path.join(directory, 'tasks.txt'), 'w', buffering=1024 * 1024) as file:
+        batch = 10_000
+        for first in range(0, rows, batch):
+            count = min(batch, rows - first)
+            assignees = rng.choices(usernames, cum_weights=cumulative, k=count)
+            for username in assignees:
+                assigned = rng.randrange(730)
+                due = assigned + rng.randrange(90)
+                title = f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)}"
+                description = ' '.join(rng.choice(WORDS) for _ in range(rng.randrange(3, 9)))
+                completed = 'Yes' if rng.random() < completion_ratio else 'No'
+                file.write(f"{username}, {title}, {description}, {days[assigned]}, {days[due]}, {completed}\n")
+
+
+def scripted(answers):
+    """Replace input() with a function returning the given answers in order (stdout is silenced by the caller)."""
+    answers = iter(answers)
+    builtins.input = lambda prompt='': next(answers)
+
+
+def timed(function, *args, answers=()):
+    """Run function with scripted answers and its output discarded, and return the seconds it took."""
+    original_input = builtins.input
+    scripted(answers)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function(*args)
+            return time.perf_counter() - start
+    finally:
+        builtins.input = original_input
+
+
+def busiest_user(app):
+    """Return the user with the most tasks (user1 in generated data, admin otherwise)."""
+    users = app.read_users()
+    return 'user1' if 'user1' in users else next(iter(users))
+
+
+def run_benchmarks(directory, repeat):
+    """
+    Time the task manager's operations on the data set in directory.
+
+    Every operation is timed on a freshly loaded module ("cold", including any
+    file parsing) and then again on the same module ("warm"). The best of
+    `repeat` runs is kept.
+
+    Returns:
+        dict: operation name -> seconds.
+    """
+    results = {}
+    previous_directory = os.getcwd()
+    os.chdir(directory)
+    try:
+        def measure(name, operation):
+            cold, warm = [], []
+            for _ in range(repeat):
+                app = load_app()
+                cold.append(operation(app))
+                warm.append(operation(app))
+            results[f"{name} (cold)"] = min(cold)
+            results[f"{name} (warm)"] = min(warm)
+
+        measure('read_users', lambda app: timed(app.read_users))
+        measure('view_all_tasks first page', lambda app: timed(app.view_all_tasks, answers=['q']))
+        measure('view_all_tasks page 100', lambda app: timed(app.view_all_tasks, answers=['g', '100', 'q']))
+        measure('view_my_tasks lookup', lambda app: timed(app.view_my_tasks, busiest_user(app), answers=['-1']))
+        measure('view_my_tasks mark complete',
+                lambda app: timed(app.view_my_tasks, busiest_user(app), answers=['1', '1', '-1']))
+
+        def full_rewrite(app):
+            tasks = app.get_task_store().tasks
+            return timed(app.update_task_in_file, tasks)
+        measure('update_task_in_file full rewrite', full_rewrite)
+
+        def reports_recount(app):
+            if os.path.exists(app.STATS_FILE):
+                os.remove(app.STATS_FILE)
+            return timed(lambda: app.generate_reports(force=True))
+        measure('generate_reports recount', reports_recount)
+        measure('generate_reports incremental', lambda app: timed(lambda: app.generate_reports(force=True)))
+        measure('generate_reports unchanged', lambda app: timed(app.generate_reports))
+    finally:
+        os.chdir(previous_directory)
+    return results
+
+
+def stress_worker(directory, worker, operations, seed, results):
+    """
+    Add, complete and edit tasks as one of several concurrent sessions.
+
+    Each round adds a task to admin, marks it complete, and moves the due date
+    of one of admin's latest tasks using the fields read a moment earlier, so
+    that edits from different processes collide. Refused edits are counted and
+    retried.
+    """
+    os.chdir(directory)
+    app = load_app()
+    app.JOURNAL_COMPACT_THRESHOLD = 50  # Compact often, so compaction races with the other writers
+    rng = random.Random(seed)
+    backend = app.get_storage_backend()
+    today = date.today().isoformat()
+    stale = 0
+    done = 0
+    start = time.perf_counter()
+    try:
+        for number in range(operations):
+            title = f"stress {worker} {number}"
+            backend.add_task('admin', title, 'stress test', today, '2099-01-01', 'No')
+
+            # Find the new task and mark it complete. If another session compacts the journal while
+            # this one retries on a concurrent edit, the retry is refused and the task is looked up again.
+            store = app.get_task_store()
+            for _ in range(10):
+                generation = backend.generation()
+                task = next(task for task in reversed(store.tasks_for('admin')) if task.title == title)
+                if app.mark_task_complete(backend, task, task.to_fields(), 'admin', generation) is not None:
+                    break
+            else:
+                raise RuntimeError(f"{title} could not be marked complete")
+
+            # Edit one of the latest tasks, which the other sessions are busy with too, based on
+            # what was read before they had a chance to change it
+            task = rng.choice(store.tasks_for('admin')[-10:])
+            expected = task.to_fields()
+            time.sleep(0.002)
+            for _ in range(10):
+                try:
+                    backend.update_task(task, expected, due_date=f"2099-01-{rng.randrange(1, 29):02d}")
+                    break
+                except app.StaleTaskError as error:
+                    stale += 1
+                    task, expected = error.task, error.task.to_fields()
+            done += 1
+    finally:
+        # Always report back, so that the parent does not wait forever for a failed worker
+        results.put((worker, done, stale, time.perf_counter() - start))
+
+
+def run_stress_test(source, processes, operations):
+    """
+    Run processes concurrent stress_worker sessions on a copy of a data set and check the result.
+
+    Returns:
+        dict: Throughput and conflict counts, plus the list of problems found (empty if none).
+    """
+    directory = os.path.join(os.path.dirname(source), f"stress-{processes}")
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    for file_name in ('user.txt', 'tasks.txt'):
+        shutil.copyfile(os.path.join(source, file_name), os.path.join(directory, file_name))
+
+    previous_directory = os.getcwd()
+    os.chdir(directory)
+    try:
+        app = load_app()
+        initial = len(app.get_task_store().tasks)
+        timed(app.generate_reports)  # Start with saved report counters, so they are updated incrementally
+    finally:
+        os.chdir(previous_directory)
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=stress_worker, args=(directory, worker, operations, worker, results))
+               for worker in range(processes)]
+    start = time.perf_counter()
+    for process in workers:
+        process.start()
+    outcomes = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    # Check that no update was lost: every added task is there exactly once and is complete,
+    # and the incrementally updated report counters match a full recount
+    problems = [f"worker {process.pid} exited with {process.exitcode}" for process in workers if process.exitcode]
+    os.chdir(directory)
+    try:
+        app = load_app()
+        tasks = app.get_task_store().tasks
+        if len(tasks) != initial + processes * operations:
+            problems.append(f"expected {initial + processes * operations} tasks, found {len(tasks)}")
+        stress_tasks = {task.title: task for task in tasks if task.title.startswith('stress ')}
+        for worker in range(processes):
+            for number in range(operations):
+                task = stress_tasks.get(f"stress {worker} {number}")
+                if task is None or task.completed != 'Yes':
+                    problems.append(f"stress {worker} {number} is {'missing' if task is None else 'not complete'}")
+        problems.extend(app.verify_task_statistics())
+    finally:
+        os.chdir(previous_directory)
+
+    total_operations = sum(count for _, count, _, _ in outcomes) * 3
+    return {
+        'processes': processes,
+        'seconds': elapsed,
+        'operations_per_second': total_operations / elapsed,
+        'stale_edits_retried': sum(stale for _, _, stale, _ in outcomes),
+        'problems': problems,
+    }
+
+
+async def http_request(reader, writer, method, path, body=None, token=None):
+    """Send one HTTP/1.1 request on an open keep-alive connection and return (status, JSON payload)."""
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n"
+    if token:
+        head += f"Authorization: Bearer {token}\r\n"
+    writer.write(head.encode('latin-1') + b'\r\n' + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length)) if length else None
+
+
+async def load_test_client(address, username, deadline, write_ratio, rng, latencies, errors):
+    """
+    Send requests as one logged-in user until the deadline, recording each request's latency.
+
+    Most requests are reads (a page of all tasks, or the user's own tasks); a
+    write_ratio share are writes (adding a task, or marking one of the user's
+    open tasks complete).
+    """
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    try:
+        status, payload = await http_request(reader, writer, 'POST', '/login',
+                                             {'username': username, 'password': 'pass'})
+        token = payload['token']
+        open_tasks = []
+        total_tasks = 1
+        due_date = (date.today() + timedelta(days=30)).isoformat()
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            if roll < write_ratio / 2:
+                operation = 'add task'
+                request = ('POST', '/tasks', {'username': username, 'title': "Load test",
+                                              'description': "added by the load test", 'due_date': due_date})
+            elif roll < write_ratio and open_tasks:
+                operation = 'mark complete'
+                task = open_tasks.pop()
+                request = ('POST', f"/tasks/{task['task_id']}/complete", {})
+            elif roll < (1 + write_ratio) / 2:
+                operation = 'list my tasks'
+                request = ('GET', f"/users/{username}/tasks", None)
+            else:
+                operation = 'list page'
+                request = ('GET', f"/tasks?offset={rng.randrange(total_tasks)}&limit=20", None)
+            
+            start = time.perf_counter()
+            status, payload = await http_request(reader, writer, *request, token=token)
+            latencies.setdefault(operation, []).append(time.perf_counter() - start)
+            if status != 200:
+                errors[f"{operation}: {status}"] = errors.get(f"{operation}: {status}", 0) + 1
+            elif operation == 'list my tasks':
+                open_tasks = [task for task in payload['tasks'] if task['completed'] == 'No'][-20:]
+            elif operation == 'list page':
+                total_tasks = max(payload['total'], 1)
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    """Return the value below which the given fraction of values fall."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_load_test(source, clients, duration, write_ratio, users, unix_socket=False):
+    """
+    Start the JSON API server on a copy of a data set and load it with concurrent clients.
+
+    Returns:
+        dict: Requests per second, p50/p99 latency in seconds (overall and per operation), and error counts.
+    """
+    directory = os.path.join(os.path.dirname(source), 'load-test')
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    for file_name in ('user.txt', 'tasks.txt'):
+        shutil.copyfile(os.path.join(source, file_name), os.path.join(directory, file_name))
+
+    if unix_socket:
+        address = os.path.join(os.path.abspath(directory), 'api.sock')
+        listen = ['--unix-socket', address]
+    else:
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            address = probe.getsockname()
+        listen = ['--host', address[0], '--port', str(address[1])]
+    server = subprocess.Popen([sys.executable, APP_FILE, 'serve', *listen], cwd=directory,
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()  # "Serving the task API on ...", once the data is loaded
+
+        async def load():
+            deadline = time.perf_counter() + duration
+            rng = random.Random(0)
+            await asyncio.gather(*(
+                load_test_client(address, f"user{client % (users - 1) + 1}", deadline, write_ratio,
+                                 random.Random(rng.random()), latencies, errors)
+                for client in range(clients)))
+
+        latencies, errors = {}, {}
+        start = time.perf_counter()
+        asyncio.run(load())
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    every_latency = [latency for values in latencies.values() for latency in values]
+    return {
+        'clients': clients,
+        'requests': len(every_latency),
+        'requests_per_second': len(every_latency) / elapsed,
+        'p50': percentile(every_latency, 0.5),
+        'p99': percentile(every_latency, 0.99),
+        'operations': {operation: {'requests': len(values), 'p50': percentile(values, 0.5),
+                                   'p99': percentile(values, 0.99)}
+                       for operation, values in sorted(latencies.items())},
+        'errors': errors,
+    }
+
+
+def benchmark_codec(source, repeat):
+    """
+    Compare the task codec with the old split-based parsing on the lines of a data set.
+
+    Parsing is measured on the data set as is, and again with a ", " in every
+    description so that every line has a quoted field. Date conversion and
+    encoding are compared with strptime and ', '.join as well.
+
+    Returns:
+        dict: name -> rows per second, plus the bytes still allocated for the
+        parsed rows and the peak allocated while parsing (tracemalloc).
+    """
+    app = load_app()
+    with open(os.path.join(source, 'tasks.txt')) as file:
+        lines = [line for line in file if line.strip()]
+    split_rows = [line.strip().split(', ') for line in lines]
+    quoted_lines = [app.encode_task_line(fields[:2] + [fields[2].replace(' ', ', ', 1)] + fields[3:])
+                    for fields in split_rows]
+    due_dates = [fields[4] for fields in split_rows]
+
+    cases = [
+        ('parse (split)', lambda: [line.strip().split(', ') for line in lines]),
+        ('parse (codec)', lambda: [app.decode_task_line(line) for line in lines]),
+        ('parse (codec, quoted descriptions)', lambda: [app.decode_task_line(line) for line in quoted_lines]),
+        ('due date (strptime)', lambda: [datetime.strptime(day, "%Y-%m-%d").toordinal() for day in due_dates]),
+        ('due date (date_ordinal)', lambda: [app.date_ordinal(day) for day in due_dates]),
+        ('encode (join)', lambda: [', '.join(fields) + '\n' for fields in split_rows]),
+        ('encode (codec)', lambda: [app.encode_task_line(fields) for fields in split_rows]),
+    ]
+    results = {}
+    for name, function in cases:
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            seconds.append(time.perf_counter() - start)
+        tracemalloc.start()
+        rows = function()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del rows
+        results[name] = {'rows_per_second': len(lines) / min(seconds), 'bytes_retained': retained, 'bytes_peak': peak}
+    return results
+
+
+def time_session(directory, app_file, username, password):
+    """
+    Run one interactive session of the task manager and time it from the outside.
+
+    The session logs in, opens "View my tasks" and exits. Times are measured
+    from starting the process until each prompt is written.
+
+    Returns:
+        dict: Seconds to the login prompt, to the first task view, and to the end of the process.
+    """
+    start = time.perf_counter()
+    session = subprocess.Popen([sys.executable, '-u', app_file], cwd=directory,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b''
+
+    def wait_for(text):
+        nonlocal output
+        while text not in output:
+            chunk = os.read(session.stdout.fileno(), 65536)
+            if not chunk:
+                raise RuntimeError(f"The session ended before writing {text!r}")
+            output += chunk
+        output = output[output.index(text) + len(text):]
+        return time.perf_counter() - start
+
+    try:
+        login_prompt = wait_for(b"Enter your username: ")
+        session.stdin.write(f"{username}\n{password}\nvm\n".encode())
+        session.stdin.flush()
+        first_view = wait_for(b"or -1 to return to the main menu: ")
+        session.stdin.write(b"-1\ne\n")
+        session.stdin.close()
+        session.wait()
+        return {'login_prompt': login_prompt, 'first_view': first_view, 'exit': time.perf_counter() - start}
+    finally:
+        if session.poll() is None:
+            session.kill()
+            session.wait()
+
+
+def run_startup_test(source, repeat, app_file=APP_FILE):
+    """
+    Time interactive sessions started without a session snapshot (cold) and with one (warm).
+
+    The sessions log in as the user with the fewest tasks, so that the time
+    to the first view is spent loading the tasks rather than rendering them.
+
+    Returns:
+        dict: 'cold' and 'warm' -> the best of `repeat` time_session() results, per measurement.
+    """
+    directory = os.path.join(os.path.dirname(source), 'startup')
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    for file_name in ('user.txt', 'tasks.txt'):
+        shutil.copyfile(os.path.join(source, file_name), os.path.join(directory, file_name))
+    task_counts = {}
+    with open(os.path.join(directory, 'tasks.txt')) as file:
+        for line in file:
+            assignee = line.split(', ', 1)[0]
+            task_counts[assignee] = task_counts.get(assignee, 0) + 1
+    username = min(task_counts, key=task_counts.get)
+    with open(os.path.join(directory, 'user.txt')) as file:
+        password = dict(line.strip().split(', ') for line in file if line.strip())[username]
+
+    sessions = {'cold': [], 'warm': []}
+    for _ in range(repeat):
+        # tasks_session.bin is where older versions of the script (--app) save their session snapshot
+        for name in ('tasks_session.json', 'tasks_session.bin', 'tasks_journal.txt'):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+        sessions['cold'].append(time_session(directory, app_file, username, password))
+        sessions['warm'].append(time_session(directory, app_file, username, password))
+    return {kind: {key: min(timings[key] for timings in runs) for key in runs[0]}
+            for kind, runs in sessions.items()}
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline run.
+
+    Returns:
+        list: Descriptions of every operation that is more than `threshold` (a fraction) slower.
+    """
+    regressions = []
+    for size, timings in results['results'].items():
+        for name, seconds in timings.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if before and seconds > before * (1 + threshold):
+                regressions.append(f"{size} {name}: {before:.4f}s -> {seconds:.4f}s (+{(seconds / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Task Management Application on synthetic data.")
+    parser.add_argument('--sizes', nargs='+', default=['10k'], choices=sorted(SIZES), help="data set sizes to run")
+    parser.add_argument('--users', type=int, default=1000, help="number of users (default: %(default)s)")
+    parser.add_argument('--skew', type=float, default=1.1,
+                        help="Zipf exponent of tasks per user, 0 for an even spread (default: %(default)s)")
+    parser.add_argument('--completion', type=float, default=0.5,
+                        help="fraction of completed tasks (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per operation, the best is kept (default: %(default)s)")
+    parser.add_argument('--data-dir', default='benchmark_data', help="where generated data sets are kept (default: %(default)s)")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results (default: %(default)s)")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown against the baseline, as a fraction (default: %(default)s)")
+    parser.add_argument('--stress', nargs='+', type=int, metavar='PROCESSES',
+                        help="run the multi-process stress test with these numbers of processes instead")
+    parser.add_argument('--stress-operations', type=int, default=200,
+                        help="rounds of add/complete/edit per stress process (default: %(default)s)")
+    parser.add_argument('--load-test', action='store_true',
+                        help="load the JSON API server with concurrent clients instead")
+    parser.add_argument('--clients', type=int, default=32, help="concurrent load test clients (default: %(default)s)")
+    parser.add_argument('--duration', type=float, default=10, help="seconds the load test runs (default: %(default)s)")
+    parser.add_argument('--write-ratio', type=float, default=0.1,
+                        help="fraction of load test requests that are writes (default: %(default)s)")
+    parser.add_argument('--unix-socket', action='store_true', help="serve the load test over a Unix socket")
+    parser.add_argument('--codec', action='store_true',
+                        help="compare the task line codec with split/join parsing instead")
+    parser.add_argument('--startup', action='store_true',
+                        help="time interactive sessions to the login prompt and the first view instead")
+    parser.add_argument('--app', default=APP_FILE, help="with --startup, the task manager script to time (default: this one)")
+    options = parser.parse_args()
+
+    if options.codec:
+        size = options.sizes[0]
+        source = os.path.join(options.data_dir, f"{size}-u{options.users}-s{options.skew}-c{options.completion}")
+        if not os.path.exists(os.path.join(source, 'tasks.txt')):
+            print(f"Generating {size} data set in {source} ...")
+            generate_dataset(source, SIZES[size], options.users, options.skew, options.completion)
+        results = benchmark_codec(source, options.repeat)
+        for name, result in results.items():
+            print(f"  {name:<36} {result['rows_per_second']:>12,.0f} rows/s "
+                  f"{result['bytes_retained'] / 2**20:>9.1f} MiB retained {result['bytes_peak'] / 2**20:>9.1f} MiB peak")
+        with open(options.output, 'w') as file:
+            json.dump({'codec': results}, file, indent=2)
+        return
+
+    if options.startup:
+        results = {}
+        for size in options.sizes:
+            source = os.path.join(options.data_dir, f"{size}-u{options.users}-s{options.skew}-c{options.completion}")
+            if not os.path.exists(os.path.join(source, 'tasks.txt')):
+                print(f"Generating {size} data set in {source} ...")
+                generate_dataset(source, SIZES[size], options.users, options.skew, options.completion)
+            results[size] = run_startup_test(source, options.repeat, os.path.abspath(options.app))
+            for kind, timings in results[size].items():
+                print(f"{size} {kind}: login prompt {timings['login_prompt'] * 1000:.0f} ms, "
+                      f"first view {timings['first_view'] * 1000:.0f} ms, exit {timings['exit'] * 1000:.0f} ms")
+        with open(options.output, 'w') as file:
+            json.dump({'startup': results}, file, indent=2)
+        return
+
+    if options.load_test:
+        size = options.sizes[0]
+        source = os.path.join(options.data_dir, f"{size}-u{options.users}-s{options.skew}-c{options.completion}")
+        if not os.path.exists(os.path.join(source, 'tasks.txt')):
+            print(f"Generating {size} data set in {source} ...")
+            generate_dataset(source, SIZES[size], options.users, options.skew, options.completion)
+        outcome = run_load_test(source, options.clients, options.duration, options.write_ratio,
+                                options.users, options.unix_socket)
+        print(f"{outcome['requests']} requests from {outcome['clients']} clients: "
+              f"{outcome['requests_per_second']:,.0f} requests/s, "
+              f"p50 {outcome['p50'] * 1000:.2f} ms, p99 {outcome['p99'] * 1000:.2f} ms")
+        for operation, timings in outcome['operations'].items():
+            print(f"  {operation:<14} {timings['requests']:>8} requests, "
+                  f"p50 {timings['p50'] * 1000:.2f} ms, p99 {timings['p99'] * 1000:.2f} ms")
+        for error, count in outcome['errors'].items():
+            print(f"  {count} x {error}")
+        with open(options.output, 'w') as file:
+            json.dump({'load_test': outcome}, file, indent=2)
+        sys.exit(1 if outcome['errors'] else 0)
+
+    if options.stress:
+        source = os.path.join(options.data_dir, 'stress-source')
+        if not os.path.exists(os.path.join(source, 'tasks.txt')):
+            generate_dataset(source, SIZES['10k'], options.users, options.skew, options.completion)
+        failed = False
+        for processes in options.stress:
+            outcome = run_stress_test(source, processes, options.stress_operations)
+            print(f"{processes} processes: {outcome['operations_per_second']:,.0f} operations/s, "
+                  f"{outcome['stale_edits_retried']} stale edits refused and retried, "
+                  f"{len(outcome['problems'])} problems")
+            for problem in outcome['problems'][:20]:
+                print(f"  {problem}")
+            failed = failed or bool(outcome['problems'])
+        sys.exit(1 if failed else 0)
+
+    results = {
+        'settings': {'users': options.users, 'skew': options.skew, 'completion': options.completion,
+                     'repeat': options.repeat},
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'results': {},
+    }
+    for size in options.sizes:
+        # Generated data sets are kept and reused; each run works on a fresh copy
+        name = f"{size}-u{options.users}-s{options.skew}-c{options.completion}"
+        source = os.path.join(options.data_dir, name)
+        if not os.path.exists(os.path.join(source, 'tasks.txt')):
+            print(f"Generating {size} data set in {source} ...")
+            generate_dataset(source, SIZES[size], options.users, options.skew, options.completion)
+        work = os.path.join(options.data_dir, 'work')
+        shutil.rmtree(work, ignore_errors=True)
+        os.makedirs(work)
+        for file_name in ('user.txt', 'tasks.txt'):
+            shutil.copyfile(os.path.join(source, file_name), os.path.join(work, file_name))
+
+        print(f"Running {size} benchmarks ...")
+        timings = run_benchmarks(work, options.repeat)
+        results['results'][size] = timings
+        for operation, seconds in timings.items():
+            print(f"  {operation:<45} {seconds * 1000:10.2f} ms")
+
+    with open(options.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {options.output}.")
+
+    if options.baseline:
+        with open(options.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, options.threshold)
+        if regressions:
+            print(f"Slower than {options.baseline} by more than {options.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No operation is slower than {options.baseline} by more than {options.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+r"""
+Reading and writing the lines of the task file.
+
+Every task is stored on one line of six fields separated by ", ":
+
+    username, title, description, assigned date, due date, completed
+
+This is the format the task manager has always written, and any field that
+can be stored as is still is, so existing task files are read unchanged. A
+field that could not be read back from that format (one that contains ", "
+or a line break, starts with a double quote, is empty, or starts or ends with
+whitespace) is written in double quotes instead, with backslash escapes for
+backslashes (\\), double quotes (\"), line feeds (\n) and carriage returns
+(\r). Quoted fields never contain a raw line break, so every task stays on
+one line.
+
+Usernames, dates and completion statuses repeat on almost every line, so the
+decoder interns them and large task lists share one copy of each. Dates are
+converted to day ordinals by date_ordinal(), which remembers every date it
+has seen.
+"""
+
+import re
+import sys
+from datetime import date, datetime
+
+# A field that has to be quoted to be read back exactly
+_NEEDS_QUOTING = re.compile(r', |[\n\r]|^["\s]|\s$')
+
+# Characters with a special meaning inside a quoted field
+_QUOTED_SPECIAL = re.compile(r'[\\"]')
+
+# What each backslash escape in a quoted field stands for
+_UNESCAPES = {'\\': '\\', '"': '"', 'n': '\n', 'r': '\r'}
+
+# Day ordinals of every date converted so far
+_day_ordinals = {}
+
+
+def encode_field(value):
+    """
+    Return one field as it is written in the task file.
+
+    Parameters:
+    value (str): The field's value.
+
+    Returns:
+        str: The value itself, or the value quoted and escaped if it has to be.
+    """
+    if value and not _NEEDS_QUOTING.search(value):
+        return value
+    return '"' + (value.replace('\\', '\\\\').replace('"', '\\"')
+                  .replace('\n', '\\n').replace('\r', '\\r')) + '"'
+
+
+def encode_task_line(fields):
+    """
+    Return a task's fields as one line of the task file, including the newline.
+
+    Parameters:
+    fields (sequence): The task's six fields, as strings.
+    """
+    # Usually no field needs quoting, which is quicker to check on the joined line
+    line = ', '.join(fields)
+    if ('"' in line or '\n' in line or '\r' in line
+            or line.count(', ') != len(fields) - 1):
+        return ', '.join([encode_field(value) for value in fields]) + '\n'
+    for value in fields:
+        if not value or value[0].isspace() or value[-1].isspace():
+            return ', '.join([encode_field(value) for value in fields]) + '\n'
+    return line + '\n'
+
+
+def decode_task_line(line):
+    """
+    Split one line of the task file into its list of fields.
+
+    Lines without any double quote, which includes every line in the old
+    format, are split directly on ", ". The username, dates and completion
+    status are interned.
+
+    Parameters:
+    line (str): One line of the task file, with or without its newline.
+
+    Returns:
+        list: The task's fields.
+    """
+    if '"' in line:
+        fields = _decode_quoted_line(line.strip())
+    else:
+        fields = line.strip().split(', ')
+    if len(fields) == 6:
+        intern = sys.intern
+        fields[0] = intern(fields[0])
+        fields[3] = intern(fields[3])
+        fields[4] = intern(fields[4])
+        fields[5] = intern(fields[5])
+    return fields
+
+
+def _decode_quoted_line(text):
+    """Split a line that contains double quotes, unquoting the fields that were quoted."""
+    fields = []
+    position = 0
+    while True:
+        if text.startswith('"', position):
+            value, end = _read_quoted_field(text, position)
+            if end == len(text):
+                fields.append(value)
+                return fields
+            if end is not None and text.startswith(', ', end):
+                fields.append(value)
+                position = end + 2
+                continue
+            # Not a well-formed quoted field, so the quote is just part of an old-format value
+        separator = text.find(', ', position)
+        if separator == -1:
+            fields.append(text[position:])
+            return fields
+        fields.append(text[position:separator])
+        position = separator + 2
+
+
+def _read_quoted_field(text, start):
+    """
+    Read the quoted field starting at text[start].
+
+    Returns:
+        tuple: (the unescaped value, the position after the closing quote), or
+        (None, None) if there is no valid quoted field there.
+    """
+    parts = []
+    position = start + 1
+    while True:
+        match = _QUOTED_SPECIAL.search(text, position)
+        if match is None:
+            return None, None
+        parts.append(text[position:match.start()])
+        if match.group() == '"':
+            return ''.join(parts), match.end()
+        escaped = _UNESCAPES.get(text[match.end():match.end() + 1])
+        if escaped is None:
+            return None, None
+        parts.append(escaped)
+        position = match.end() + 1
+
+
+def date_ordinal(text):
+    """
+    Convert a YYYY-MM-DD date to a day ordinal, remembering every date already seen.
+
+    Zero-padded dates, which is what the task manager writes, are converted by
+    slicing out the numbers. Anything else goes through datetime.strptime, so
+    the same dates are accepted as before.
+
+    Parameters:
+    text (str): The date.
+
+    Returns:
+        int: The proleptic Gregorian ordinal of the date.
+
+    Raises:
+        ValueError: If text is not a valid date.
+    """
+    ordinal = _day_ordinals.get(text)
+    if ordinal is None:
+        if (len(text) == 10 and text[4] == '-' and text[7] == '-' and text.isascii()
+                and text[:4].isdigit() and text[5:7].isdigit() and text[8:].isdigit()):
+            ordinal = date(int(text[:4]), int(text[5:7]), int(text[8:])).toordinal()
+        else:
+            ordinal = datetime.strptime(text, "%Y-%m-%d").toordinal()
+        _day_ordinals[text] = ordinal
+    return ordinal
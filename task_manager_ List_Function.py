@@ -1,59 +1,3641 @@
+import argparse
+import array
+import asyncio
+import atexit
+import bisect
+import concurrent.futures
+import contextlib
+import cProfile
+import csv
+import functools
+import gc
+import gzip
+import hashlib
+import heapq
+import http
+import itertools
+import json
+import mmap
 import os
+import pstats
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.parse
+import zlib
 from datetime import datetime, timedelta
-from tabulate import tabulate
-from collections import defaultdict
+from collections import defaultdict, deque
+from task_codec import date_ordinal, decode_task_line, encode_task_line
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; the data file lock then only covers this process
+    fcntl = None
+
+
+def tabulate(*args, **kwargs):
+    """Format a table with the tabulate package, which is only imported when the first table is shown."""
+    from tabulate import tabulate as format_table
+    return format_table(*args, **kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def optional_numpy():
+    """
+    Return the numpy module, or None if it is not installed.
+
+    numpy is optional, and only the columnar snapshot uses it (with plain loops
+    instead if it is missing), so it is imported the first time it is needed.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
 
 # Constants for file names
 USER_FILE = 'user.txt'
 TASK_FILE = 'tasks.txt'
+JOURNAL_FILE = 'tasks_journal.txt'
+STATS_FILE = 'task_stats.json'
+STATS_LOG_FILE = 'task_stats_log.txt'
+SQLITE_FILE = 'tasks.db'
+SNAPSHOT_FILE = 'tasks_snapshot.bin'
+SEARCH_FILE = 'tasks_search.db'
+SESSION_FILE = 'tasks_session.json'
+ARCHIVE_DIR = 'archive'
+SHARD_DIR = 'shards'
+REPORT_DATA_FILE = 'task_report.json'
+LOCK_FILE = 'tasks.lock'
+GENERATION_FILE = 'tasks_generation.txt'
+
+# Where users and tasks are kept: 'flat' (the text files above), 'sqlite' (SQLITE_FILE)
+# or 'sharded' (USER_FILE and one task file per bucket of assignees in SHARD_DIR)
+STORAGE_BACKEND = os.environ.get('TASK_MANAGER_BACKEND', 'flat')
+
+# Number of shard files the sharded backend spreads tasks over (fixed once the shards are created)
+SHARD_COUNT = int(os.environ.get('TASK_MANAGER_SHARDS', '64'))
+
+# Number of journal records after which the journal is folded back into TASK_FILE
+JOURNAL_COMPACT_THRESHOLD = 500
+
+# Size STATS_LOG_FILE may grow to before its changes are folded into STATS_FILE
+STATS_LOG_FOLD_BYTES = 256 * 1024
+
+# Times a change refused because another session changed the task first is retried
+STALE_RETRIES = 3
+
+# Number of worker processes used to recount all tasks for the reports
+# (1 counts in this process, 0 uses one worker per CPU core)
+REPORT_WORKERS = int(os.environ.get('TASK_MANAGER_REPORT_WORKERS', '1'))
+
+# Approximate size of the byte ranges of TASK_FILE handed to each report worker
+REPORT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Compute flat-file report statistics from the columnar SNAPSHOT_FILE instead of the saved counters
+ANALYTICS_SNAPSHOT = os.environ.get('TASK_MANAGER_ANALYTICS_SNAPSHOT', '0') == '1'
+
+# Start flat-file sessions from SESSION_FILE, a saved copy of the parsed tasks, instead of parsing TASK_FILE
+SESSION_SNAPSHOT = os.environ.get('TASK_MANAGER_SESSION_SNAPSHOT', '1') == '1'
+
+# SESSION_FILE is saved again when a session ends if TASK_FILE grew by this much since it was saved
+SESSION_SNAPSHOT_STALE_BYTES = 1024 * 1024
+
+# Paging of the "View all tasks" table
+PAGE_SIZE = 20  # Tasks shown per page
+WIDTH_SAMPLE_ROWS = 200  # Tasks looked at to decide the column widths
+COLUMN_WIDTH_CAP = 40  # Widest a column may get; longer values are cut short
+
+# Number of rejected rows listed on screen after a bulk import
+IMPORT_REJECTS_SHOWN = 20
+
+# Write buffer used when appending imported tasks
+IMPORT_BUFFER_BYTES = 1024 * 1024
+
+# Completed tasks due more than this many days ago are archived by default (see the 'archive' command)
+ARCHIVE_AFTER_DAYS = 90
+
+# Number of weeks the workload histogram shows after the current one starts
+WORKLOAD_WEEKS = 8
+
+# Where the JSON API server listens by default (see the 'serve' command)
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8080
+SERVER_WRITE_BATCH = 64  # Most queued writes the server applies in one batch
+SERVER_READ_WORKERS = 4  # Reads the server answers at once, each in a thread of its own
+SERVER_PAGE_LIMIT = 500  # Most tasks returned by one list request
+SERVER_TOKEN_TTL = 8 * 60 * 60  # Seconds a login token stays valid
+
+# Profiling mode: write per-operation timings and I/O counts to this JSON file on exit
+# (also set with the --profile option)
+PROFILE_FILE = os.environ.get('TASK_MANAGER_PROFILE')
+
+# In profiling mode, also capture the first call of this operation with cProfile and tracemalloc
+PROFILE_OPERATION = os.environ.get('TASK_MANAGER_PROFILE_OPERATION')
+
+# Upper bounds, in milliseconds, of the latency histogram buckets used in profiling mode
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class Instrumentation:
+    """
+    Per-operation timings and I/O counts collected in profiling mode.
+
+    Every call of an @instrumented operation (the menu actions) is timed,
+    leaving out the time spent waiting for the user at a prompt, and its
+    latency is added to a histogram with LATENCY_BUCKETS_MS bounds. Rows
+    scanned, bytes read and written, and time spent in named phases (reading
+    and writing the data files, rendering tables) are added to the operation
+    that is running, and to any operation it was called from. The totals are
+    written to a JSON file when the program exits.
+
+    The first call of one chosen operation can also be captured in detail with
+    cProfile and tracemalloc. The profile is saved next to the JSON file, and
+    the slowest functions and largest allocations are included in the JSON.
+    """
+
+    def __init__(self, output_file, capture_operation=None):
+        self.output_file = output_file
+        self.capture_operation = capture_operation
+        self.operations = {}  # name -> totals over every call
+        self.capture = None  # The detailed capture, once started
+        self._started_tracing = False  # True if the capture started tracemalloc, so it has to stop it too
+        self._mutex = threading.Lock()
+        self._local = threading.local()  # Per thread: counters of the running operations, open phases
+
+    def _running(self):
+        """Return the counters of the operations running in this thread, innermost last."""
+        running = getattr(self._local, 'running', None)
+        if running is None:
+            running = self._local.running = []
+        return running
+
+    def call(self, name, function, args, kwargs):
+        """Run function(*args, **kwargs) as one call of the operation name."""
+        counters = {'rows': 0, 'bytes_read': 0, 'bytes_written': 0, 'phases': defaultdict(float)}
+        profiler = None
+        if name == self.capture_operation:
+            with self._mutex:
+                if self.capture is None:
+                    self.capture = {'operation': name}
+                    profiler = self._start_capture()
+        running = self._running()
+        running.append(counters)
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            running.pop()
+            if profiler is not None:
+                self._finish_capture(name, profiler)
+            self._add_call(name, elapsed, counters, failed)
+
+    def _add_call(self, name, elapsed, counters, failed):
+        """Add one finished call to the totals of its operation."""
+        latency_ms = (elapsed - counters['phases'].get('input', 0.0)) * 1000
+        with self._mutex:
+            totals = self.operations.get(name)
+            if totals is None:
+                totals = self.operations[name] = {
+                    'calls': 0, 'errors': 0, 'latency_ms': 0.0, 'max_latency_ms': 0.0,
+                    'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                    'rows': 0, 'bytes_read': 0, 'bytes_written': 0, 'phases': defaultdict(float),
+                }
+            totals['calls'] += 1
+            totals['errors'] += failed
+            totals['latency_ms'] += latency_ms
+            totals['max_latency_ms'] = max(totals['max_latency_ms'], latency_ms)
+            totals['histogram'][bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+            for key in ('rows', 'bytes_read', 'bytes_written'):
+                totals[key] += counters[key]
+            for phase, seconds in counters['phases'].items():
+                totals['phases'][phase] += seconds
+
+    def record_io(self, rows, bytes_read, bytes_written):
+        """Add rows scanned and bytes read and written to the running operations."""
+        for counters in self._running():
+            counters['rows'] += rows
+            counters['bytes_read'] += bytes_read
+            counters['bytes_written'] += bytes_written
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Add the time spent in the with block to the running operations' phase name.
+
+        Time spent in a phase opened inside another one is charged to the inner
+        phase only, so no time is counted twice, and a prompt shown while data
+        is read still counts as 'input'.
+        """
+        phases = getattr(self._local, 'phases', None)
+        if phases is None:
+            phases = self._local.phases = []
+        phases.append(0.0)  # Seconds spent in the phases opened inside this one
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = phases.pop()
+            if phases:
+                phases[-1] += elapsed
+            for counters in self._running():
+                counters['phases'][name] += elapsed - nested
+
+    def _start_capture(self):
+        """Start tracing memory allocations and profiling calls."""
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _finish_capture(self, name, profiler):
+        """Stop the capture, save the profile and keep a summary of it."""
+        profiler.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()  # Otherwise it was started before the capture, and is left running
+        
+        profile_file = f"{os.path.splitext(self.output_file)[0]}.{name}.prof"
+        profiler.dump_stats(profile_file)
+        functions = sorted(pstats.Stats(profiler).stats.items(), key=lambda item: item[1][3], reverse=True)
+        self.capture.update({
+            'profile_file': profile_file,
+            'peak_memory_bytes': peak,
+            # (file, line, function) -> (primitive calls, calls, own time, cumulative time, callers)
+            'slowest_functions': [{
+                'function': f"{function} ({os.path.basename(file)}:{line})",
+                'calls': calls,
+                'own_ms': round(own * 1000, 3),
+                'cumulative_ms': round(cumulative * 1000, 3),
+            } for (file, line, function), (_, calls, own, cumulative, _) in functions[:20]],
+            'largest_allocations': [{
+                'location': f"{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}",
+                'bytes': statistic.size,
+                'blocks': statistic.count,
+            } for statistic in snapshot.statistics('lineno')[:10]],
+        })
+
+    def summary(self):
+        """
+        Return the collected totals as a JSON-serializable dictionary.
+
+        Percentiles are read from the histogram, so each is the upper bound of
+        the bucket it falls in (None past the last bound).
+        """
+        bounds = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        operations = {}
+        with self._mutex:
+            for name, totals in sorted(self.operations.items()):
+                percentiles = {}
+                for label, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+                    wanted = fraction * totals['calls']
+                    seen = 0
+                    for bucket, count in enumerate(totals['histogram']):
+                        seen += count
+                        if seen >= wanted:
+                            break
+                    percentiles[label] = LATENCY_BUCKETS_MS[bucket] if bucket < len(LATENCY_BUCKETS_MS) else None
+                operations[name] = {
+                    'calls': totals['calls'],
+                    'errors': totals['errors'],
+                    'latency_ms': {
+                        'total': round(totals['latency_ms'], 3),
+                        'mean': round(totals['latency_ms'] / totals['calls'], 3),
+                        'max': round(totals['max_latency_ms'], 3),
+                        **percentiles,
+                    },
+                    'histogram_ms': dict(zip(bounds, totals['histogram'])),
+                    'rows_scanned': totals['rows'],
+                    'bytes_read': totals['bytes_read'],
+                    'bytes_written': totals['bytes_written'],
+                    'phases_ms': {phase: round(seconds * 1000, 3) for phase, seconds in sorted(totals['phases'].items())},
+                }
+        return {'pid': os.getpid(), 'operations': operations, 'capture': self.capture}
+
+    def dump(self):
+        """Write summary() to the output file."""
+        with open(self.output_file, 'w') as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+_instrumentation = None  # The session's Instrumentation while profiling mode is on
+
+
+def start_instrumentation(output_file, capture_operation=None):
+    """
+    Turn on profiling mode, writing the results to output_file when the program exits.
+
+    Parameters:
+    output_file (str): The JSON file for the results.
+    capture_operation (str): An operation whose first call is captured with cProfile and tracemalloc.
+    """
+    global _instrumentation
+    _instrumentation = Instrumentation(output_file, capture_operation)
+    atexit.register(_instrumentation.dump)
+    return _instrumentation
+
+
+def instrumented(function):
+    """Decorator recording every call of function in profiling mode; a plain call otherwise."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _instrumentation is None:
+            return function(*args, **kwargs)
+        return _instrumentation.call(function.__name__, function, args, kwargs)
+    return wrapper
+
+
+def instrument_phase(name):
+    """Return a context manager timing its block as phase name of the running operations."""
+    if _instrumentation is None:
+        return contextlib.nullcontext()
+    return _instrumentation.phase(name)
+
+
+def record_io(rows=0, bytes_read=0, bytes_written=0):
+    """Add rows scanned and bytes read and written to the running operations, in profiling mode."""
+    if _instrumentation is not None:
+        _instrumentation.record_io(rows, bytes_read, bytes_written)
+
+
+def read_input(prompt=''):
+    """
+    Ask the user for input, as input() does.
+
+    Every prompt in this module goes through here, so in profiling mode the
+    time spent waiting for the user is counted as the 'input' phase instead
+    of as latency of the running operation.
+
+    Parameters:
+    prompt (str): The text shown before the answer is typed.
+
+    Returns:
+        str: The line the user typed, without the newline.
+    """
+    with instrument_phase('input'):
+        return input(prompt)
+
+
+def ensure_file_exists(file_name):
+    """Ensure that a file exists, otherwise create it to avoid file not found error."""
+    if not os.path.exists(file_name):
+        with open(file_name, 'w') as file:
+            pass
+
+def read_users():
+    """
+    Read users from the configured storage backend.
+
+    Returns:
+        dict: A dictionary where the keys are usernames and the values are passwords.
+    """
+    return get_storage_backend().read_users()
+
+
+class UserRegistry:
+    """
+    Session-wide cache of the users in USER_FILE.
+
+    Users are kept in a dictionary keyed by username, so checking that a user
+    exists is a single hash lookup. The registry remembers the inode, mtime and
+    size of USER_FILE and how far it has read into it. It re-reads nothing while
+    the file is unchanged, reads only the new lines when the file was appended
+    to, and starts over when the file was replaced or shrank. Users added
+    through add() go straight into the dictionary.
+    """
+
+    def __init__(self, file_name=USER_FILE):
+        self.file_name = file_name
+        self.users = {}  # username -> password
+        self._stamp = None  # (inode, mtime_ns, size) of the file when last read
+        self._offset = 0  # Bytes of the file read so far
+
+    def refresh(self, locked=False):
+        """
+        Bring the registry up to date with USER_FILE, reading as little as possible.
+
+        A last line without a newline may be a registration still being written,
+        so it is only read under task_file_lock(), when no writer can be active.
+        """
+        # Ensure that the USER_FILE exists before trying to read from it
+        ensure_file_exists(self.file_name)
+        stamp = TaskStore._file_stamp(self.file_name)
+        if stamp == self._stamp:
+            return self
+        if self._stamp is None or stamp[0] != self._stamp[0] or stamp[2] < self._offset:
+            # The file is new to us or was replaced, so read it from the start
+            self.users.clear()
+            self._offset = 0
+        
+        # Open the USER_FILE and read the lines we have not seen yet
+        start = self._offset
+        with open(self.file_name, 'rb') as file:
+            file.seek(self._offset)
+            for raw_line in file:
+                if not raw_line.endswith(b'\n') and not locked:
+                    with task_file_lock():
+                        return self.refresh(locked=True)
+                self._offset += len(raw_line)
+                line = raw_line.decode('utf-8').strip()
+                if not line:
+                    continue  # Skip blank lines
+                # Split the line into username and password and store them in the dictionary
+                username, password = line.split(', ')
+                self.users[username] = password
+        record_io(bytes_read=self._offset - start)
+        self._stamp = stamp
+        return self
+
+    def add(self, username, password):
+        """
+        Append a new user to USER_FILE and to the registry.
+
+        Returns:
+            bool: False if another session registered the username first.
+        """
+        record = f"{username}, {password}\n".encode('utf-8')
+        with task_file_lock():
+            self.refresh()
+            if username in self.users:
+                return False
+            with open(self.file_name, 'ab') as file:
+                file.write(record)
+            self.users[username] = password
+            # Nobody else can have written to the file in between, so there is nothing new to read
+            self._offset += len(record)
+            self._stamp = TaskStore._file_stamp(self.file_name)
+        return True
+
+
+_user_registry = None  # The session-wide UserRegistry, created on first use
+
+
+def get_user_registry():
+    """Return the session-wide UserRegistry, reloading it if USER_FILE changed."""
+    global _user_registry
+    with instrument_phase('read'), _lock_mutex:
+        if _user_registry is None:
+            _user_registry = UserRegistry(USER_FILE)
+        return _user_registry.refresh()
+
+
+class StaleTaskError(Exception):
+    """Raised when a task was changed by another session after it was read, so an edit is refused."""
+
+    def __init__(self, task):
+        super().__init__("The task was changed by someone else.")
+        self.task = task  # The task as it is now, or None if it no longer exists
+
+
+_lock_mutex = threading.RLock()  # Serializes the threads of this process
+_lock_depth = 0  # How many nested task_file_lock() blocks this process is in
+_lock_handle = None  # The open LOCK_FILE while the lock is held
+
+
+@contextlib.contextmanager
+def task_file_lock():
+    """
+    Hold the advisory lock that every read-modify-write of the data files runs under.
+
+    The lock is an exclusive flock on LOCK_FILE, so it also keeps other sessions
+    (processes) out. It can be nested within one thread.
+    """
+    global _lock_depth, _lock_handle
+    with _lock_mutex:
+        if _lock_depth == 0:
+            _lock_handle = open(LOCK_FILE, 'a')
+            if fcntl is not None:
+                fcntl.flock(_lock_handle.fileno(), fcntl.LOCK_EX)
+        _lock_depth += 1
+        try:
+            yield
+        finally:
+            _lock_depth -= 1
+            if _lock_depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(_lock_handle.fileno(), fcntl.LOCK_UN)
+                _lock_handle.close()
+                _lock_handle = None
+
+
+class GroupCommitWriter:
+    """
+    Appends records to one of the data files, grouping appends made at the same time.
+
+    A write is described by a prepare() function, called under task_file_lock(),
+    that returns (bytes to append, statistics change) or raises to refuse the
+    write (for example StaleTaskError), and an optional finish(offset, length)
+    function called once the bytes are on disk. Writes submitted while another
+    thread is committing are queued; the next commit takes the whole queue, so
+    the group costs one lock acquisition, one write and one fsync. The report
+    counters are then updated once for the group.
+
+    A crash part way through an earlier append can leave a record without its
+    newline at the end of the file. It is cut off before the group is written
+    (see repair_file_tail()), so the group's first record starts a line of its
+    own instead of being merged into the broken one. whole_line, if given,
+    recognizes a last line that is complete although it has no newline.
+
+    A caller that makes many writes one after another, such as the API
+    server's writer applying a batch, groups them with group_commit(): each is
+    still written when it is submitted, but the group is made durable with one
+    fsync at the end of the block.
+    """
+
+    def __init__(self, file_name, whole_line=None):
+        self.file_name = file_name
+        self.whole_line = whole_line
+        self._mutex = threading.Lock()
+        self._queue = []  # Pending writes: [prepare, finish, done event, result, error, submitting thread]
+        self._committing = False  # True while some thread is committing groups
+
+    def submit(self, prepare, finish=None):
+        """
+        Append one record and return what finish returned, once it is durable.
+
+        Inside a group_commit() block the record is durable once the block ends.
+        """
+        entry = [prepare, finish, threading.Event(), None, None, threading.get_ident()]
+        with self._mutex:
+            self._queue.append(entry)
+            leader = not self._committing
+            self._committing = True
+        
+        if leader:
+            # Commit groups until nothing is left, including writes queued meanwhile
+            while True:
+                with self._mutex:
+                    group, self._queue = self._queue, []
+                    if not group:
+                        self._committing = False
+                        break
+                self._commit(group)
+        entry[2].wait()
+        if entry[4] is not None:
+            raise entry[4]
+        return entry[3]
+
+    def _commit(self, group):
+        """Prepare, write and fsync one group of writes under the data file lock."""
+        try:
+            with task_file_lock():
+                stamps_before = data_file_stamps()
+                prepared = []
+                for entry in group:
+                    try:
+                        data, change = entry[0]()
+                        prepared.append((entry, data, change))
+                    except Exception as error:
+                        entry[4] = error
+                if not prepared:
+                    return
+                
+                data = b''.join(data for _, data, _ in prepared)
+                with instrument_phase('write'), open(self.file_name, 'a+b') as file:
+                    offset = repair_file_tail(file, self.whole_line)
+                    file.write(data)
+                    file.flush()
+                    # Only this thread's own writes can wait for the end of its group_commit() block
+                    sync_append(self.file_name, file,
+                                all(entry[5] == threading.get_ident() for entry, _, _ in prepared))
+                record_io(bytes_written=len(data))
+                
+                for entry, data, _ in prepared:
+                    if entry[1] is not None:
+                        entry[3] = entry[1](offset, len(data))
+                    offset += len(data)
+                record_statistics_change(stamps_before, [change for _, _, change in prepared if change])
+        except Exception as error:
+            for entry in group:
+                if entry[4] is None:
+                    entry[4] = error
+        finally:
+            for entry in group:
+                entry[2].set()
+
+
+def repair_file_tail(file, whole_line=None):
+    """
+    Cut a partly written last line off a data file, so the next append starts a new line.
+
+    Must be called under task_file_lock(), on a file opened for reading and
+    appending ('a+b'). Every record is appended together with its newline, so
+    a last line without one is normally what is left of an append that a crash
+    stopped part way. That append was never reported as saved. The exception
+    is a line whole_line(text) accepts (a task file written by hand or by an
+    older version may end without a newline); it just gets its newline.
+
+    Returns:
+        int: The size of the file afterwards, where the next append goes.
+    """
+    size = file.seek(0, os.SEEK_END)
+    if size == 0:
+        return size
+    file.seek(size - 1)
+    if file.read(1) == b'\n':
+        return size
+    
+    # Look backwards, one block at a time, for the end of the last complete line
+    end = size
+    while end > 0:
+        start = max(0, end - 4096)
+        file.seek(start)
+        newline = file.read(end - start).rfind(b'\n')
+        if newline != -1:
+            end = start + newline + 1
+            break
+        end = start
+    if whole_line is not None:
+        file.seek(end)
+        if whole_line(file.read().decode('utf-8', 'replace')):
+            file.write(b'\n')
+            file.flush()
+            return size + 1
+    file.truncate(end)
+    file.flush()
+    return file.seek(0, os.SEEK_END)
+
+
+_group_commit = threading.local()  # .files: data files appended to in this thread's group_commit() block
+
+
+@contextlib.contextmanager
+def group_commit():
+    """
+    Make every append in the block durable with one fsync per data file, when the block ends.
+
+    The block runs under task_file_lock(). Appends made in it through a
+    GroupCommitWriter or FlatFileBackend.add_tasks are written straight away,
+    so reads see them, but their fsync is left to the end of the block. So
+    nothing they return may be reported as saved before the block has ended
+    without an error. Blocks can be nested; the outermost one syncs.
+    """
+    if getattr(_group_commit, 'files', None) is not None:
+        yield
+        return
+    with task_file_lock():
+        _group_commit.files = {}  # Used as an ordered set
+        try:
+            yield
+            for file_name in _group_commit.files:
+                with instrument_phase('write'), open(file_name, 'ab') as file:
+                    os.fsync(file.fileno())
+        finally:
+            _group_commit.files = None
+
+
+def sync_append(file_name, file, deferrable=True):
+    """
+    fsync a flushed append to a data file, or leave it to the end of this thread's group_commit() block.
+
+    Parameters:
+    file_name (str): The data file.
+    file (file): The file, open for appending.
+    deferrable (bool): False if the append has to be durable straight away, even in a group_commit() block.
+    """
+    files = getattr(_group_commit, 'files', None)
+    if files is None or not deferrable:
+        os.fsync(file.fileno())
+    else:
+        files[file_name] = None
+
+
+_reported_lines = set()  # (file name, line) of every damaged line reported in this session
+
+
+def report_damaged_line(file_name, line):
+    """Tell the user, once per session, that a line of a data file could not be read and was skipped."""
+    if (file_name, line) not in _reported_lines:
+        _reported_lines.add((file_name, line))
+        print(f"Warning: skipped a damaged line in {file_name}: {line.strip()[:80]!r}")
+
+
+_writers = {}  # file name -> GroupCommitWriter
+
+
+def get_group_writer(file_name, whole_line=None):
+    """Return the session-wide GroupCommitWriter for a data file."""
+    with _lock_mutex:
+        if file_name not in _writers:
+            _writers[file_name] = GroupCommitWriter(file_name, whole_line)
+        return _writers[file_name]
+
+
+class Task:
+    """
+    A single task parsed from TASK_FILE.
+
+    Records use __slots__ so that large task files do not pay for a per-row
+    instance dictionary. The task_id is the position of the task in TASK_FILE.
+    """
+
+    __slots__ = ('task_id', 'username', 'title', 'description',
+                 'assigned_date', 'due_date', 'completed')
+
+    def __init__(self, task_id, username, title, description, assigned_date, due_date, completed):
+        self.task_id = task_id
+        self.username = username
+        self.title = title
+        self.description = description
+        self.assigned_date = assigned_date
+        self.due_date = due_date
+        self.completed = completed
+
+    def to_fields(self):
+        """Return the task as the list of fields stored on one line of TASK_FILE."""
+        return [self.username, self.title, self.description,
+                self.assigned_date, self.due_date, self.completed]
+
+    def to_dict(self):
+        """Return the task as a dictionary, as the JSON API sends it."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def parse_task_line(line, file_name):
+    """
+    Split one line of a task file into the six fields of a task.
+
+    Parameters:
+    line (str): The line, which is not blank.
+    file_name (str): The file it was read from, for the warning.
+
+    Returns:
+        list: The fields, or None if the line does not hold six fields. The line
+        is then reported and skipped, and does not count as a task (so it gets no id).
+    """
+    fields = decode_task_line(line)
+    if len(fields) != 6:
+        report_damaged_line(file_name, line)
+        return None
+    return fields
+
+
+def is_whole_task_line(line):
+    """
+    Return True if the last line of a task file, which has no newline, holds a complete task.
+
+    Anything else there is an append that a crash stopped part way. It is
+    left unread, and the next append cuts it off (see repair_file_tail()).
+    """
+    fields = decode_task_line(line)
+    return len(fields) == 6 and fields[5] in ('Yes', 'No')
+
+
+class TaskFilter:
+    """
+    Selects the tasks a bulk operation applies to.
+
+    Every condition that is not None has to hold: the assignee, the range of
+    due days (inclusive), text the title contains (ignoring case) and the
+    completion status. A filter with no conditions selects every task.
+    """
+
+    __slots__ = ('username', 'first_day', 'last_day', 'title', 'completed')
+
+    def __init__(self, username=None, first_day=None, last_day=None, title=None, completed=None):
+        self.username = username
+        self.first_day = first_day  # Day ordinal of the earliest due date
+        self.last_day = last_day  # Day ordinal of the latest due date
+        self.title = title
+        self.completed = completed
+
+    def matches(self, task):
+        """Return True if the filter selects a task."""
+        if self.username is not None and task.username != self.username:
+            return False
+        if self.completed is not None and task.completed != self.completed:
+            return False
+        if self.first_day is not None or self.last_day is not None:
+            day = date_ordinal(task.due_date)
+            if (self.first_day is not None and day < self.first_day) or (self.last_day is not None and day > self.last_day):
+                return False
+        return self.title is None or title_contains(task.title, self.title)
+
+
+def title_contains(title, text):
+    """Return True if a task title contains text, ignoring case (also used as an SQLite function)."""
+    return text.casefold() in title.casefold()
+
+
+class TaskStore:
+    """
+    In-memory copy of TASK_FILE shared by every menu action.
+
+    The file is parsed once and kept as a list of Task records together with
+    secondary indexes by assignee, due date and completion status. Each index
+    maps a key to a sorted list of task ids. Incomplete tasks are also kept in
+    due-date order, as sorted (due day ordinal, task id) pairs, overall and per
+    assignee, so the tasks due in any range of days are found by bisection.
+
+    Edits are not written back into TASK_FILE. They are appended to JOURNAL_FILE
+    as one small JSON record per change, keyed by task id, and replayed on top of
+    the base file when it is loaded. Once the journal holds
+    JOURNAL_COMPACT_THRESHOLD records it is folded back into TASK_FILE.
+
+    The store remembers how far it has read into both files. When new lines are
+    only appended (add_task, other sessions' edits) it parses just the new bytes.
+    If TASK_FILE was replaced, or the journal shrank, everything is reloaded.
+
+    A session can also start from a snapshot of the parsed tasks and indexes
+    saved by an earlier one (see save_snapshot()), so a large TASK_FILE does
+    not have to be parsed again on every start.
+    """
+
+    SNAPSHOT_VERSION = 3  # Changed whenever the layout saved by save_snapshot() changes
+    SNAPSHOT_TAIL_BYTES = 4096  # Bytes before the snapshot's read offset checked to match TASK_FILE
+
+    def __init__(self, file_name=TASK_FILE, journal_name=JOURNAL_FILE):
+        self.file_name = file_name
+        self.journal_name = journal_name
+        self.tasks = []  # All tasks, in file order (task_id == index)
+        self.by_assignee = defaultdict(list)
+        self.by_due_date = defaultdict(list)
+        self.by_status = defaultdict(list)
+        self.open_by_due = []  # (due day ordinal, task id) of every incomplete task, sorted
+        self.open_by_due_for = defaultdict(list)  # assignee -> the same pairs for their incomplete tasks
+        self.journal_records = 0  # Number of journal records replayed so far
+        self._base_stamp = None  # (inode, mtime_ns, size) of TASK_FILE when last read
+        self._base_offset = 0  # Bytes of TASK_FILE parsed so far
+        self._journal_offset = 0  # Bytes of JOURNAL_FILE replayed so far
+        # TASK_FILE is kept open between reads, so that once another session replaces it,
+        # its inode cannot be reused by a new file that we would mistake for the old one
+        self._base_file = None
+        self._snapshot_offset = None  # _base_offset when the saved snapshot was taken, if it matches TASK_FILE
+
+    @staticmethod
+    def _file_stamp(file_name):
+        """Return the (inode, mtime_ns, size) triple used to detect changes to a file."""
+        stat = os.stat(file_name)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self):
+        """Bring the store up to date with TASK_FILE and JOURNAL_FILE, reading as little as possible."""
+        ensure_file_exists(self.file_name)
+        ensure_file_exists(self.journal_name)
+        if self._base_stamp is None or self.needs_reload():
+            # TASK_FILE is new or was replaced, or the journal was compacted by another session,
+            # so nothing we hold can be trusted
+            self.load()
+            return self
+        
+        if self._file_stamp(self.file_name) != self._base_stamp:
+            # Same file that only grew: parse the appended lines
+            self._read_base()
+        if os.path.getsize(self.journal_name) > self._journal_offset:
+            self._replay_journal()
+        return self
+
+    def needs_reload(self):
+        """Return True if TASK_FILE was replaced or JOURNAL_FILE compacted since the store last read them."""
+        if self._base_stamp is None:
+            return False  # Nothing has been read yet
+        base_stamp = self._file_stamp(self.file_name)
+        return (base_stamp[0] != self._base_stamp[0] or base_stamp[2] < self._base_offset
+                or os.path.getsize(self.journal_name) < self._journal_offset)
+
+    def load(self):
+        """Parse the whole base file, replay the journal and rebuild the indexes."""
+        self.tasks = []
+        self.journal_records = 0
+        self._base_stamp = None
+        self._base_offset = 0
+        self._journal_offset = 0
+        self._snapshot_offset = None
+        self._close_base()
+        self._read_base(index=False)
+        self._replay_journal(index=False)
+        self._rebuild_indexes()
+
+    def _read_base(self, index=True, locked=False):
+        """
+        Parse TASK_FILE from where the previous read stopped.
+
+        A last line without a newline may be an append still being written by
+        another session, so it is only parsed under task_file_lock(), when no
+        writer can be active. Lines that do not hold a task are reported and
+        skipped.
+        """
+        if self._base_file is None:
+            self._base_file = open(self.file_name, 'rb')
+        file = self._base_file
+        stat = os.fstat(file.fileno())
+        if self._base_offset and stat.st_ino != self._base_stamp[0]:
+            # TASK_FILE was replaced after refresh() looked at it, so the offset means nothing here
+            self.load()
+            return
+        self._base_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        start_offset, start_rows = self._base_offset, len(self.tasks)
+        file.seek(self._base_offset)
+        for raw_line in file:
+            if not raw_line.endswith(b'\n'):
+                if not locked:
+                    with task_file_lock():
+                        return self._read_base(index, locked=True)
+                if not is_whole_task_line(raw_line.decode('utf-8', 'replace')):
+                    break  # Left by a crash part way through an append, so stop before it
+            self._base_offset += len(raw_line)
+            line = raw_line.decode('utf-8')
+            if not line.strip():
+                continue  # Skip blank lines
+            fields = parse_task_line(line, self.file_name)
+            if fields is None:
+                continue
+            task = Task(len(self.tasks), *fields)
+            self.tasks.append(task)
+            if index:
+                self._index(task)
+        record_io(len(self.tasks) - start_rows, self._base_offset - start_offset)
+        if os.name == 'nt':
+            self._close_base()  # Windows cannot replace a file that is open
+
+    def save_snapshot(self, file_name):
+        """
+        Save the parsed tasks and indexes to file_name, for load_snapshot() in a later session.
+
+        Must be called under task_file_lock(). The store is brought up to date
+        first, so the snapshot describes the files as they are, and it records
+        their generation (see read_task_generation()). The snapshot is plain
+        JSON, so loading one can never run code, and the tasks are saved as one
+        list per field, which saves and loads far faster than a million
+        separate records.
+        """
+        self.refresh()
+        state = {
+            'version': self.SNAPSHOT_VERSION,
+            'generation': read_task_generation(),
+            'base_stamp': self._base_stamp,
+            'base_offset': self._base_offset,
+            'base_tail': self._read_base_tail(self._base_offset).hex(),
+            'journal_offset': self._journal_offset,
+            'journal_records': self.journal_records,
+            'columns': [[getattr(task, field) for task in self.tasks] for field in Task.__slots__[1:]],
+            'indexes': (dict(self.by_assignee), dict(self.by_due_date), dict(self.by_status),
+                        self.open_by_due, dict(self.open_by_due_for)),
+        }
+        temp_file = file_name + '.tmp'
+        with instrument_phase('write'), open(temp_file, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(state, separators=(',', ':')))  # Much faster than json.dump() writing piece by piece
+            record_io(bytes_written=file.tell())
+        os.replace(temp_file, file_name)
+        self._snapshot_offset = self._base_offset
+
+    def load_snapshot(self, file_name):
+        """
+        Fill an empty store from a snapshot saved by save_snapshot(), instead of parsing TASK_FILE.
+
+        The snapshot is only used if TASK_FILE is still the file it was taken
+        of. The file must not have been rewritten by this program since (the
+        same generation), which also means the journal has only grown. It must
+        also have the same inode, be at least as long, and have the same bytes
+        just before where the snapshot stopped reading, in case it was changed
+        by other means. A file system can give a rewritten file the inode of
+        the old one, so the generation is the check that catches rewrites.
+        refresh() then parses the lines appended since and replays the newer
+        journal records as usual.
+
+        Returns:
+            bool: True if the snapshot was loaded, False if it is missing or out of date.
+        """
+        try:
+            with open(file_name, 'r', encoding='utf-8') as file:
+                # Creating a million objects would otherwise set off the garbage collector again and again
+                collecting = gc.isenabled()
+                gc.disable()
+                try:
+                    state = json.load(file)
+                    record_io(bytes_read=file.tell())
+                    if not self._snapshot_matches(state):
+                        return False
+                    columns = state['columns']
+                    tasks = list(map(Task, range(len(columns[0])), *columns))
+                    by_assignee, by_due_date, by_status, open_by_due, open_by_due_for = state['indexes']
+                    # JSON has no tuples, so the (due day ordinal, task id) pairs come back as lists
+                    open_by_due = list(map(tuple, open_by_due))
+                    open_by_due_for = {username: list(map(tuple, entries))
+                                       for username, entries in open_by_due_for.items()}
+                finally:
+                    if collecting:
+                        gc.enable()
+        except (OSError, ValueError, KeyError, IndexError, TypeError, AttributeError):
+            return False  # Missing, damaged, or not a snapshot at all
+        self.tasks = tasks
+        self.open_by_due = open_by_due
+        self.by_assignee = defaultdict(list, by_assignee)
+        self.by_due_date = defaultdict(list, by_due_date)
+        self.by_status = defaultdict(list, by_status)
+        self.open_by_due_for = defaultdict(list, open_by_due_for)
+        self._base_stamp = tuple(state['base_stamp'])
+        self._base_offset = self._snapshot_offset = state['base_offset']
+        self._journal_offset = state['journal_offset']
+        self.journal_records = state['journal_records']
+        record_io(len(self.tasks))
+        return True
+
+    def _snapshot_matches(self, state):
+        """Return True if a snapshot's state still describes the beginning of TASK_FILE and JOURNAL_FILE."""
+        if state.get('version') != self.SNAPSHOT_VERSION or state['base_stamp'] is None:
+            return False
+        if state['generation'] != read_task_generation():
+            return False  # TASK_FILE was rewritten and the journal emptied since
+        stamp = self._file_stamp(self.file_name)
+        if tuple(state['base_stamp']) != stamp:
+            if stamp[0] != state['base_stamp'][0] or stamp[2] <= state['base_stamp'][2]:
+                return False  # TASK_FILE was replaced, or changed without growing, so not just appended to
+            # The same inode could belong to a new file, so also compare the bytes before the offset
+            if self._read_base_tail(state['base_offset']).hex() != state['base_tail']:
+                return False
+        return os.path.getsize(self.journal_name) >= state['journal_offset']
+
+    def _read_base_tail(self, offset):
+        """Return the SNAPSHOT_TAIL_BYTES of TASK_FILE before offset."""
+        start = max(0, offset - self.SNAPSHOT_TAIL_BYTES)
+        with open(self.file_name, 'rb') as file:
+            file.seek(start)
+            return file.read(offset - start)
+
+    def snapshot_is_stale(self):
+        """Return True if saving a snapshot now would spare the next session a noticeable amount of parsing."""
+        if self._base_stamp is None or self._file_stamp(self.file_name)[0] != self._base_stamp[0]:
+            return False  # Nothing was loaded, or TASK_FILE has been replaced since
+        return (self._snapshot_offset is None
+                or self._base_offset - self._snapshot_offset >= SESSION_SNAPSHOT_STALE_BYTES)
+
+    def _close_base(self):
+        """Close the handle kept on TASK_FILE, if any."""
+        if self._base_file is not None:
+            self._base_file.close()
+            self._base_file = None
+
+    def _replay_journal(self, index=True, catch_up=True):
+        """
+        Apply the journal records written since the previous replay.
+
+        Another session may have added a task to TASK_FILE and recorded an edit
+        of it after TASK_FILE was last read. The replay then stops at that
+        record, reads the new tasks and goes on; catch_up=False reports such a
+        record instead, so this happens only once.
+        """
+        start_offset, start_records = self._journal_offset, self.journal_records
+        behind = False
+        with open(self.journal_name, 'rb') as file:
+            file.seek(self._journal_offset)
+            for raw_line in file:
+                if not raw_line.endswith(b'\n'):
+                    break  # A partly written record, left behind by a crash or a writer still going
+                self._journal_offset += len(raw_line)
+                try:
+                    record = json.loads(raw_line)
+                    task_id = record.pop('id')
+                    if catch_up and isinstance(task_id, int) and task_id >= len(self.tasks):
+                        self._journal_offset -= len(raw_line)  # Replayed again once the task has been read
+                        behind = True
+                        break
+                    task = self.tasks[task_id]
+                except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                    # A complete line that is not a record of a known task: report it and go on
+                    report_damaged_line(self.journal_name, raw_line.decode('utf-8', 'replace'))
+                    continue
+                if index:
+                    self._unindex(task)
+                for field, value in record.items():
+                    setattr(task, field, value)
+                if index:
+                    self._index(task)
+                self.journal_records += 1
+        record_io(self.journal_records - start_records, self._journal_offset - start_offset)
+        if behind:
+            self._read_base(index)
+            self._replay_journal(index, catch_up=False)
+
+    def _rebuild_indexes(self):
+        """Rebuild every secondary index from the task list."""
+        self.by_assignee = defaultdict(list)
+        self.by_due_date = defaultdict(list)
+        self.by_status = defaultdict(list)
+        self.open_by_due = []
+        self.open_by_due_for = defaultdict(list)
+        for task in self.tasks:
+            self.by_assignee[task.username].append(task.task_id)
+            self.by_due_date[task.due_date].append(task.task_id)
+            self.by_status[task.completed].append(task.task_id)
+            if task.completed != 'Yes':
+                entry = (date_ordinal(task.due_date), task.task_id)
+                self.open_by_due.append(entry)
+                self.open_by_due_for[task.username].append(entry)
+        # Sort once at the end instead of inserting every pair in order
+        self.open_by_due.sort()
+        for entries in self.open_by_due_for.values():
+            entries.sort()
+
+    def _unindex(self, task):
+        """Remove a task from the secondary indexes, finding it in each sorted id list by bisection."""
+        for task_ids in (self.by_assignee[task.username], self.by_due_date[task.due_date],
+                         self.by_status[task.completed]):
+            del task_ids[bisect.bisect_left(task_ids, task.task_id)]
+        if task.completed != 'Yes':
+            entry = (date_ordinal(task.due_date), task.task_id)
+            for entries in (self.open_by_due, self.open_by_due_for[task.username]):
+                del entries[bisect.bisect_left(entries, entry)]
+
+    def _index(self, task):
+        """Insert a task into the secondary indexes, keeping each id list sorted."""
+        bisect.insort(self.by_assignee[task.username], task.task_id)
+        bisect.insort(self.by_due_date[task.due_date], task.task_id)
+        bisect.insort(self.by_status[task.completed], task.task_id)
+        if task.completed != 'Yes':
+            entry = (date_ordinal(task.due_date), task.task_id)
+            bisect.insort(self.open_by_due, entry)
+            bisect.insort(self.open_by_due_for[task.username], entry)
+
+    def due_range(self, first_day=None, last_day=None, username=None):
+        """
+        Find the incomplete tasks due between two days, inclusive, by bisecting the due-date index.
+
+        Parameters:
+        first_day (int): Day ordinal of the earliest due date (None for no limit).
+        last_day (int): Day ordinal of the latest due date (None for no limit).
+        username (str): Only look at tasks assigned to this user (None for everyone).
+
+        Returns:
+            tuple: (the sorted list of (due day ordinal, task id) pairs, the index of the
+            first matching pair, the index after the last one)
+        """
+        entries = self.open_by_due if username is None else self.open_by_due_for.get(username, [])
+        start = 0 if first_day is None else bisect.bisect_left(entries, (first_day,))
+        end = len(entries) if last_day is None else bisect.bisect_left(entries, (last_day + 1,))
+        return entries, start, max(start, end)
+
+    def tasks_for(self, username):
+        """Return the tasks assigned to username, using the assignee index."""
+        return [self.tasks[task_id] for task_id in self.by_assignee.get(username, ())]
+
+    def update_task(self, task, expected=None, **changes):
+        """
+        Change fields of a task, recording the change as one append to JOURNAL_FILE.
+
+        The append goes through the journal's GroupCommitWriter, under the data
+        file lock. The store is refreshed first, and if `expected` (the task's
+        fields as the caller last saw them) no longer matches, the change is
+        refused with StaleTaskError. The in-memory task and the indexes are
+        updated straight away. When the journal reaches
+        JOURNAL_COMPACT_THRESHOLD records it is compacted.
+
+        Returns:
+            Task: The store's up-to-date record of the task.
+        """
+        def prepare():
+            self.refresh()
+            current = self.tasks[task.task_id] if task.task_id < len(self.tasks) else None
+            if current is None or (expected is not None and current.to_fields() != list(expected)):
+                raise StaleTaskError(current)
+            
+            record = (json.dumps(dict(id=current.task_id, **changes)) + '\n').encode('utf-8')
+            removed = (current.username, current.due_date, current.completed)
+            self._unindex(current)
+            for field, value in changes.items():
+                setattr(current, field, value)
+            self._index(current)
+            
+            # The change to the saved report counters for this one task
+            first_ids = {username: self.by_assignee[username][0]
+                         for username in (removed[0], current.username) if self.by_assignee.get(username)}
+            added = (current.username, current.due_date, current.completed, current.task_id)
+            return record, (removed, added, first_ids)
+        
+        def finish(offset, length):
+            if offset == self._journal_offset:
+                # Our record is already applied, so the journal does not need replaying up to here
+                self._journal_offset += length
+                self.journal_records += 1
+            return self.tasks[task.task_id]
+        
+        try:
+            current = get_group_writer(self.journal_name).submit(prepare, finish)
+        except OSError:
+            self.load()  # The change may not have been written, so start again from the files
+            raise
+        
+        if self.journal_records >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact()
+        return current
+
+    def compact(self):
+        """
+        Fold the journal into TASK_FILE and empty the journal.
+
+        The merged tasks are written to a temporary file which then atomically
+        replaces TASK_FILE, so a crash leaves either the old or the new file in
+        place. Journal records only ever set absolute values, so if a crash hits
+        between the rename and the truncation, replaying them again is harmless.
+        """
+        with task_file_lock():
+            self.refresh()  # Pick up anything other sessions appended first
+            stamps_before = data_file_stamps()
+            self._close_base()
+            next_task_generation()
+            write_tasks_atomically(self.file_name, self.tasks)
+            with open(self.journal_name, 'w'):
+                pass  # Truncate the journal now that TASK_FILE contains its changes
+            record_statistics_change(stamps_before)  # The counts are unchanged, only the stamps move on
+            fold_statistics_log()
+            self._reopen_base()
+
+    def _reopen_base(self):
+        """Start reading a TASK_FILE that was just rewritten from the in-memory tasks, with an empty journal."""
+        self._base_file = open(self.file_name, 'rb')
+        stat = os.fstat(self._base_file.fileno())
+        self._base_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._base_offset = self._base_stamp[2]
+        self._journal_offset = 0
+        self.journal_records = 0
+        self._snapshot_offset = None  # A saved snapshot describes the old TASK_FILE
+
+    def matching(self, task_filter):
+        """Return the tasks a TaskFilter selects, in id order, narrowing the search with an index first."""
+        if task_filter.username is not None:
+            task_ids = self.by_assignee.get(task_filter.username, [])
+        elif task_filter.completed is not None:
+            task_ids = self.by_status.get(task_filter.completed, [])
+        else:
+            task_ids = range(len(self.tasks))
+        return [self.tasks[task_id] for task_id in task_ids if task_filter.matches(self.tasks[task_id])]
+
+    def update_tasks(self, task_filter, **changes):
+        """
+        Change the same fields of every task a TaskFilter selects, with one rewrite of TASK_FILE.
+
+        The changes are made in memory and then every task is written to a
+        temporary file that atomically replaces TASK_FILE. A journal with
+        records in it is compacted first: replaying an older record after a
+        crash could otherwise undo part of the bulk change.
+
+        Returns:
+            int: The number of tasks changed.
+        """
+        with task_file_lock():
+            self.refresh()
+            if os.path.getsize(self.journal_name):
+                self.compact()
+            selected = self.matching(task_filter)
+            if not selected:
+                return 0
+            
+            stamps_before = data_file_stamps()
+            statistics_changes = []
+            for task in selected:
+                removed = (task.username, task.due_date, task.completed)
+                for field, value in changes.items():
+                    setattr(task, field, value)
+                statistics_changes.append((removed, (task.username, task.due_date, task.completed, task.task_id), None))
+            # One pass over every task rebuilds the indexes faster than moving many tasks one at a time
+            self._rebuild_indexes()
+            statistics_changes.append((None, None, {username: task_ids[0]
+                                                    for username, task_ids in self.by_assignee.items()}))
+            
+            self._close_base()
+            try:
+                next_task_generation()
+                write_tasks_atomically(self.file_name, self.tasks)
+            except OSError:
+                self.load()  # The tasks in memory no longer match the file
+                raise
+            record_statistics_change(stamps_before, statistics_changes)
+            self._reopen_base()
+        return len(selected)
+
+
+_task_store = None  # The session-wide TaskStore, created on first use
+
+
+def get_task_store():
+    """
+    Return the session-wide TaskStore, reloading it if TASK_FILE changed.
+
+    The first call starts from SESSION_FILE when SESSION_SNAPSHOT is set and
+    the snapshot still matches TASK_FILE, instead of parsing the whole file.
+    """
+    global _task_store
+    # One thread at a time brings the store up to date (the API server reads from several)
+    with instrument_phase('read'), _lock_mutex:
+        if _task_store is None:
+            _task_store = TaskStore(TASK_FILE, JOURNAL_FILE)
+            ensure_file_exists(TASK_FILE)
+            ensure_file_exists(JOURNAL_FILE)
+            if SESSION_SNAPSHOT:
+                _task_store.load_snapshot(SESSION_FILE)
+        elif _task_store.needs_reload():
+            # Loaded into a new store, so that reads still running in other threads keep the old one whole
+            _task_store._close_base()
+            _task_store = TaskStore(TASK_FILE, JOURNAL_FILE)
+        return _task_store.refresh()
+
+
+def read_tasks():  # reading Task file
+    """Prepare the configured storage backend (for flat files, load TASK_FILE into the TaskStore)."""
+    get_storage_backend().prepare()
+
+def data_file_stamps():
+    """Return the stamps of TASK_FILE and JOURNAL_FILE, used to check that STATS_FILE is current."""
+    ensure_file_exists(TASK_FILE)
+    ensure_file_exists(JOURNAL_FILE)
+    return [list(TaskStore._file_stamp(TASK_FILE)), list(TaskStore._file_stamp(JOURNAL_FILE))]
+
+
+def read_task_generation():
+    """
+    Return the generation of TASK_FILE, the number of times it has been rewritten.
+
+    Every rewrite of TASK_FILE (compaction, archiving, bulk updates, replacing
+    every task) first adds one to the number kept in GENERATION_FILE. Archiving
+    gives the tasks left behind new ids, so an id read in one generation may
+    belong to another task in the next.
+
+    Returns:
+        int: The generation (0 if TASK_FILE has never been rewritten).
+    """
+    try:
+        with open(GENERATION_FILE, 'r') as file:
+            return int(file.read())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def next_task_generation():
+    """
+    Add one to the generation in GENERATION_FILE, before TASK_FILE is rewritten.
+
+    Must be called under task_file_lock(). The generation moves on before the
+    rewrite, so if a crash stops the rewrite, the worst that happens is that
+    ids read before it are refused although they are still valid.
+
+    Returns:
+        int: The new generation.
+    """
+    generation = read_task_generation() + 1
+    temp_file = GENERATION_FILE + '.tmp'
+    with open(temp_file, 'w') as file:
+        file.write(f"{generation}\n")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, GENERATION_FILE)
+    return generation
+
+
+class TaskStatistics:
+    """
+    Report counters that are kept up to date as tasks change.
+
+    Totals and per-user counts are adjusted by add_task and TaskStore.update_task
+    instead of being recomputed from every row. A task counts as overdue once its
+    due date is on or before today, matching the comparison generate_reports has
+    always made. Incomplete tasks that are not overdue yet are kept in `pending`,
+    bucketed by due day, with the buckets ordered in `pending_days`. Moving
+    `as_of` forward therefore only visits the days that crossed the boundary.
+
+    The counters are saved to STATS_FILE together with the stamps of the data
+    files they describe. Each later change is appended to STATS_LOG_FILE
+    instead of rewriting them (see record_statistics_change()). If the data
+    files change in any other way, the stamps no longer match and the counters
+    are recomputed from scratch.
+    """
+
+    def __init__(self, as_of):
+        self.as_of = as_of  # Day ordinal the overdue counts are valid for
+        self.totals = {'total': 0, 'completed': 0, 'incomplete': 0, 'overdue': 0}
+        self.users = {}  # username -> counts, including 'first' (id of the user's first task)
+        self.pending = {}  # due day ordinal -> {username: incomplete tasks not overdue yet}
+        self.pending_days = []  # Sorted keys of self.pending
+        self.stamps = None  # data_file_stamps() of the files these counters describe
+
+    @classmethod
+    def from_tasks(cls, tasks, as_of):
+        """Count every task from scratch."""
+        statistics = cls(as_of)
+        rows = 0
+        for task in tasks:
+            statistics.count_task(task.username, task.due_date, task.completed, task.task_id)
+            rows += 1
+        record_io(rows)
+        return statistics
+
+    def count_task(self, username, due_date, completed, task_id=None, sign=1):
+        """Add a task to the counters, or remove it again when sign is -1."""
+        counts = self.users.get(username)
+        if counts is None:
+            if task_id is None:
+                task_id = self.totals['total']  # A new task is appended at the end of the file
+            counts = self.users[username] = {'first': task_id, 'total': 0, 'completed': 0,
+                                             'incomplete': 0, 'overdue': 0}
+        
+        changed = ['total']
+        if completed == 'Yes':
+            changed.append('completed')
+        else:
+            changed.append('incomplete')
+            day = date_ordinal(due_date)
+            if day <= self.as_of:
+                changed.append('overdue')
+            else:
+                self._add_pending(day, username, sign)
+        
+        for key in changed:
+            counts[key] += sign
+            self.totals[key] += sign
+        if counts['total'] == 0:
+            del self.users[username]  # The user no longer has any tasks
+
+    def _add_pending(self, day, username, sign):
+        """Adjust the number of not yet overdue tasks of a user that are due on a day."""
+        bucket = self.pending.get(day)
+        if bucket is None:
+            bucket = self.pending[day] = {}
+            bisect.insort(self.pending_days, day)
+        bucket[username] = bucket.get(username, 0) + sign
+        if bucket[username] == 0:
+            del bucket[username]
+            if not bucket:
+                del self.pending[day]
+                self.pending_days.remove(day)
+
+    def merge(self, other, offset):
+        """
+        Add the counters of a later part of the task file to these counters.
+
+        Parameters:
+        other (TaskStatistics): Counters for the later part, with the same as_of.
+        offset (int): The id of the first task of that part, added to its 'first' ids.
+        """
+        for username, counts in other.users.items():
+            mine = self.users.get(username)
+            if mine is None:
+                self.users[username] = dict(counts, first=counts['first'] + offset)
+            else:
+                for key in ('total', 'completed', 'incomplete', 'overdue'):
+                    mine[key] += counts[key]
+        for key, value in other.totals.items():
+            self.totals[key] += value
+        for day in other.pending_days:
+            for username, count in other.pending[day].items():
+                self._add_pending(day, username, count)
+
+    def advance(self, today):
+        """
+        Move the overdue counts forward to the day ordinal today.
+
+        Returns:
+            bool: False if today is before as_of, in which case the counters
+            cannot be wound back and must be recomputed.
+        """
+        if today < self.as_of:
+            return False
+        # Every pending day up to and including today has now become overdue
+        cut = bisect.bisect_right(self.pending_days, today)
+        for day in self.pending_days[:cut]:
+            for username, count in self.pending.pop(day).items():
+                self.users[username]['overdue'] += count
+                self.totals['overdue'] += count
+        del self.pending_days[:cut]
+        self.as_of = today
+        return True
+
+    def user_counts(self):
+        """Return the per-user counts ordered by each user's first task, as the reports list them."""
+        return dict(sorted(self.users.items(), key=lambda item: item[1]['first']))
+
+    def difference(self, other):
+        """Return a list of human-readable differences between two sets of counters."""
+        differences = []
+        for key, value in self.totals.items():
+            if other.totals[key] != value:
+                differences.append(f"Total {key}: {value} != {other.totals[key]}")
+        for username in sorted(set(self.users) | set(other.users)):
+            counts = self.users.get(username, {})
+            other_counts = other.users.get(username, {})
+            for key in ('total', 'completed', 'incomplete', 'overdue'):
+                if counts.get(key, 0) != other_counts.get(key, 0):
+                    differences.append(f"User {username} {key}: {counts.get(key, 0)} != {other_counts.get(key, 0)}")
+        return differences
+
+    def save(self, file_name):
+        """Write the counters to file_name through an atomic rename."""
+        data = {
+            'as_of': self.as_of,
+            'stamps': self.stamps,
+            'totals': self.totals,
+            'users': self.users,
+            'pending': {str(day): self.pending[day] for day in self.pending_days},
+        }
+        temp_file = file_name + '.tmp'
+        with open(temp_file, 'w') as file:
+            json.dump(data, file)
+            record_io(bytes_written=file.tell())
+        os.replace(temp_file, file_name)
+
+    @classmethod
+    def load(cls, file_name):
+        """Read counters saved by save(), or return None if there are none or they are unreadable."""
+        try:
+            with open(file_name, 'r') as file:
+                data = json.load(file)
+                record_io(bytes_read=file.tell())
+            statistics = cls(data['as_of'])
+            statistics.stamps = data['stamps']
+            statistics.totals = data['totals']
+            statistics.users = data['users']
+            statistics.pending = {int(day): bucket for day, bucket in data['pending'].items()}
+            statistics.pending_days = sorted(statistics.pending)
+        except (OSError, ValueError, KeyError):
+            return None
+        return statistics
+
+
+def get_task_statistics(workers=None):
+    """
+    Return report counters that are valid for today, saving them to STATS_FILE.
+
+    The saved counters are used if they still describe the data files. Otherwise
+    they are recomputed, either from the session-wide TaskStore or, when more
+    than one worker is requested, by count_tasks_in_parallel.
+
+    Parameters:
+    workers (int): Worker processes for a recount (REPORT_WORKERS by default, 0 for one per core).
+    """
+    if workers is None:
+        workers = REPORT_WORKERS
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    
+    today = datetime.today().toordinal()
+    with task_file_lock():  # The files must not change between counting and stamping
+        statistics = load_task_statistics()
+        if statistics is None or statistics.stamps != data_file_stamps() or not statistics.advance(today):
+            if workers > 1:
+                statistics = count_tasks_in_parallel(workers)
+            else:
+                statistics = TaskStatistics.from_tasks(get_task_store().tasks, today)
+                statistics.stamps = data_file_stamps()
+        save_task_statistics(statistics)
+    return statistics
+
+
+def load_task_statistics():
+    """
+    Return the counters saved in STATS_FILE with the changes logged since then applied.
+
+    STATS_LOG_FILE holds one JSON line per write to the data files: the
+    data_file_stamps() before and after it and the task changes it made (see
+    record_statistics_change()). A line is applied only if it starts from the
+    stamps the counters have reached so far, so lines that were already folded
+    in, or that follow a change made without logging, are skipped. The caller
+    compares the resulting stamps with the data files to tell if the counters
+    are current.
+
+    Returns:
+        TaskStatistics: The counters, or None if none are saved.
+    """
+    statistics = TaskStatistics.load(STATS_FILE)
+    if statistics is None:
+        return None
+    try:
+        with open(STATS_LOG_FILE, 'r') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # A line cut short by a crash; nothing after it was logged
+                if entry['before'] != statistics.stamps:
+                    continue
+                for removed, added, first_ids in entry['changes']:
+                    if removed:
+                        statistics.count_task(*removed, sign=-1)
+                    if added:
+                        statistics.count_task(*added)
+                    for username, first_id in (first_ids or {}).items():
+                        if username in statistics.users:
+                            statistics.users[username]['first'] = first_id
+                statistics.stamps = entry['after']
+            record_io(bytes_read=file.tell())
+    except FileNotFoundError:
+        pass
+    return statistics
+
+
+def save_task_statistics(statistics):
+    """Save counters to STATS_FILE and empty STATS_LOG_FILE, whose changes they include. Must be called under task_file_lock()."""
+    statistics.save(STATS_FILE)
+    with open(STATS_LOG_FILE, 'w'):
+        pass
+
+
+def fold_statistics_log():
+    """Fold the changes in STATS_LOG_FILE into STATS_FILE. Must be called under task_file_lock()."""
+    statistics = load_task_statistics()
+    if statistics is None:
+        with open(STATS_LOG_FILE, 'w'):
+            pass  # There are no saved counters to fold the changes into
+    else:
+        save_task_statistics(statistics)
+
+
+def read_journal_overrides():
+    """
+    Read JOURNAL_FILE into a dictionary of the latest field values per task.
+
+    Returns:
+        dict: task id -> {field: value} for every task with journaled changes.
+    """
+    overrides = {}
+    ensure_file_exists(JOURNAL_FILE)
+    size = 0
+    with open(JOURNAL_FILE, 'rb') as file:
+        for raw_line in file:
+            if not raw_line.endswith(b'\n'):
+                break  # A partly written record
+            size += len(raw_line)
+            try:
+                record = json.loads(raw_line)
+                overrides.setdefault(record.pop('id'), {}).update(record)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                report_damaged_line(JOURNAL_FILE, raw_line.decode('utf-8', 'replace'))
+    record_io(bytes_read=size)
+    return overrides
+
+
+def _report_chunk_ranges(file_size, chunk_bytes, mapped):
+    """Split a mapped file into (start, end) byte ranges that each end just after a newline."""
+    ranges = []
+    start = 0
+    while start < file_size:
+        end = mapped.find(b'\n', min(start + chunk_bytes, file_size) - 1)
+        end = file_size if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _count_report_chunk(job):
+    """
+    Count the tasks in one byte range of a task file (run in a worker process).
+
+    The range is walked line by line through a memory map, so only one line is
+    copied at a time. Journal changes for tasks in the range are applied as the
+    lines are read.
+
+    Parameters:
+    job (tuple): (file_name, start, end, first_task_id, overrides, today), where
+        first_task_id is the id of the first task in the range (or None if it is
+        not known, which is only allowed without overrides) and overrides maps
+        task ids to the journaled field changes.
+
+    Returns:
+        tuple: (number of tasks in the range, TaskStatistics with 'first' ids relative to the range)
+    """
+    file_name, start, end, first_task_id, overrides, today = job
+    statistics = TaskStatistics(today)
+    rows = 0
+    with open(file_name, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position = start
+        while position < end:
+            line_end = mapped.find(b'\n', position, end)
+            line_end = end if line_end == -1 else line_end + 1
+            line = mapped[position:line_end].decode('utf-8')
+            position = line_end
+            if not line.strip():
+                continue  # Skip blank lines, as the TaskStore does
+            if not line.endswith('\n') and not is_whole_task_line(line):
+                continue  # What a crash left of an append, which the TaskStore does not read
+            fields = parse_task_line(line, file_name)
+            if fields is None:
+                continue  # So does the TaskStore, without giving the line a task id
+            username, _, _, _, due_date, completed = fields
+            if overrides:
+                changes = overrides.get(first_task_id + rows)
+                if changes:
+                    username = changes.get('username', username)
+                    due_date = changes.get('due_date', due_date)
+                    completed = changes.get('completed', completed)
+            statistics.count_task(username, due_date, completed, rows)
+            rows += 1
+    return rows, statistics
+
+
+def count_tasks_in_parallel(workers, chunk_bytes=None):
+    """
+    Count every task for the reports by splitting TASK_FILE across a process pool.
+
+    TASK_FILE is memory-mapped and cut into newline-aligned byte ranges of about
+    chunk_bytes each. Every range is counted in a worker process and the
+    partial counters are merged in file order, so users are listed in the same
+    order as a sequential count. No list of rows is ever built.
+
+    If the journal holds changes, the rows in each range are counted first so
+    that every worker knows the task ids in its range.
+
+    Parameters:
+    workers (int): The number of worker processes.
+    chunk_bytes (int): The approximate size of each range (REPORT_CHUNK_BYTES by default).
+
+    Returns:
+        TaskStatistics: Counters valid for today, stamped with the data files they describe.
+    """
+    today = datetime.today().toordinal()
+    stamps = data_file_stamps()
+    statistics = TaskStatistics(today)
+    
+    # Collect the journaled changes; the journal stays small, it is compacted regularly
+    overrides = read_journal_overrides()
+    
+    file_size = os.path.getsize(TASK_FILE)
+    if file_size == 0:
+        statistics.stamps = stamps
+        return statistics
+    
+    with open(TASK_FILE, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        ranges = _report_chunk_ranges(file_size, chunk_bytes or REPORT_CHUNK_BYTES, mapped)
+    
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        first_ids = [None] * len(ranges)
+        if overrides:
+            # First pass: count the rows in each range to learn the id of its first task
+            jobs = [(TASK_FILE, start, end, 0, None, today) for start, end in ranges]
+            next_id = 0
+            for index, (rows, _) in enumerate(executor.map(_count_report_chunk, jobs)):
+                first_ids[index] = next_id
+                next_id += rows
+            record_io(next_id, file_size)
+        
+        jobs = [(TASK_FILE, start, end, first_ids[index], overrides, today)
+                for index, (start, end) in enumerate(ranges)]
+        
+        # Merge the partial counters in file order
+        offset = 0
+        for rows, partial in executor.map(_count_report_chunk, jobs):
+            statistics.merge(partial, offset)
+            offset += rows
+        record_io(offset, file_size)
+    
+    statistics.stamps = stamps
+    return statistics
+
+
+def record_statistics_change(stamps_before, changes=()):
+    """
+    Log task changes for the counters saved in STATS_FILE.
+
+    Must be called under task_file_lock(), together with the writes it describes.
+    The changes are appended to STATS_LOG_FILE as one small line, so an edit
+    never rewrites STATS_FILE; load_task_statistics() applies them. The log is
+    folded into STATS_FILE once it reaches STATS_LOG_FOLD_BYTES. If the saved
+    counters did not describe the data files as they were before the changes
+    (stamps_before), the line is skipped when the log is read and the counters
+    are recomputed on the next report.
+
+    Parameters:
+    stamps_before (list): data_file_stamps() taken before the data files were written.
+    changes (list): One (removed, added, first_ids) tuple per changed task, where
+        removed is (username, due_date, completed) of the task before the change (or None),
+        added is (username, due_date, completed[, task_id]) of the task after it (or None), and
+        first_ids maps usernames to the id of the user's first task, where that may have changed (or None).
+    """
+    if not os.path.exists(STATS_FILE):
+        return  # Nothing to keep up to date; the counters are computed on the next report
+    entry = {'before': stamps_before, 'after': data_file_stamps(), 'changes': list(changes)}
+    with open(STATS_LOG_FILE, 'a') as file:
+        line = json.dumps(entry) + '\n'
+        file.write(line)
+        size = file.tell()
+    record_io(bytes_written=len(line))
+    if size >= STATS_LOG_FOLD_BYTES:
+        fold_statistics_log()
+
+
+def verify_task_statistics():
+    """
+    Recompute the report counters from scratch and compare them with the incremental ones.
+
+    Returns:
+        list: The differences found, empty if the incremental counters are correct.
+    """
+    today = datetime.today().toordinal()
+    incremental = load_task_statistics()
+    if incremental is None or incremental.stamps != data_file_stamps():
+        return ["Saved statistics do not describe the current task files."]
+    if not incremental.advance(today):
+        return ["Saved statistics are dated after today."]
+    recomputed = TaskStatistics.from_tasks(get_task_store().tasks, today)
+    differences = incremental.difference(recomputed)
+    if list(incremental.user_counts()) != list(recomputed.user_counts()):
+        differences.append("Users are not listed in the same order.")
+    return differences
+
+
+class StorageBackend:
+    """
+    Interface between the task and user functions and the place their data is kept.
+
+    The menu actions only talk to the backend returned by get_storage_backend(),
+    which is chosen with the TASK_MANAGER_BACKEND setting (STORAGE_BACKEND).
+    """
+
+    def prepare(self):
+        """Get ready for a session, loading anything worth having in memory up front."""
+
+    def finish(self):
+        """Save anything that lets the next session start faster, at the end of a session."""
+
+    def read_users(self):
+        """Return a dictionary of usernames to passwords."""
+        raise NotImplementedError
+
+    def password_for(self, username):
+        """Return the password of a user, or None if there is no such user."""
+        raise NotImplementedError
+
+    def add_user(self, username, password):
+        """Store a new user, returning False if the username is already taken."""
+        raise NotImplementedError
+
+    def add_task(self, username, title, description, assigned_date, due_date, completed):
+        """Store a new task."""
+        raise NotImplementedError
+
+    def add_tasks(self, tasks):
+        """Store many new tasks, given as an iterable of task detail tuples, and return how many."""
+        raise NotImplementedError
+
+    def iter_tasks(self, username=None, completed=None):
+        """Yield tasks in order, optionally only those of one assignee and/or completion status."""
+        raise NotImplementedError
+
+    def tasks_for(self, username):
+        """Return the list of tasks assigned to username."""
+        raise NotImplementedError
+
+    def get_task(self, task_id):
+        """Return the task with the given id, or None if there is none."""
+        raise NotImplementedError
+
+    def generation(self):
+        """
+        Return the generation of the stored task ids.
+
+        It changes whenever tasks may have been given new ids (archiving,
+        replacing every task), so ids read before it changed cannot be trusted
+        to find the same tasks. Read it before reading the tasks whose ids are
+        kept.
+        """
+        return 0
+
+    def page_tasks(self, offset, limit, username=None, completed=None):
+        """
+        Return one page of the matching tasks and how many tasks match in all.
+
+        Returns:
+            tuple: (list of at most limit tasks, starting at offset, total number of matching tasks)
+        """
+        matching = list(self.iter_tasks(username, completed))
+        return matching[offset:offset + limit], len(matching)
+
+    def page_tasks_due(self, offset, limit, first_day=None, last_day=None, username=None):
+        """
+        Return one page of the incomplete tasks due between two days, in due-date order.
+
+        Parameters:
+        first_day (int): Day ordinal of the earliest due date (None for no limit).
+        last_day (int): Day ordinal of the latest due date (None for no limit).
+        username (str): Only include tasks assigned to this user (None for everyone).
+
+        Returns:
+            tuple: (list of at most limit tasks, starting at offset, total number of matching tasks)
+        """
+        matching = sorted((task for task in self.iter_tasks(username)
+                           if task.completed != 'Yes'
+                           and (first_day is None or date_ordinal(task.due_date) >= first_day)
+                           and (last_day is None or date_ordinal(task.due_date) <= last_day)),
+                          key=lambda task: (date_ordinal(task.due_date), task.task_id))
+        return matching[offset:offset + limit], len(matching)
+
+    def search_tasks(self, query, offset, limit, username=None, completed=None):
+        """
+        Return one page of the tasks whose title and description contain every word searched for.
+
+        Parameters:
+        query (str): The words to search for; a word ending in * matches any word starting with it.
+        username (str): Only include tasks assigned to this user (None for everyone).
+        completed (str): Only include tasks with this completion status (None for all).
+
+        Returns:
+            tuple: (list of at most limit tasks, starting at offset, total number of matching tasks)
+
+        Raises:
+            ValueError: If the query has no words in it.
+        """
+        raise NotImplementedError
+
+    def rebuild_search_index(self):
+        """Index the words of every task again from scratch and return the number of tasks indexed."""
+        raise NotImplementedError
+
+    def update_task(self, task, expected=None, **changes):
+        """
+        Change fields of one task and return its up-to-date Task record.
+
+        If expected (the task's fields as the caller last saw them) is given and
+        no longer matches the stored task, StaleTaskError is raised instead.
+        """
+        raise NotImplementedError
+
+    def replace_tasks(self, tasks):
+        """Replace every stored task with tasks."""
+        raise NotImplementedError
+
+    def count_matching(self, task_filter):
+        """Return the number of tasks a TaskFilter selects."""
+        return sum(1 for task in self.iter_tasks(task_filter.username, task_filter.completed)
+                   if task_filter.matches(task))
+
+    def bulk_update(self, task_filter, **changes):
+        """
+        Change the same fields of every task a TaskFilter selects, as one atomic write.
+
+        Returns:
+            int: The number of tasks changed.
+        """
+        raise NotImplementedError
+
+    def workload(self, first_day, weeks):
+        """
+        Count each user's incomplete tasks by the week they are due in.
+
+        Parameters:
+        first_day (int): Day ordinal of the first day of the first week.
+        weeks (int): The number of weeks counted one by one.
+
+        Returns:
+            dict: username -> weeks + 2 counts: tasks due before first_day, due in
+            each week, and due after the last week. Users without incomplete tasks are left out.
+        """
+        return count_workload(((task.username, date_ordinal(task.due_date))
+                               for task in self.iter_tasks() if task.completed != 'Yes'), first_day, weeks)
+
+    def archive_tasks(self, before_day):
+        """
+        Move the completed tasks due before a day out of the stored tasks and into a new TaskArchive segment.
+
+        The tasks left behind get new, consecutive task ids.
+
+        Parameters:
+        before_day (int): Day ordinal; completed tasks due before it are archived.
+
+        Returns:
+            int: The number of tasks archived.
+        """
+        raise NotImplementedError
+
+    def report_statistics(self, workers=None):
+        """Return a TaskStatistics with totals and per-user counts valid for today."""
+        raise NotImplementedError
+
+    def report_source_files(self):
+        """Return the files the report counts are computed from, used to tell whether the reports are current."""
+        raise NotImplementedError
+
+    def verify_statistics(self):
+        """Return a list of differences between the report counters and a full recount."""
+        return []
+
+
+class FlatFileBackend(StorageBackend):
+    """Keeps users in USER_FILE and tasks in TASK_FILE plus JOURNAL_FILE."""
+
+    def prepare(self):
+        ensure_file_exists(TASK_FILE)
+        get_task_store()
+        get_user_registry()
+
+    def finish(self):
+        # Only if this session loaded the tasks, and a later one would have a lot of them to parse
+        if SESSION_SNAPSHOT and _task_store is not None and _task_store.snapshot_is_stale():
+            with task_file_lock():
+                _task_store.save_snapshot(SESSION_FILE)
+
+    def read_users(self):
+        return get_user_registry().users
+
+    def password_for(self, username):
+        return get_user_registry().users.get(username)
+
+    def add_user(self, username, password):
+        return get_user_registry().add(username, password)
+
+    def add_task(self, username, title, description, assigned_date, due_date, completed):
+        # Append the new task details to TASK_FILE, grouped with any appends made at the same time,
+        # and count the new task in the saved report statistics
+        line = encode_task_line((username, title, description, assigned_date, due_date, completed))
+        get_group_writer(TASK_FILE, is_whole_task_line).submit(
+            lambda: (line.encode('utf-8'), (None, (username, due_date, completed), None)))
+
+    def add_tasks(self, tasks):
+        with task_file_lock():
+            # Keep the saved report counters up to date as well, if they describe the files
+            stamps_before = data_file_stamps()
+            statistics = load_task_statistics()
+            if statistics is not None and statistics.stamps != stamps_before:
+                statistics = None
+            
+            # Append every task through one large buffer and make it durable with a single fsync,
+            # after cutting off what a crash may have left of an earlier append
+            with open(TASK_FILE, 'a+b') as file:
+                repair_file_tail(file, is_whole_task_line)
+            count = 0
+            with open(TASK_FILE, 'a', buffering=IMPORT_BUFFER_BYTES) as file:
+                start = file.tell()
+                for username, title, description, assigned_date, due_date, completed in tasks:
+                    file.write(encode_task_line((username, title, description, assigned_date, due_date, completed)))
+                    if statistics is not None:
+                        statistics.count_task(username, due_date, completed)
+                    count += 1
+                file.flush()
+                sync_append(TASK_FILE, file)
+                record_io(bytes_written=file.tell() - start)
+            
+            if statistics is not None:
+                statistics.stamps = data_file_stamps()
+                save_task_statistics(statistics)
+        return count
+
+    def iter_tasks(self, username=None, completed=None):
+        return iter_tasks_from_file(username, completed)
+
+    def tasks_for(self, username):
+        return get_task_store().tasks_for(username)
+
+    def get_task(self, task_id):
+        tasks = get_task_store().tasks
+        return tasks[task_id] if 0 <= task_id < len(tasks) else None
+
+    def generation(self):
+        return read_task_generation()
+
+    def page_tasks(self, offset, limit, username=None, completed=None):
+        # Served from the in-memory store, using an index when there is a filter
+        store = get_task_store()
+        if username is not None:
+            task_ids = store.by_assignee.get(username, [])
+            if completed is not None:
+                task_ids = [task_id for task_id in task_ids if store.tasks[task_id].completed == completed]
+        elif completed is not None:
+            task_ids = store.by_status.get(completed, [])
+        else:
+            task_ids = range(len(store.tasks))
+        return [store.tasks[task_id] for task_id in task_ids[offset:offset + limit]], len(task_ids)
+
+    def page_tasks_due(self, offset, limit, first_day=None, last_day=None, username=None):
+        # Two bisections of the store's due-date index, then only the page's tasks are looked up
+        store = get_task_store()
+        entries, start, end = store.due_range(first_day, last_day, username)
+        page = entries[start + offset:min(end, start + offset + limit)]
+        return [store.tasks[task_id] for _, task_id in page], end - start
+
+    def search_tasks(self, query, offset, limit, username=None, completed=None):
+        tasks = get_task_store().tasks
+        task_ids = [task_id for task_id in get_search_index().search(query)
+                    if task_id < len(tasks)
+                    and (username is None or tasks[task_id].username == username)
+                    and (completed is None or tasks[task_id].completed == completed)]
+        return [tasks[task_id] for task_id in task_ids[offset:offset + limit]], len(task_ids)
+
+    def rebuild_search_index(self):
+        with task_file_lock():
+            index = get_search_index(catch_up=False)
+            with index.connection:
+                index.clear()
+            get_search_index()
+            return len(get_task_store().tasks)
+
+    def update_task(self, task, expected=None, **changes):
+        return get_task_store().update_task(task, expected, **changes)
+
+    def replace_tasks(self, tasks):
+        with task_file_lock():
+            next_task_generation()
+            write_tasks_atomically(TASK_FILE, tasks)
+            with open(JOURNAL_FILE, 'w'):
+                pass  # The journal described the old tasks
+            index = get_search_index(catch_up=False)
+            with index.connection:
+                index.clear()  # So did the search index; it is rebuilt on the next search
+
+    def count_matching(self, task_filter):
+        return len(get_task_store().matching(task_filter))
+
+    def bulk_update(self, task_filter, **changes):
+        return get_task_store().update_tasks(task_filter, **changes)
+
+    def workload(self, first_day, weeks):
+        if ANALYTICS_SNAPSHOT:
+            with _task_snapshot_lock:
+                return load_task_snapshot().workload(first_day, weeks)
+        # The store's due-date index already lists every incomplete task with its due day
+        store = get_task_store()
+        return count_workload(((store.tasks[task_id].username, day) for day, task_id in store.open_by_due),
+                              first_day, weeks)
+
+    def archive_tasks(self, before_day):
+        with task_file_lock():
+            archive = get_task_archive()  # Finishes any archive a crash interrupted
+            store = get_task_store()
+            if os.path.getsize(JOURNAL_FILE):
+                store.compact()  # So TASK_FILE alone holds every task's current fields
+            
+            archived, kept = [], []
+            for task in store.tasks:
+                if task.completed == 'Yes' and date_ordinal(task.due_date) < before_day:
+                    archived.append(task)
+                else:
+                    kept.append(task)
+            if not archived:
+                return 0
+            
+            # The order the reports list users in now, which they keep once these tasks are archived
+            known = set(archive.user_order)
+            hot_users = dict.fromkeys(task.username for task in store.tasks)
+            user_order = archive.user_order + [username for username in hot_users if username not in known]
+            
+            # Write the segment and the kept tasks, then swap the kept tasks in (see TaskArchive)
+            stamps_before = data_file_stamps()
+            summary = archive.write_segment(archived, datetime.fromordinal(before_day).strftime("%Y-%m-%d"))
+            write_tasks_file(TaskArchive.TEMP_FILE, kept)
+            archive.begin(summary, user_order)
+            store._close_base()
+            next_task_generation()  # The kept tasks get new ids
+            os.replace(TaskArchive.TEMP_FILE, TASK_FILE)
+            archive.commit()
+            
+            # Take the archived tasks out of the report counters; everyone's first task id moved too
+            first_ids = {}
+            for task_id, task in enumerate(kept):
+                first_ids.setdefault(task.username, task_id)
+            record_statistics_change(
+                stamps_before,
+                [((task.username, task.due_date, task.completed), None, None) for task in archived]
+                + [(None, None, first_ids)])
+        return len(archived)
+
+    def report_statistics(self, workers=None):
+        if ANALYTICS_SNAPSHOT:
+            with _task_snapshot_lock:
+                return load_task_snapshot().statistics(datetime.today().toordinal())
+        return get_task_statistics(workers)
+
+    def report_source_files(self):
+        return [TASK_FILE, JOURNAL_FILE]
+
+    def verify_statistics(self):
+        return verify_task_statistics()
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Keeps users and tasks in an SQLite database.
+
+    Tasks are indexed by assignee, due day and completion status. Every edit is
+    a single-row transaction and the reports are aggregate queries, so nothing
+    is rewritten or re-read in full. Task ids are kept from TASK_FILE when it is
+    imported with import_flat_files_to_sqlite().
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            assigned_date TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            due_day INTEGER NOT NULL,
+            completed TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS tasks_username ON tasks (username);
+        CREATE INDEX IF NOT EXISTS tasks_due_day ON tasks (due_day);
+        CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+    """
+
+    def __init__(self, database=None):
+        self.database = database or SQLITE_FILE
+        # The JSON API server writes from its writer thread, but never while another thread uses the connection
+        self.connection = sqlite3.connect(self.database, check_same_thread=False)
+        self.connection.executescript(self.SCHEMA)
+        self.connection.create_function('title_contains', 2, title_contains, deterministic=True)
+        self.search_index = SearchIndex(self.connection)
+
+    def read_users(self):
+        return dict(self.connection.execute("SELECT username, password FROM users"))
+
+    def password_for(self, username):
+        row = self.connection.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def add_user(self, username, password):
+        try:
+            with self.connection:
+                self.connection.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                                        (username, password))
+        except sqlite3.IntegrityError:
+            return False  # The username is taken
+        return True
+
+    def add_task(self, username, title, description, assigned_date, due_date, completed):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO tasks (username, title, description, assigned_date, due_date, due_day, completed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, title, description, assigned_date, due_date, date_ordinal(due_date), completed))
+
+    def _tasks(self, where, parameters, paging="", order="id"):
+        """Yield Task records for the rows matching a WHERE clause, in id order unless another is given (optionally LIMIT/OFFSET paged)."""
+        cursor = self.connection.execute(
+            "SELECT id, username, title, description, assigned_date, due_date, completed FROM tasks "
+            f"{where} ORDER BY {order} {paging}", parameters)
+        rows = 0
+        try:
+            for row in cursor:
+                rows += 1
+                yield Task(*row)
+        finally:
+            record_io(rows)
+
+    def add_tasks(self, tasks):
+        tasks = iter(tasks)
+        count = 0
+        with self.connection:
+            while True:
+                batch = [(username, title, description, assigned_date, due_date, date_ordinal(due_date), completed)
+                         for username, title, description, assigned_date, due_date, completed
+                         in itertools.islice(tasks, 10000)]
+                if not batch:
+                    return count
+                self.connection.executemany(
+                    "INSERT INTO tasks (username, title, description, assigned_date, due_date, due_day, completed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+
+    @staticmethod
+    def _filter(username, completed):
+        """Return the WHERE clause and parameters selecting tasks by assignee and/or completion status."""
+        conditions, parameters = [], []
+        if username is not None:
+            conditions.append("username = ?")
+            parameters.append(username)
+        if completed is not None:
+            conditions.append("completed = ?")
+            parameters.append(completed)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, parameters
+
+    def iter_tasks(self, username=None, completed=None):
+        return self._tasks(*self._filter(username, completed))
+
+    def tasks_for(self, username):
+        return list(self._tasks("WHERE username = ?", (username,)))
+
+    def get_task(self, task_id):
+        return next(self._tasks("WHERE id = ?", (task_id,)), None)
+
+    def generation(self):
+        # Kept in the database header, so it changes in the same transaction as the ids
+        return self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+    def page_tasks(self, offset, limit, username=None, completed=None):
+        where, parameters = self._filter(username, completed)
+        (total,) = self.connection.execute(f"SELECT COUNT(*) FROM tasks {where}", parameters).fetchone()
+        return list(self._tasks(where, (*parameters, limit, offset), "LIMIT ? OFFSET ?")), total
+
+    def page_tasks_due(self, offset, limit, first_day=None, last_day=None, username=None):
+        # A range scan of the due_day index
+        conditions, parameters = ["completed != 'Yes'"], []
+        for condition, value in (("due_day >= ?", first_day), ("due_day <= ?", last_day), ("username = ?", username)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        where = "WHERE " + " AND ".join(conditions)
+        (total,) = self.connection.execute(f"SELECT COUNT(*) FROM tasks {where}", parameters).fetchone()
+        return list(self._tasks(where, (*parameters, limit, offset), "LIMIT ? OFFSET ?", "due_day, id")), total
+
+    def search_tasks(self, query, offset, limit, username=None, completed=None):
+        self._update_search_index()
+        search, search_parameters = self.search_index.query(query)
+        where, parameters = self._filter(username, completed)
+        where = f"{where + ' AND' if where else 'WHERE'} id IN ({search})"
+        parameters = (*parameters, *search_parameters)
+        (total,) = self.connection.execute(f"SELECT COUNT(*) FROM tasks {where}", parameters).fetchone()
+        return list(self._tasks(where, (*parameters, limit, offset), "LIMIT ? OFFSET ?")), total
+
+    def rebuild_search_index(self):
+        with self.connection:
+            self.search_index.clear()
+        return self._update_search_index()
+
+    def _update_search_index(self):
+        """Index the tasks added since the search index was last brought up to date, returning how many."""
+        with _lock_mutex, self.connection:
+            return self.search_index.add_tasks(self._tasks("WHERE id > ?", (self.search_index.last_task_id(),)))
+
+    def update_task(self, task, expected=None, **changes):
+        columns = dict(changes)
+        if 'due_date' in columns:
+            columns['due_day'] = date_ordinal(columns['due_date'])
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        where, parameters = "id = ?", [task.task_id]
+        if expected is not None:
+            # Only update the row if it still holds what the caller saw
+            fields = ('username', 'title', 'description', 'assigned_date', 'due_date', 'completed')
+            where += "".join(f" AND {field} = ?" for field in fields)
+            parameters.extend(expected)
+        with self.connection:
+            cursor = self.connection.execute(f"UPDATE tasks SET {assignments} WHERE {where}",
+                                             (*columns.values(), *parameters))
+        if cursor.rowcount == 0:
+            current = next(self._tasks("WHERE id = ?", (task.task_id,)), None)
+            raise StaleTaskError(current)
+        for field, value in changes.items():
+            setattr(task, field, value)
+        return task
+
+    def replace_tasks(self, tasks):
+        with self.connection:
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.execute(f"PRAGMA user_version = {self.generation() + 1}")
+            self.search_index.clear()  # Ids may be reused by the new tasks; they are indexed on the next search
+            self._insert_tasks(tasks)
+
+    @staticmethod
+    def _task_filter_where(task_filter):
+        """Return the WHERE clause and parameters selecting the tasks of a TaskFilter."""
+        where, parameters = SQLiteBackend._filter(task_filter.username, task_filter.completed)
+        conditions = [where[len("WHERE "):]] if where else []
+        for condition, value in (("due_day >= ?", task_filter.first_day), ("due_day <= ?", task_filter.last_day),
+                                 ("title_contains(title, ?)", task_filter.title)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        return ("WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+    def count_matching(self, task_filter):
+        where, parameters = self._task_filter_where(task_filter)
+        return self.connection.execute(f"SELECT COUNT(*) FROM tasks {where}", parameters).fetchone()[0]
+
+    def bulk_update(self, task_filter, **changes):
+        columns = dict(changes)
+        if 'due_date' in columns:
+            columns['due_day'] = date_ordinal(columns['due_date'])
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        where, parameters = self._task_filter_where(task_filter)
+        # One UPDATE statement in one transaction
+        with self.connection:
+            cursor = self.connection.execute(f"UPDATE tasks SET {assignments} {where}",
+                                             (*columns.values(), *parameters))
+        record_io(cursor.rowcount)
+        return cursor.rowcount
+
+    def workload(self, first_day, weeks):
+        # Grouped by user and week in the database, so only the counts come back
+        cursor = self.connection.execute(
+            "SELECT username, CASE WHEN due_day < ? THEN 0 WHEN due_day >= ? THEN ? "
+            "ELSE (due_day - ?) / 7 + 1 END AS week, COUNT(*) "
+            "FROM tasks WHERE completed != 'Yes' GROUP BY username, week",
+            (first_day, first_day + 7 * weeks, weeks + 1, first_day))
+        workload = {}
+        for username, week, count in cursor:
+            workload.setdefault(username, [0] * (weeks + 2))[week] = count
+        return workload
+
+    def _insert_tasks(self, tasks):
+        """Insert Task records (or lists of task details), keeping the ids of Task records."""
+        rows = []
+        for task in tasks:
+            if not isinstance(task, Task):
+                task = Task(None, *task)
+            rows.append((task.task_id, task.username, task.title, task.description,
+                         task.assigned_date, task.due_date, date_ordinal(task.due_date), task.completed))
+        self.connection.executemany(
+            "INSERT INTO tasks (id, username, title, description, assigned_date, due_date, due_day, completed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def report_statistics(self, workers=None):
+        today = datetime.today().toordinal()
+        statistics = TaskStatistics(today)
+        cursor = self.connection.execute(
+            "SELECT username, MIN(id), COUNT(*), "
+            "SUM(completed = 'Yes'), SUM(completed != 'Yes'), SUM(completed != 'Yes' AND due_day <= ?) "
+            "FROM tasks GROUP BY username ORDER BY MIN(id)", (today,))
+        for username, first, total, completed, incomplete, overdue in cursor:
+            statistics.users[username] = {'first': first, 'total': total, 'completed': completed,
+                                          'incomplete': incomplete, 'overdue': overdue}
+            for key, value in (('total', total), ('completed', completed),
+                               ('incomplete', incomplete), ('overdue', overdue)):
+                statistics.totals[key] += value
+        return statistics
+
+    def report_source_files(self):
+        return [self.database]
+
+
+def _read_shard_lines(file):
+    """
+    Yield (task id, fields) for each line of an open shard file.
+
+    Each line is the task id, ", " and then the task's fields as they are
+    written in TASK_FILE.
+    """
+    for line in file:
+        if not line.strip():
+            continue  # Skip blank lines, as the TaskStore does
+        task_id, _, fields = line.partition(', ')
+        yield int(task_id), decode_task_line(fields)
+
+
+def _count_shard(job):
+    """
+    Count the tasks in one shard file for the reports (run in a worker process).
+
+    Parameters:
+    job (tuple): (file_name, today).
+
+    Returns:
+        tuple: (number of tasks in the shard, TaskStatistics with task ids as the 'first' ids)
+    """
+    file_name, today = job
+    statistics = TaskStatistics(today)
+    rows = 0
+    with open(file_name, 'r') as file:
+        for task_id, (username, _, _, _, due_date, completed) in _read_shard_lines(file):
+            statistics.count_task(username, due_date, completed, task_id)
+            rows += 1
+    return rows, statistics
+
+
+class ShardedBackend(StorageBackend):
+    """
+    Keeps users in USER_FILE and tasks in shard files under SHARD_DIR, one per bucket of assignees.
+
+    Every username is hashed (CRC-32) to one of a fixed number of shards, so all
+    of a user's tasks are in one file and viewing or editing them reads and
+    rewrites only that file. Each line of a shard is a task id followed by the
+    task's fields in the format of TASK_FILE, and the lines are kept in task id
+    order. Task ids never change when tasks are added, edited or moved.
+
+    manifest.json holds the number of shards and the next free task id. The ids
+    of new tasks are reserved in the manifest before the tasks are appended, so
+    a crash can leave a gap in the ids but never hand one out twice.
+
+    An edit rewrites the task's shard through a temporary file and an atomic
+    rename. Reassigning a task to a user in another shard rewrites two shards,
+    which cannot be renamed at once, so both are written first and then listed
+    as pending in the manifest before they are renamed. If a crash leaves a
+    pending list behind, the next session finishes the renames.
+
+    Shards are read on first use and kept in memory until their file changes.
+    The reports count the shards in parallel (see _count_shard()). A page of
+    tasks by due date merges the shards' due-date indexes (see _due_index())
+    and stops once the page is full.
+    """
+
+    def __init__(self, directory=None, shard_count=None):
+        self.directory = directory or SHARD_DIR
+        self.manifest_name = os.path.join(self.directory, 'manifest.json')
+        self.shard_count = shard_count or SHARD_COUNT  # Replaced by the manifest's count once there is one
+        self.next_id = 0  # The id the next new task gets
+        self._generation = 0  # Changes when the tasks are renumbered (see StorageBackend.generation())
+        self._manifest_stamp = None  # Stamp of the manifest when last read
+        self._shards = {}  # shard index -> (stamp of its file when read, its tasks in id order, their ids)
+        self._due_indexes = {}  # shard index -> (stamp of its file when indexed, its due-date indexes)
+
+    def _shard_name(self, index):
+        """Return the file name of a shard."""
+        return os.path.join(self.directory, f"shard-{index:03d}.tasks")
+
+    def _shard_of(self, username):
+        """Return the index of the shard that holds a user's tasks."""
+        return zlib.crc32(username.encode('utf-8')) % self.shard_count
+
+    def _refresh_manifest(self):
+        """Re-read the manifest if another session changed it, creating it or finishing an interrupted move first."""
+        try:
+            stamp = TaskStore._file_stamp(self.manifest_name)
+        except FileNotFoundError:
+            with task_file_lock():
+                if not os.path.exists(self.manifest_name):
+                    self._save_manifest()
+            stamp = None
+        if stamp != self._manifest_stamp:
+            if self._load_manifest():
+                with task_file_lock():
+                    pending = self._load_manifest()  # Another session may have finished it meanwhile
+                    if pending:
+                        for name in pending:
+                            # Every file was fully written before the move was recorded, so roll it forward
+                            path = os.path.join(self.directory, name)
+                            if os.path.exists(path + '.tmp'):
+                                os.replace(path + '.tmp', path)
+                        self._save_manifest()
+
+    def _load_manifest(self):
+        """Read the manifest, returning the shard files of an unfinished move (None if there is none)."""
+        with open(self.manifest_name, 'r') as file:
+            stat = os.fstat(file.fileno())
+            data = json.load(file)
+            record_io(bytes_read=file.tell())
+        self.shard_count = data['shard_count']
+        self.next_id = data['next_id']
+        self._generation = data.get('generation', 0)
+        self._manifest_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return data.get('pending')
+
+    def _save_manifest(self, pending=None):
+        """Write the manifest through an atomic rename, optionally listing shard files about to be renamed."""
+        os.makedirs(self.directory, exist_ok=True)
+        data = {'shard_count': self.shard_count, 'next_id': self.next_id, 'generation': self._generation}
+        if pending:
+            data['pending'] = pending
+        temp_file = self.manifest_name + '.tmp'
+        with open(temp_file, 'w') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+            record_io(bytes_written=file.tell())
+        os.replace(temp_file, self.manifest_name)
+        self._manifest_stamp = TaskStore._file_stamp(self.manifest_name)
+
+    def _shard(self, index):
+        """Return (tasks, task ids) of one shard in id order, reading its file only if it changed since it was last read."""
+        name = self._shard_name(index)
+        try:
+            stamp = TaskStore._file_stamp(name)
+        except FileNotFoundError:
+            return [], []
+        cached = self._shards.get(index)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+        
+        tasks = []
+        with instrument_phase('read'), open(name, 'r') as file:
+            # Stamp the file that was actually read, in case another session replaces it meanwhile
+            stat = os.fstat(file.fileno())
+            for task_id, fields in _read_shard_lines(file):
+                tasks.append(Task(task_id, *fields))
+            record_io(len(tasks), stat.st_size)
+        task_ids = [task.task_id for task in tasks]
+        self._shards[index] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), tasks, task_ids)
+        return tasks, task_ids
+
+    def _due_index(self, index, username=None):
+        """
+        Return the (due day ordinal, task id, task) triples of one shard's incomplete tasks, in due-date order.
+
+        The triples are sorted once per version of the shard file, overall and
+        per assignee, as the TaskStore's due-date indexes are.
+
+        Parameters:
+        index (int): The shard.
+        username (str): Only include tasks assigned to this user (None for everyone).
+        """
+        tasks = self._shard(index)[0]
+        stamp = self._shards[index][0] if index in self._shards else None
+        cached = self._due_indexes.get(index)
+        if cached is None or stamp is None or cached[0] != stamp:
+            everyone, by_assignee = [], defaultdict(list)
+            for task in tasks:
+                if task.completed != 'Yes':
+                    entry = (date_ordinal(task.due_date), task.task_id, task)
+                    everyone.append(entry)
+                    by_assignee[task.username].append(entry)
+            everyone.sort()
+            for entries in by_assignee.values():
+                entries.sort()
+            cached = self._due_indexes[index] = (stamp, everyone, by_assignee)
+        return cached[1] if username is None else cached[2].get(username, [])
+
+    def _find(self, task_id, username=None):
+        """Return (shard index, position) of a task, looking in username's shard first, or (None, None)."""
+        indexes = range(self.shard_count)
+        if username is not None:
+            indexes = [self._shard_of(username)] + [index for index in indexes if index != self._shard_of(username)]
+        for index in indexes:
+            task_ids = self._shard(index)[1]
+            position = bisect.bisect_left(task_ids, task_id)
+            if position < len(task_ids) and task_ids[position] == task_id:
+                return index, position
+        return None, None
+
+    @staticmethod
+    def _write_shard_file(file_name, tasks):
+        """Write Task records to a new shard file and make sure they are on disk."""
+        with instrument_phase('write'), open(file_name, 'w') as file:
+            for task in tasks:
+                file.write(f"{task.task_id}, " + encode_task_line(task.to_fields()))
+            file.flush()
+            os.fsync(file.fileno())
+            record_io(bytes_written=file.tell())
+
+    def _replace_shards(self, indexes):
+        """
+        Rename the written temporary files of shards over the shard files, as one change.
+
+        Must be called under task_file_lock(). With more than one shard the
+        renames are recorded as pending in the manifest first (see the class
+        description).
+        """
+        names = [self._shard_name(index) for index in indexes]
+        if len(names) > 1:
+            self._save_manifest(pending=[os.path.basename(name) for name in names])
+        for name in names:
+            os.replace(name + '.tmp', name)
+        if len(names) > 1:
+            self._save_manifest()
+
+    def _write_shards(self, shards):
+        """
+        Replace the contents of shards, as one change. Must be called under task_file_lock().
+
+        Parameters:
+        shards (dict): shard index -> its new list of Task records, in id order.
+        """
+        for index, tasks in shards.items():
+            self._write_shard_file(self._shard_name(index) + '.tmp', tasks)
+        self._replace_shards(list(shards))
+        for index, tasks in shards.items():
+            self._shards[index] = (TaskStore._file_stamp(self._shard_name(index)), tasks,
+                                   [task.task_id for task in tasks])
+
+    def prepare(self):
+        self._refresh_manifest()
+        get_user_registry()
+
+    def read_users(self):
+        return get_user_registry().users
+
+    def password_for(self, username):
+        return get_user_registry().users.get(username)
+
+    def add_user(self, username, password):
+        return get_user_registry().add(username, password)
+
+    def add_task(self, username, title, description, assigned_date, due_date, completed):
+        self.add_tasks([(username, title, description, assigned_date, due_date, completed)])
+
+    def add_tasks(self, tasks):
+        tasks = iter(tasks)
+        count = 0
+        with task_file_lock():
+            self._refresh_manifest()
+            while True:
+                batch = list(itertools.islice(tasks, 10000))
+                if not batch:
+                    return count
+                
+                # Reserve the batch's ids first, so a crash while appending cannot hand them out again
+                first_id = self.next_id
+                self.next_id += len(batch)
+                self._save_manifest()
+                
+                new_tasks = defaultdict(list)
+                for task_id, details in enumerate(batch, first_id):
+                    new_tasks[self._shard_of(details[0])].append(Task(task_id, *details))
+                for index, shard_tasks in new_tasks.items():
+                    name = self._shard_name(index)
+                    # A shard that is still as it was read only needs the new tasks added in memory
+                    cached = self._shards.get(index)
+                    if cached is not None and (not os.path.exists(name) or cached[0] != TaskStore._file_stamp(name)):
+                        cached = None
+                    with open(name, 'a') as file:
+                        start = file.tell()
+                        file.write(''.join(f"{task.task_id}, " + encode_task_line(task.to_fields())
+                                           for task in shard_tasks))
+                        file.flush()
+                        os.fsync(file.fileno())
+                        record_io(bytes_written=file.tell() - start)
+                    if cached is not None:
+                        cached[1].extend(shard_tasks)
+                        cached[2].extend(task.task_id for task in shard_tasks)
+                        self._shards[index] = (TaskStore._file_stamp(name), cached[1], cached[2])
+                count += len(batch)
+
+    def iter_tasks(self, username=None, completed=None):
+        self._refresh_manifest()
+        if username is not None:
+            tasks = self._shard(self._shard_of(username))[0]
+        else:
+            # Every shard is in id order, so merging them gives every task in id order
+            tasks = heapq.merge(*[self._shard(index)[0] for index in range(self.shard_count)],
+                                key=lambda task: task.task_id)
+        return (task for task in tasks
+                if (username is None or task.username == username)
+                and (completed is None or task.completed == completed))
+
+    def tasks_for(self, username):
+        return list(self.iter_tasks(username))
+
+    def get_task(self, task_id):
+        self._refresh_manifest()
+        index, position = self._find(task_id)
+        return None if index is None else self._shard(index)[0][position]
+
+    def generation(self):
+        self._refresh_manifest()
+        return self._generation
+
+    def page_tasks_due(self, offset, limit, first_day=None, last_day=None, username=None):
+        # Each shard's due-date index is bisected, and the ranges found are merged only as far as the page goes
+        self._refresh_manifest()
+        indexes = range(self.shard_count) if username is None else [self._shard_of(username)]
+        ranges = []
+        total = 0
+        for index in indexes:
+            entries = self._due_index(index, username)
+            start = 0 if first_day is None else bisect.bisect_left(entries, (first_day,))
+            end = len(entries) if last_day is None else bisect.bisect_left(entries, (last_day + 1,))
+            total += max(0, end - start)
+            ranges.append(map(entries.__getitem__, range(start, end)))
+        page = itertools.islice(heapq.merge(*ranges), offset, offset + limit)
+        return [task for _, _, task in page], total
+
+    def search_tasks(self, query, offset, limit, username=None, completed=None):
+        # There is no word index: the matching shards are scanned (only one with a username)
+        terms = SearchIndex.terms(query)
+        matching = [task for task in self.iter_tasks(username, completed) if SearchIndex.matches(terms, task)]
+        return matching[offset:offset + limit], len(matching)
+
+    def rebuild_search_index(self):
+        # Searches scan the shards, so there is no index to rebuild; count the tasks a search covers
+        self._refresh_manifest()
+        return sum(len(self._shard(index)[0]) for index in range(self.shard_count))
+
+    def update_task(self, task, expected=None, **changes):
+        with task_file_lock():
+            self._refresh_manifest()
+            source, position = self._find(task.task_id, task.username)
+            current = None if source is None else self._shard(source)[0][position]
+            if current is None or (expected is not None and current.to_fields() != list(expected)):
+                raise StaleTaskError(current)
+            
+            updated = Task(current.task_id, *current.to_fields())
+            for field, value in changes.items():
+                setattr(updated, field, value)
+            
+            # Only the task's shard is rewritten, or its old and new shard if it moves to another one
+            source_tasks = list(self._shard(source)[0])
+            destination = self._shard_of(updated.username)
+            if destination == source:
+                source_tasks[position] = updated
+                self._write_shards({source: source_tasks})
+            else:
+                del source_tasks[position]
+                destination_tasks, destination_ids = self._shard(destination)
+                destination_tasks = list(destination_tasks)
+                destination_tasks.insert(bisect.bisect_left(destination_ids, updated.task_id), updated)
+                self._write_shards({source: source_tasks, destination: destination_tasks})
+        return updated
+
+    def replace_tasks(self, tasks):
+        with task_file_lock():
+            self._refresh_manifest()
+            shards = {index: [] for index in range(self.shard_count)}
+            count = 0
+            for task in tasks:
+                fields = task.to_fields() if isinstance(task, Task) else list(task)
+                # The tasks are numbered in order, as the flat-file backend numbers them
+                shards[self._shard_of(fields[0])].append(Task(count, *fields))
+                count += 1
+            self._generation += 1
+            self._save_manifest()  # The generation moves on before the ids change, as next_task_generation() does
+            self._write_shards(shards)
+            self.next_id = count
+            self._save_manifest()
+
+    def bulk_update(self, task_filter, **changes):
+        with task_file_lock():
+            self._refresh_manifest()
+            indexes = range(self.shard_count)
+            if task_filter.username is not None:
+                indexes = [self._shard_of(task_filter.username)]  # Only one shard can hold the user's tasks
+            
+            shards = {}  # shard index -> its new list of tasks, for every shard that changes
+            moved = defaultdict(list)  # shard index -> changed tasks moving into it from another shard
+            count = 0
+            for index in indexes:
+                tasks = self._shard(index)[0]
+                kept = []
+                changed = False
+                for task in tasks:
+                    if task_filter.matches(task):
+                        task = Task(task.task_id, *task.to_fields())
+                        for field, value in changes.items():
+                            setattr(task, field, value)
+                        count += 1
+                        changed = True
+                        destination = self._shard_of(task.username)
+                        if destination != index:
+                            moved[destination].append(task)
+                            continue
+                    kept.append(task)
+                if changed:
+                    shards[index] = kept
+            
+            for index, tasks in moved.items():
+                current = shards.get(index)
+                if current is None:
+                    current = self._shard(index)[0]
+                # Both lists are in id order, and so is the merged shard
+                shards[index] = list(heapq.merge(current, tasks, key=lambda task: task.task_id))
+            if shards:
+                self._write_shards(shards)
+        return count
+
+    def report_statistics(self, workers=None):
+        if workers is None:
+            workers = REPORT_WORKERS
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        
+        today = datetime.today().toordinal()
+        statistics = TaskStatistics(today)
+        with task_file_lock():  # So a task being moved between shards is not counted twice
+            self._refresh_manifest()
+            jobs = [(self._shard_name(index), today) for index in range(self.shard_count)
+                    if os.path.exists(self._shard_name(index))]
+            if workers > 1 and len(jobs) > 1:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                    results = list(executor.map(_count_shard, jobs))
+            else:
+                results = [_count_shard(job) for job in jobs]
+        
+        # Each user's tasks are all in one shard, so every user comes from one partial count
+        for rows, partial in results:
+            statistics.merge(partial, 0)
+            record_io(rows)
+        return statistics
+
+    def report_source_files(self):
+        self._refresh_manifest()
+        return [self.manifest_name] + [self._shard_name(index) for index in range(self.shard_count)]
+
+
+def count_workload(entries, first_day, weeks):
+    """
+    Count tasks by user and due week, given (username, due day ordinal) pairs.
+
+    The pairs are turned into two integer columns and counted by
+    count_workload_columns().
+
+    Returns:
+        dict: username -> weeks + 2 counts, as StorageBackend.workload() returns them.
+    """
+    user_codes = {}
+    assignee = array.array('i')
+    due_day = array.array('i')
+    for username, day in entries:
+        assignee.append(user_codes.setdefault(username, len(user_codes)))
+        due_day.append(day)
+    record_io(len(assignee))
+    return dict(zip(user_codes, count_workload_columns(assignee, due_day, len(user_codes), first_day, weeks)))
+
+
+def count_workload_columns(assignee, due_day, user_count, first_day, weeks):
+    """
+    Count tasks by user and due week with whole-column operations.
+
+    With NumPy, each task's user code and week are combined into one bin number
+    and every bin is counted by a single bincount. Without it the columns are
+    walked in a loop.
+
+    Parameters:
+    assignee (sequence): The user code (0 to user_count - 1) of each task.
+    due_day (sequence): The due day ordinal of each task.
+    user_count (int): The number of user codes.
+    first_day (int): Day ordinal of the first day of the first week.
+    weeks (int): The number of weeks counted one by one.
+
+    Returns:
+        list: For each user code, weeks + 2 counts: tasks due before first_day,
+        due in each week, and due after the last week.
+    """
+    columns = weeks + 2
+    numpy = optional_numpy()
+    if numpy is not None:
+        week = numpy.clip((numpy.asarray(due_day, dtype=numpy.int64) - first_day) // 7 + 1, 0, weeks + 1)
+        bins = numpy.asarray(assignee, dtype=numpy.int64) * columns + week
+        return numpy.bincount(bins, minlength=user_count * columns).reshape(user_count, columns).tolist()
+    
+    counts = [[0] * columns for _ in range(user_count)]
+    for code, day in zip(assignee, due_day):
+        counts[code][min(max((day - first_day) // 7 + 1, 0), weeks + 1)] += 1
+    return counts
+
+
+class TaskSnapshot:
+    """
+    Columnar, memory-mapped copy of the tasks, used to compute statistics quickly.
+
+    Assignees are dictionary-encoded as int32 codes, numbered in order of each
+    user's first task. Assigned and due dates are int32 day ordinals, and the
+    completion status is a bitmap. The columns sit in SNAPSHOT_FILE after a
+    small JSON header holding the user dictionary and the stamps of the data
+    files the snapshot was built from. They are read straight from the memory
+    map, as NumPy arrays when NumPy is installed and as memoryviews otherwise.
+
+    The memory map stays open until close() is called. Windows cannot replace
+    a file that is mapped, so a snapshot must be closed before SNAPSHOT_FILE
+    is rebuilt.
+    """
+
+    MAGIC = b'TASKSNAP1\n'
+
+    def __init__(self, file_name):
+        self.columns = {}
+        with open(file_name, 'rb') as file:
+            self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapped[:len(self.MAGIC)] != self.MAGIC:
+            self.close()
+            raise ValueError(f"{file_name} is not a task snapshot")
+        start = len(self.MAGIC) + 8
+        header_length = int.from_bytes(self._mapped[len(self.MAGIC):start], 'little')
+        header = json.loads(self._mapped[start:start + header_length])
+        self.stamps = header['stamps']
+        self.count = header['count']
+        self.users = header['users']
+        self.columns = {name: self._column(offset, typecode, length)
+                        for name, (offset, typecode, length) in header['columns'].items()}
+
+    def _column(self, offset, typecode, length):
+        """Return a zero-copy view of one column of the memory map."""
+        numpy = optional_numpy()
+        if numpy is not None:
+            return numpy.frombuffer(self._mapped, dtype=numpy.dtype(typecode), count=length, offset=offset)
+        return memoryview(self._mapped)[offset:offset + length * array.array(typecode).itemsize].cast(typecode)
+
+    def close(self):
+        """Release the column views and close the memory map."""
+        for view in [column for column in self.columns.values() if isinstance(column, memoryview)]:
+            view.release()
+        self.columns = {}  # NumPy arrays let go of the map once nothing refers to them
+        self._mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def build(cls, file_name, tasks, stamps):
+        """
+        Write a snapshot of tasks to file_name through an atomic rename.
+
+        Parameters:
+        file_name (str): The snapshot file to write.
+        tasks (iterable): The tasks, in order; they are only iterated once.
+        stamps (list): data_file_stamps() of the files the tasks were read from.
+        """
+        user_codes = {}
+        assignee = array.array('i')
+        assigned_day = array.array('i')
+        due_day = array.array('i')
+        completed = bytearray()
+        count = 0
+        for task in tasks:
+            assignee.append(user_codes.setdefault(task.username, len(user_codes)))
+            assigned_day.append(date_ordinal(task.assigned_date))
+            due_day.append(date_ordinal(task.due_date))
+            if count % 8 == 0:
+                completed.append(0)
+            if task.completed == 'Yes':
+                completed[-1] |= 1 << (count % 8)
+            count += 1
+        
+        # Lay the columns out one after the other, each aligned to 8 bytes
+        columns = {'assignee': assignee, 'assigned_day': assigned_day, 'due_day': due_day,
+                   'completed': array.array('B', completed)}
+        header = {'stamps': stamps, 'count': count, 'users': list(user_codes), 'columns': {}}
+        header_length = 4096 + len(json.dumps(header['users']))  # Room for the header, padded below
+        offset = len(cls.MAGIC) + 8 + header_length
+        for name, column in columns.items():
+            offset += -offset % 8
+            header['columns'][name] = (offset, column.typecode, len(column))
+            offset += len(column) * column.itemsize
+        header_bytes = json.dumps(header).encode('utf-8').ljust(header_length)
+        
+        temp_file = file_name + '.tmp'
+        with open(temp_file, 'wb') as file:
+            file.write(cls.MAGIC + header_length.to_bytes(8, 'little') + header_bytes)
+            for name, column in columns.items():
+                file.write(b'\0' * (header['columns'][name][0] - file.tell()))
+                column.tofile(file)
+        os.replace(temp_file, file_name)
+
+    def statistics(self, today):
+        """
+        Count totals, per-user and overdue tasks with whole-column operations.
+
+        Parameters:
+        today (int): Day ordinal; incomplete tasks due on or before it are overdue.
+
+        Returns:
+            TaskStatistics: Counters for today (without the pending buckets used for incremental updates).
+        """
+        statistics = TaskStatistics(today)
+        user_count = len(self.users)
+        assignee = self.columns['assignee']
+        due_day = self.columns['due_day']
+        
+        numpy = optional_numpy()
+        if numpy is not None:
+            completed = numpy.unpackbits(self.columns['completed'], count=self.count, bitorder='little').astype(bool)
+            totals = numpy.bincount(assignee, minlength=user_count)
+            completed_counts = numpy.bincount(assignee[completed], minlength=user_count)
+            overdue_counts = numpy.bincount(assignee[~completed & (due_day <= today)], minlength=user_count)
+            # User codes follow first appearance, so each code's first row is where it first occurs
+            _, first_rows = numpy.unique(assignee, return_index=True)
+            totals, completed_counts, overdue_counts, first_rows = (
+                totals.tolist(), completed_counts.tolist(), overdue_counts.tolist(), first_rows.tolist())
+        else:
+            totals = [0] * user_count
+            completed_counts = [0] * user_count
+            overdue_counts = [0] * user_count
+            first_rows = [None] * user_count
+            bitmap = self.columns['completed']
+            for row, (code, day) in enumerate(zip(assignee, due_day)):
+                totals[code] += 1
+                if first_rows[code] is None:
+                    first_rows[code] = row
+                if bitmap[row >> 3] >> (row & 7) & 1:
+                    completed_counts[code] += 1
+                elif day <= today:
+                    overdue_counts[code] += 1
+        
+        record_io(self.count)
+        for code, username in enumerate(self.users):
+            counts = {'first': first_rows[code], 'total': totals[code], 'completed': completed_counts[code],
+                      'incomplete': totals[code] - completed_counts[code], 'overdue': overdue_counts[code]}
+            statistics.users[username] = counts
+            for key in ('total', 'completed', 'incomplete', 'overdue'):
+                statistics.totals[key] += counts[key]
+        return statistics
+
+
+    def workload(self, first_day, weeks):
+        """Count each user's incomplete tasks by due week (see StorageBackend.workload()) from the columns."""
+        assignee = self.columns['assignee']
+        due_day = self.columns['due_day']
+        numpy = optional_numpy()
+        if numpy is not None:
+            incomplete = ~numpy.unpackbits(self.columns['completed'], count=self.count, bitorder='little').astype(bool)
+            assignee, due_day = assignee[incomplete], due_day[incomplete]
+        else:
+            bitmap = self.columns['completed']
+            rows = [row for row in range(self.count) if not bitmap[row >> 3] >> (row & 7) & 1]
+            assignee, due_day = [assignee[row] for row in rows], [due_day[row] for row in rows]
+        record_io(self.count)
+        counts = count_workload_columns(assignee, due_day, len(self.users), first_day, weeks)
+        return {username: counts[code] for code, username in enumerate(self.users) if any(counts[code])}
+
+
+_task_snapshot = None  # The session's open TaskSnapshot, if one has been loaded
+_task_snapshot_lock = threading.RLock()  # Held while the session's TaskSnapshot is loaded or read
+
+
+def load_task_snapshot():
+    """
+    Return the columnar snapshot of the tasks, rebuilding it first if the data files changed.
+
+    Must be called under _task_snapshot_lock, held for as long as the snapshot
+    is used: an out-of-date snapshot is closed before SNAPSHOT_FILE is rebuilt,
+    so it must not be in use by another thread.
+    """
+    global _task_snapshot
+    stamps = data_file_stamps()
+    if _task_snapshot is not None:
+        if _task_snapshot.stamps == stamps:
+            return _task_snapshot
+        _task_snapshot.close()
+        _task_snapshot = None
+    try:
+        snapshot = TaskSnapshot(SNAPSHOT_FILE)
+    except (OSError, ValueError):
+        snapshot = None
+    if snapshot is None or snapshot.stamps != stamps:
+        if snapshot is not None:
+            snapshot.close()
+        TaskSnapshot.build(SNAPSHOT_FILE, iter_tasks_from_file(), stamps)
+        snapshot = TaskSnapshot(SNAPSHOT_FILE)
+    _task_snapshot = snapshot
+    return snapshot
+
+
+class SearchIndex:
+    """
+    Inverted index of the words in task titles and descriptions, kept in SQLite.
+
+    Every (word, task id) pair is a row of a table keyed by word, so the tasks
+    containing a word are one range of the table's B-tree, and the tasks
+    containing any word with a given start are one longer range. A search for
+    several words intersects those ranges. Words are lowercased runs of
+    letters, digits and underscores.
+
+    Only tasks are ever added to the index; editing a task never changes its
+    title or description. The index remembers the highest task id it holds,
+    so the tasks added since (by any session) are indexed the next time it is
+    used. Replacing every task clears it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS search_words (
+            word TEXT NOT NULL,
+            task_id INTEGER NOT NULL,
+            PRIMARY KEY (word, task_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS search_state (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    WORD = re.compile(r'\w+')
+
+    def __init__(self, connection):
+        # Changes are not committed here: callers wrap them in a transaction ("with connection:")
+        self.connection = connection
+        self.connection.executescript(self.SCHEMA)
+
+    @classmethod
+    def words(cls, text):
+        """Return the set of words in text, as they are indexed."""
+        return set(cls.WORD.findall(text.lower()))
+
+    def last_task_id(self):
+        """Return the highest task id indexed so far, or -1 if none is."""
+        row = self.connection.execute("SELECT value FROM search_state WHERE name = 'last_task_id'").fetchone()
+        return row[0] if row else -1
+
+    def add_tasks(self, tasks):
+        """
+        Index the words of tasks, given in id order after last_task_id(), and return how many there were.
+        """
+        count = 0
+        last_task_id = None
+        
+        def pairs():
+            nonlocal count, last_task_id
+            for task in tasks:
+                for word in self.words(f"{task.title} {task.description}"):
+                    yield word, task.task_id
+                count += 1
+                last_task_id = task.task_id
+        
+        self.connection.executemany("INSERT OR IGNORE INTO search_words (word, task_id) VALUES (?, ?)", pairs())
+        if last_task_id is not None:
+            self.connection.execute("INSERT OR REPLACE INTO search_state (name, value) VALUES ('last_task_id', ?)",
+                                    (last_task_id,))
+        return count
+
+    def clear(self):
+        """Remove every task from the index."""
+        self.connection.execute("DELETE FROM search_words")
+        self.connection.execute("DELETE FROM search_state")
+
+    def query(self, text):
+        """
+        Return the SQL selecting the ids of the tasks that match a search, and its parameters.
+
+        Every word of the search must appear in the task; a word ending in *
+        matches any word starting with it.
+
+        Raises:
+            ValueError: If the search has no words in it.
+        """
+        selects, parameters = [], []
+        for word, prefix in self.terms(text):
+            if prefix:
+                # Every word from the prefix up to (not including) the next possible prefix
+                selects.append("SELECT DISTINCT task_id FROM search_words WHERE word >= ? AND word < ?")
+                parameters += [word, word[:-1] + chr(ord(word[-1]) + 1)]
+            else:
+                selects.append("SELECT task_id FROM search_words WHERE word = ?")
+                parameters.append(word)
+        return " INTERSECT ".join(selects), parameters
+
+    @classmethod
+    def terms(cls, text):
+        """
+        Split a search into (word, True if it is a prefix) pairs.
+
+        Raises:
+            ValueError: If the search has no words in it.
+        """
+        terms = []
+        for part in text.split():
+            words = cls.WORD.findall(part.lower())
+            terms.extend((word, part.endswith('*') and position == len(words) - 1)
+                         for position, word in enumerate(words))
+        if not terms:
+            raise ValueError("Enter at least one word to search for.")
+        return terms
+
+    @classmethod
+    def matches(cls, terms, task):
+        """Return True if a task contains every one of a search's terms(), without using the index."""
+        words = cls.words(f"{task.title} {task.description}")
+        return all(word in words if not prefix else any(other.startswith(word) for other in words)
+                   for word, prefix in terms)
+
+    def search(self, text):
+        """Return the ids of the tasks that match a search (see query()), in id order."""
+        search, parameters = self.query(text)
+        task_ids = [task_id for (task_id,) in self.connection.execute(f"{search} ORDER BY 1", parameters)]
+        record_io(len(task_ids))
+        return task_ids
+
+
+_search_index = None  # The session's SearchIndex over the flat-file tasks, opened on first use
+
+
+def get_search_index(catch_up=True):
+    """
+    Return the session's SearchIndex of the tasks in TASK_FILE, kept in SEARCH_FILE.
+
+    Unless catch_up is False, the tasks added since the index was last used are
+    indexed first. If TASK_FILE holds fewer tasks than the index knows of, it
+    was replaced behind the index's back, so the index is started again.
+    """
+    global _search_index
+    if _search_index is None:
+        _search_index = SearchIndex(sqlite3.connect(SEARCH_FILE, check_same_thread=False))
+    if catch_up:
+        # Under the lock, so no other session can replace TASK_FILE between reading it and indexing it
+        with task_file_lock(), _search_index.connection:
+            tasks = get_task_store().tasks
+            last_task_id = _search_index.last_task_id()
+            if last_task_id >= len(tasks):
+                _search_index.clear()
+                last_task_id = -1
+            _search_index.add_tasks(tasks[last_task_id + 1:])
+    return _search_index
+
+
+class TaskArchive:
+    """
+    Completed tasks moved out of TASK_FILE into compressed, read-only segment files.
+
+    Each run of the 'archive' command writes one gzip segment to ARCHIVE_DIR,
+    in the task file's line format, and never touches it again. The manifest
+    (manifest.json) lists the segments in order, each with a summary: how many
+    tasks it holds, the range of their due dates and how many belong to each
+    user. Archived tasks are all completed, so those per-user counts are
+    enough for the reports, which never open a segment. Viewing archived tasks
+    decompresses the segments one line at a time.
+
+    Archived tasks no longer have task ids. The manifest also keeps the order
+    users were listed in the reports when tasks were last archived, so the
+    reports list them in the same order afterwards.
+
+    Replacing TASK_FILE and adding the segment to the manifest cannot happen
+    at once, so the manifest first records the segment as pending. If a crash
+    leaves a pending segment behind, the next session finishes the archive if
+    TASK_FILE was already replaced, or throws the segment away if it was not.
+    """
 
-def ensure_file_exists(file_name):
-    """Ensure that a file exists, otherwise create it to avoid file not found error."""
-    if not os.path.exists(file_name):
-        with open(file_name, 'w') as file:
-            pass
+    TEMP_FILE = TASK_FILE + '.archive.tmp'  # The kept tasks, before they replace TASK_FILE
 
-def read_users():
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        self.manifest_name = os.path.join(directory, 'manifest.json')
+        self.segments = []  # Summaries of the segments, oldest first
+        self.user_order = []  # The order users were listed in the reports when tasks were last archived
+        self.pending = None  # A segment being archived: {'segment': summary, 'user_order': [...]}
+        self._stamp = None  # Stamp of the manifest when last read
+
+    def refresh(self):
+        """Re-read the manifest if another session changed it, finishing any interrupted archive first."""
+        try:
+            stamp = TaskStore._file_stamp(self.manifest_name)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            self._load(stamp)
+        if self.pending is not None:
+            with task_file_lock():
+                self._load(TaskStore._file_stamp(self.manifest_name))  # Another session may have recovered it
+                if self.pending is not None:
+                    self._recover()
+        return self
+
+    def _load(self, stamp):
+        """Read the manifest, which has the given stamp (None if there is no manifest yet)."""
+        self.segments, self.user_order, self.pending = [], [], None
+        if stamp is not None:
+            with open(self.manifest_name, 'r') as file:
+                data = json.load(file)
+                record_io(bytes_read=file.tell())
+            self.segments = data['segments']
+            self.user_order = data['user_order']
+            self.pending = data.get('pending')
+        self._stamp = stamp
+
+    def _save(self):
+        """Write the manifest through an atomic rename."""
+        os.makedirs(self.directory, exist_ok=True)
+        data = {'segments': self.segments, 'user_order': self.user_order}
+        if self.pending is not None:
+            data['pending'] = self.pending
+        temp_file = self.manifest_name + '.tmp'
+        with open(temp_file, 'w') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+            record_io(bytes_written=file.tell())
+        os.replace(temp_file, self.manifest_name)
+        self._stamp = TaskStore._file_stamp(self.manifest_name)
+
+    def _recover(self):
+        """Finish or undo the archive recorded as pending. Must be called under task_file_lock()."""
+        if os.path.exists(self.TEMP_FILE):
+            # TASK_FILE was never replaced, so it still holds every task: forget the segment
+            os.remove(self.TEMP_FILE)
+            segment_file = os.path.join(self.directory, self.pending['segment']['file'])
+            if os.path.exists(segment_file):
+                os.chmod(segment_file, 0o644)  # Read-only files cannot be removed on Windows
+                os.remove(segment_file)
+            self.pending = None
+            self._save()
+        else:
+            self.commit()
+
+    def write_segment(self, tasks, before):
+        """
+        Write tasks to a new segment file and return its summary.
+
+        Parameters:
+        tasks (list): The Task records to archive, all completed.
+        before (str): The YYYY-MM-DD date the tasks were due before.
+
+        Returns:
+            dict: The summary to pass to begin().
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # Number the segment after every file already there, including any left by an abandoned archive
+        numbers = [int(name.split('-')[1].split('.')[0]) for name in os.listdir(self.directory)
+                   if name.startswith('segment-') and name.endswith('.tasks.gz')]
+        name = f"segment-{max(numbers, default=0) + 1:05d}.tasks.gz"
+        path = os.path.join(self.directory, name)
+        
+        users = {}
+        due_days = [date_ordinal(task.due_date) for task in tasks]
+        with open(path + '.tmp', 'wb') as raw_file:
+            with gzip.GzipFile(fileobj=raw_file, mode='wb') as file:
+                for task in tasks:
+                    file.write(encode_task_line(task.to_fields()).encode('utf-8'))
+                    users[task.username] = users.get(task.username, 0) + 1
+            raw_file.flush()
+            os.fsync(raw_file.fileno())
+            record_io(len(tasks), bytes_written=raw_file.tell())
+        os.chmod(path + '.tmp', 0o444)  # Segments are never changed once written
+        os.replace(path + '.tmp', path)
+        return {
+            'file': name,
+            'archived_on': datetime.today().strftime("%Y-%m-%d"),
+            'before': before,
+            'count': len(tasks),
+            'first_due': datetime.fromordinal(min(due_days)).strftime("%Y-%m-%d"),
+            'last_due': datetime.fromordinal(max(due_days)).strftime("%Y-%m-%d"),
+            'users': users,
+        }
+
+    def begin(self, summary, user_order):
+        """Record a written segment as pending, before TASK_FILE is replaced."""
+        self.pending = {'segment': summary, 'user_order': user_order}
+        self._save()
+
+    def commit(self):
+        """Add the pending segment to the archive, once TASK_FILE no longer holds its tasks."""
+        self.segments.append(self.pending['segment'])
+        self.user_order = self.pending['user_order']
+        self.pending = None
+        self._save()
+        # The remaining tasks were renumbered, so the search index no longer matches them
+        index = get_search_index(catch_up=False)
+        with index.connection:
+            index.clear()
+
+    def user_totals(self):
+        """Return the number of archived tasks of each user."""
+        totals = {}
+        for summary in self.segments:
+            for username, count in summary['users'].items():
+                totals[username] = totals.get(username, 0) + count
+        return totals
+
+    def combine(self, totals, user_counts):
+        """
+        Add the archived tasks to report counts of the tasks still in the task file.
+
+        Only the segment summaries are used. Archived tasks are completed, so they
+        only add to the 'total' and 'completed' counts.
+
+        Parameters:
+        totals (dict): The 'total', 'completed', 'incomplete' and 'overdue' task counts.
+        user_counts (dict): username -> the same counts for that user's tasks, in report order.
+
+        Returns:
+            tuple: (totals, user counts) including the archived tasks, in report order.
+        """
+        archived = self.user_totals()
+        totals = dict(totals)
+        totals['total'] += sum(archived.values())
+        totals['completed'] += sum(archived.values())
+        
+        combined = {}
+        known = set(self.user_order)
+        for username in self.user_order + [username for username in user_counts if username not in known]:
+            counts = user_counts.get(username)
+            if counts is None and username not in archived:
+                continue  # Neither the task file nor the archive has tasks of this user any more
+            counts = dict(counts or {'total': 0, 'completed': 0, 'incomplete': 0, 'overdue': 0})
+            counts['total'] += archived.get(username, 0)
+            counts['completed'] += archived.get(username, 0)
+            combined[username] = counts
+        return totals, combined
+
+    def iter_tasks(self, username=None):
+        """
+        Stream the archived tasks, oldest segment first, decompressing one line at a time.
+
+        Segments that hold no tasks of username are skipped without being opened.
+
+        Yields:
+            Task: Each archived task (with no task id), optionally only those assigned to username.
+        """
+        rows = 0
+        try:
+            for summary in self.segments:
+                if username is not None and username not in summary['users']:
+                    continue
+                with gzip.open(os.path.join(self.directory, summary['file']), 'rt', encoding='utf-8') as file:
+                    for line in file:
+                        if not line.strip():
+                            continue
+                        fields = parse_task_line(line, summary['file'])
+                        if fields is None:
+                            continue
+                        rows += 1
+                        task = Task(None, *fields)
+                        if username is None or task.username == username:
+                            yield task
+        finally:
+            record_io(rows)
+
+
+_task_archive = None  # The session's TaskArchive, created on first use
+
+
+def get_task_archive():
+    """Return the session's TaskArchive, re-reading its manifest if it changed."""
+    global _task_archive
+    if _task_archive is None:
+        _task_archive = TaskArchive(ARCHIVE_DIR)
+    return _task_archive.refresh()
+
+
+def report_counts(statistics):
     """
-    Read users from the USER_FILE and return them as a dictionary.
-    
-    The function reads each line from the USER_FILE, where each line contains a 
-    username and password separated by a comma. It then stores these as key-value 
-    pairs in a dictionary and returns this dictionary.
-    
+    Return the report counts of a TaskStatistics with the archived tasks added.
+
     Returns:
-        dict: A dictionary where the keys are usernames and the values are passwords.
+        tuple: (totals, per-user counts in report order), as write_reports() takes them.
     """
-    
-    users = {}  # Initialize an empty dictionary to store user data
-    
-    # Ensure that the USER_FILE exists before trying to read from it
-    ensure_file_exists(USER_FILE)
-    
-    # Open the USER_FILE in read mode
-    with open(USER_FILE, 'r') as file:
-        # Iterate over each line in the file
-        for line in file:
-            # Strip any leading/trailing whitespace and split the line into username and password
-            username, password = line.strip().split(', ')
-            
-            # Store the username and password in the dictionary
-            users[username] = password
-    
-    # Return the dictionary containing all the users and their passwords
-    return users
+    return get_task_archive().combine(statistics.totals, statistics.user_counts())
 
 
-def read_tasks():  # reading Task file
-    """Ensure TASK_FILE exists."""
-    ensure_file_exists(TASK_FILE)
+_storage_backend = None  # The session-wide StorageBackend, created on first use
+
+
+def get_storage_backend():
+    """Return the session-wide storage backend selected by STORAGE_BACKEND."""
+    global _storage_backend
+    if _storage_backend is None:
+        if STORAGE_BACKEND == 'sqlite':
+            _storage_backend = SQLiteBackend(SQLITE_FILE)
+        elif STORAGE_BACKEND == 'flat':
+            _storage_backend = FlatFileBackend()
+        elif STORAGE_BACKEND == 'sharded':
+            _storage_backend = ShardedBackend(SHARD_DIR)
+        else:
+            raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return _storage_backend
+
+
+def import_flat_files_to_sqlite(database=None):
+    """
+    Copy the users in USER_FILE and the tasks in TASK_FILE (with journaled edits)
+    into an SQLite database, replacing whatever it held before.
+
+    Task ids are kept, so ids held by the flat-file backend stay valid.
+
+    Parameters:
+    database (str): The database file to fill (SQLITE_FILE by default).
+
+    Returns:
+        tuple: (number of users imported, number of tasks imported)
+    """
+    backend = SQLiteBackend(database)
+    users = get_user_registry().users
+    with backend.connection:
+        backend.connection.execute("DELETE FROM users")
+        backend.connection.executemany("INSERT INTO users (username, password) VALUES (?, ?)", users.items())
+        backend.connection.execute("DELETE FROM tasks")
+        backend.search_index.clear()
+        task_count = 0
+        # Insert the tasks in batches so the whole file is never held in memory
+        tasks = iter_tasks_from_file()
+        while True:
+            batch = list(itertools.islice(tasks, 10000))
+            if not batch:
+                break
+            backend._insert_tasks(batch)
+            task_count += len(batch)
+    backend.connection.close()
+    return len(users), task_count
+
+
+def import_flat_files_to_shards(directory=None, shard_count=None):
+    """
+    Copy the tasks in TASK_FILE (with journaled edits) into shard files for the
+    sharded backend, replacing whatever they held before.
+
+    Task ids are kept. Users stay in USER_FILE, which both backends use.
 
-def login(users):
+    Parameters:
+    directory (str): The directory to fill (SHARD_DIR by default).
+    shard_count (int): The number of shards to spread the tasks over (SHARD_COUNT by default).
+
+    Returns:
+        int: The number of tasks copied.
+    """
+    backend = ShardedBackend(directory, shard_count)
+    with task_file_lock():
+        backend._refresh_manifest()  # Finishes any move a crash interrupted
+        old_count = backend.shard_count
+        backend.shard_count = shard_count or SHARD_COUNT
+        
+        # Stream the tasks into every shard's temporary file, so the whole file is never held in memory
+        task_count, next_id = 0, 0
+        files = [open(backend._shard_name(index) + '.tmp', 'w', buffering=IMPORT_BUFFER_BYTES)
+                 for index in range(backend.shard_count)]
+        try:
+            for task in iter_tasks_from_file():
+                files[backend._shard_of(task.username)].write(
+                    f"{task.task_id}, " + encode_task_line(task.to_fields()))
+                task_count += 1
+                next_id = task.task_id + 1
+            for file in files:
+                file.flush()
+                os.fsync(file.fileno())
+        finally:
+            for file in files:
+                file.close()
+        
+        backend.next_id = next_id
+        backend._replace_shards(range(backend.shard_count))
+        backend._save_manifest()
+        # Shards beyond a smaller new shard count now hold tasks that were copied again
+        for index in range(backend.shard_count, old_count):
+            if os.path.exists(backend._shard_name(index)):
+                os.remove(backend._shard_name(index))
+    return task_count
+
+
+def login():
     """
     Log in the user by verifying their credentials.
 
     This function prompts the user for their username and password and verifies these 
-    credentials against the provided dictionary of users. If the credentials are correct, 
+    credentials against the users held by the storage backend. If the credentials are correct, 
     the function prints a success message and returns the username. If the credentials 
     are incorrect, it provides feedback and prompts the user to try again.
 
@@ -63,15 +3645,18 @@ def login(users):
     
     while True:  # Start an infinite loop to repeatedly prompt the user until they log in successfully
         # Prompt the user to enter their username
-        username = input("Enter your username: ")
+        username = read_input("Enter your username: ")
+        
+        # Look up the stored password (None if the username does not exist)
+        stored_password = get_storage_backend().password_for(username)
         
-        # Check if the entered username exists in the users dictionary
-        if username in users:
+        # Check if the entered username exists
+        if stored_password is not None:
             # Prompt the user to enter their password
-            password = input("Enter your password: ")
+            password = read_input("Enter your password: ")
             
             # Verify if the entered password matches the stored password for the username
-            if password == users[username]:
+            if password == stored_password:
                 # Print a success message and return the username if credentials are correct
                 print(f"Login successful! Welcome, {username}.")
                 return username
@@ -83,17 +3668,16 @@ def login(users):
             print("Username not found. Please try again.")
 
 
-def register_user(users):
+@instrumented
+def register_user():
     """
     Register a new user, ensuring no duplicate usernames.
 
     This function prompts the user to enter a new username and password. It checks if 
-    the username already exists in the `users` dictionary. If the username is unique, 
+    the username already exists in the storage backend. If the username is unique, 
     it then prompts the user to confirm the password. If the passwords match, it adds 
-    the new user's credentials to both the `users` dictionary and the USER_FILE.
-
-    Args:
-        users (dict): A dictionary where keys are usernames and values are passwords.
+    the new user's credentials to the storage backend (for flat files, the shared 
+    UserRegistry is updated in place).
 
     Returns:
         None
@@ -101,27 +3685,25 @@ def register_user(users):
     
     while True:  # Start an infinite loop to repeatedly prompt until a successful registration
         # Prompt the user to enter a new username
-        new_username = input("Enter new username: ")
+        new_username = read_input("Enter new username: ")
         
-        # Check if the entered username already exists in the users dictionary
-        if new_username in users:
+        # Check if the entered username already exists
+        if get_storage_backend().password_for(new_username) is not None:
             # Print an error message if the username already exists and prompt again
             print("Username already exists. Please choose another one.")
         else:
             # Prompt the user to enter a new password
-            new_password = input("Enter new password: ")
+            new_password = read_input("Enter new password: ")
             # Prompt the user to confirm the new password
-            confirm_password = input("Confirm password: ")
+            confirm_password = read_input("Confirm password: ")
             
             # Check if the entered passwords match
             if new_password == confirm_password:
-                # Open the USER_FILE in append mode to add the new user
-                with open(USER_FILE, 'a') as file:
-                    # Write the new username and password to the file
-                    file.write(f"{new_username}, {new_password}\n")
-                
-                # Add the new user's credentials to the users dictionary
-                users[new_username] = new_password
+                # Store the new user in the configured storage backend
+                if not get_storage_backend().add_user(new_username, new_password):
+                    # Another session registered the same username in the meantime
+                    print("Username already exists. Please choose another one.")
+                    continue
                 
                 # Print a success message and exit the function
                 print("Registration successful!")
@@ -131,95 +3713,641 @@ def register_user(users):
                 print("Passwords do not match. Please try again.")
 
 
+@instrumented
 def add_task():
     """
-    Add a new task to TASK_FILE.
+    Add a new task to the configured storage backend.
 
     This function prompts the user to enter details for a new task, including the username 
     of the person the task is assigned to, the title, description, and due date. It validates 
-    the username and the date format before saving the task details to TASK_FILE.
+    the username and the date format before saving the task details.
 
     Returns:
         None
     """
     
-    # Read existing users from USER_FILE to validate the assigned username
-    users = read_users()
+    # The storage backend validates the assigned username (a cached lookup, not a file read)
+    backend = get_storage_backend()
     
     # Loop to ensure a valid username is entered
     while True:
-        username = input("Enter username of the person the task is assigned to: ")
-        if username in users:
+        username = read_input("Enter username of the person the task is assigned to: ")
+        if backend.password_for(username) is not None:
             break  # Exit loop if the username is found
         else:
             print("Username not found. Please enter a valid username.")
     
     # Prompt for task details
-    title = input("Enter the title of the task: ")
-    description = input("Enter the description of the task: ")
+    title = read_input("Enter the title of the task: ")
+    description = read_input("Enter the description of the task: ")
     
     # Loop to ensure the due date is in the correct format
     while True:
-        due_date = input("Enter the due date of the task (YYYY-MM-DD): ")
+        due_date = read_input("Enter the due date of the task (YYYY-MM-DD): ")
+        try:
+            # Validate the date format
+            datetime.strptime(due_date, "%Y-%m-%d")
+            break  # Exit loop if date format is correct
+        except ValueError:
+            # Print an error message if the date format is incorrect
+            print("Invalid date format. Please enter the date in YYYY-MM-DD format.")
+    
+    # Get the current date for the assigned date
+    assigned_date = datetime.today().strftime("%Y-%m-%d")
+    # Set the initial completion status to 'No'
+    completion_status = 'No'
+    
+    # Store the new task in the configured storage backend
+    backend.add_task(username, title, description, assigned_date, due_date, completion_status)
+    
+    # Print a success message after the task is added
+    print("Task added successfully!")
+
+
+def read_import_rows(file_name, file_format):
+    """
+    Yield (line number, row dictionary) for every row of a CSV or JSONL import file.
+
+    CSV files need a header row naming the columns. In JSONL files each line is
+    one JSON object; a line that is not valid JSON is yielded as None.
+    """
+    with open(file_name, 'r', newline='' if file_format == 'csv' else None) as file:
+        if file_format == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_number, row if isinstance(row, dict) else None
+
+
+def validate_import_row(row, users, today):
+    """
+    Check one imported row and turn it into task details.
+
+    Returns:
+        tuple: (task details tuple, None, None) for a valid row, or
+        (None, reason, offending value) for a rejected one.
+    """
+    if row is None:
+        return None, "not a valid record", ''
+
+    values = {}
+    for field in ('username', 'title', 'description', 'due_date', 'assigned_date', 'completed'):
+        value = row.get(field)
+        values[field] = '' if value is None else str(value).strip()
+    values['assigned_date'] = values['assigned_date'] or today
+    values['completed'] = values['completed'].capitalize() or 'No'
+    
+    for field in ('username', 'title', 'description', 'due_date'):
+        if not values[field]:
+            return None, f"missing {field}", ''
+    if values['username'] not in users:
+        return None, "unknown user", values['username']
+    for field in ('assigned_date', 'due_date'):
+        try:
+            date_ordinal(values[field])  # Each distinct date is only parsed once
+        except ValueError:
+            return None, f"invalid {field}", values[field]
+    if values['completed'] not in ('Yes', 'No'):
+        return None, "invalid completed value", values['completed']
+    return (values['username'], values['title'], values['description'],
+            values['assigned_date'], values['due_date'], values['completed']), None, None
+
+
+@instrumented
+def import_tasks(file_name, file_format=None, rejects_file=None):
+    """
+    Add every valid task in a CSV or JSONL file without any prompts.
+
+    Each row needs username, title, description and due_date (YYYY-MM-DD), and
+    may give assigned_date (default today) and completed (Yes/No, default No).
+    Rows naming an unknown user or an invalid date are rejected with their line
+    number. Accepted rows are streamed to the storage backend in one go (for flat
+    files, one buffered append and a single fsync). A summary with the throughput
+    and the rejection reasons is printed at the end.
+
+    Parameters:
+    file_name (str): The CSV or JSONL file to import.
+    file_format (str): 'csv' or 'jsonl'; guessed from the file extension if None.
+    rejects_file (str): Optional file to list every rejected row in.
+
+    Returns:
+        tuple: (number of tasks added, list of (line number, reason, value) for rejected rows)
+    """
+    if file_format is None:
+        file_format = 'jsonl' if file_name.lower().endswith(('.jsonl', '.json')) else 'csv'
+    start_time = time.perf_counter()
+    backend = get_storage_backend()
+    users = backend.read_users()
+    today = datetime.today().strftime("%Y-%m-%d")
+    rejected = []
+    
+    def accepted_tasks():
+        for line_number, row in read_import_rows(file_name, file_format):
+            task, reason, value = validate_import_row(row, users, today)
+            if task is None:
+                rejected.append((line_number, reason, value))
+            else:
+                yield task
+    
+    added = backend.add_tasks(accepted_tasks())
+    elapsed = time.perf_counter() - start_time
+    
+    # Print the throughput and a summary of why rows were rejected
+    rows = added + len(rejected)
+    print(f"Read {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s).")
+    print(f"Added {added} tasks, rejected {len(rejected)} rows.")
+    if rejected:
+        reasons = defaultdict(int)
+        for _, reason, _ in rejected:
+            reasons[reason] += 1
+        for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+            print(f"  {count} x {reason}")
+        for line_number, reason, value in rejected[:IMPORT_REJECTS_SHOWN]:
+            print(f"  line {line_number}: {reason} {value!r}")
+        if len(rejected) > IMPORT_REJECTS_SHOWN:
+            print(f"  ... and {len(rejected) - IMPORT_REJECTS_SHOWN} more")
+        if rejects_file:
+            with open(rejects_file, 'w') as file:
+                for line_number, reason, value in rejected:
+                    file.write(f"{line_number}: {reason} {value!r}\n")
+            print(f"All rejected rows were written to {rejects_file}.")
+    return added, rejected
+
+
+@instrumented
+def view_all_tasks():
+    """
+    Display all tasks in TASK_FILE, one page at a time.
+
+    Tasks are streamed from the storage backend (for flat files, from TASK_FILE with 
+    journaled edits applied) and only the 
+    rows of the requested page are kept, so the first page appears straight away 
+    however large the file is. Column widths are worked out once from a bounded 
+    sample of rows and capped, so every page lines up without reading the rest. 
+    The user can move between pages, jump to a page, and filter by assignee or 
+    completion status.
+
+    Returns:
+        None
+    """
+    
+    # Define headers for the table to describe each column of the task details
+    headers = ["Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Completed"]
+    
+    page = 1  # The page currently shown
+    username = None  # Only show tasks assigned to this user (None for everyone)
+    completed = None  # Only show tasks with this completion status (None for all)
+    widths = task_column_widths(headers, username, completed)
+    
+    while True:
+        # Read just the rows of the current page
+        rows, has_more = read_task_page(page, PAGE_SIZE, username, completed)
+        
+        # Print a header for the output, mentioning any active filters
+        filters = [f"assigned to {username}" if username else "", f"completed: {completed}" if completed else ""]
+        filter_text = ", ".join(text for text in filters if text)
+        print(f"\nAll Tasks (page {page}{', ' + filter_text if filter_text else ''}):")
+        if rows:
+            with instrument_phase('render'):
+                table = render_task_table([task.to_fields() for task in rows], headers, widths)
+            print(table)
+        else:
+            print("No tasks on this page.")
+        
+        choice = read_input("n - next page, p - previous page, g - go to page, f - filter, q - return to menu: ").lower()
+        if choice == 'n':
+            if has_more:
+                page += 1
+            else:
+                print("This is the last page.")
+        elif choice == 'p':
+            if page > 1:
+                page -= 1
+            else:
+                print("This is the first page.")
+        elif choice == 'g':
+            try:
+                page = max(1, int(read_input("Enter the page number: ")))
+            except ValueError:
+                print("Please enter a valid number.")
+        elif choice == 'f':
+            # Ask for the new filters; a blank answer removes that filter
+            username = read_input("Filter by assignee (leave blank for all): ").strip() or None
+            completed = read_input("Filter by completed (Yes/No, leave blank for all): ").strip().capitalize() or None
+            page = 1
+            widths = task_column_widths(headers, username, completed)
+        elif choice == 'q':
+            return
+        else:
+            print("Invalid option. Please try again.")
+
+
+def iter_tasks_from_file(username=None, completed=None):
+    """
+    Stream tasks from TASK_FILE one at a time, with journaled edits applied.
+
+    Parameters:
+    username (str): Only yield tasks assigned to this user (None for everyone).
+    completed (str): Only yield tasks with this completion status (None for all).
+
+    Yields:
+        Task: Each matching task, in file order.
+    """
+    ensure_file_exists(TASK_FILE)
+    overrides = read_journal_overrides()
+    task_id = 0
+    characters = 0
+    try:
+        with open(TASK_FILE, 'r') as file:
+            for line in file:
+                characters += len(line)
+                if not line.strip():
+                    continue  # Skip blank lines, as the TaskStore does
+                if not line.endswith('\n') and not is_whole_task_line(line):
+                    break  # An append still being written, or cut off by a crash
+                fields = parse_task_line(line, TASK_FILE)
+                if fields is None:
+                    continue  # So does the TaskStore, without giving the line a task id
+                task = Task(task_id, *fields)
+                task_id += 1
+                for field, value in overrides.get(task.task_id, {}).items():
+                    setattr(task, field, value)
+                if username is not None and task.username != username:
+                    continue
+                if completed is not None and task.completed != completed:
+                    continue
+                yield task
+    finally:
+        # The stream may be abandoned part way (by a page read), so count what was actually read
+        record_io(task_id, characters)
+
+
+def read_task_page(page, page_size, username=None, completed=None):
+    """
+    Return the tasks on one page without keeping the tasks of any other page.
+
+    Returns:
+        tuple: (list of the page's tasks, True if there is a later page)
+    """
+    start = (page - 1) * page_size
+    rows = list(itertools.islice(get_storage_backend().iter_tasks(username, completed), start, start + page_size + 1))
+    return rows[:page_size], len(rows) > page_size
+
+
+def task_column_widths(headers, username=None, completed=None):
+    """Work out column widths from the first WIDTH_SAMPLE_ROWS matching tasks, capped at COLUMN_WIDTH_CAP."""
+    widths = [len(header) for header in headers]
+    for task in itertools.islice(get_storage_backend().iter_tasks(username, completed), WIDTH_SAMPLE_ROWS):
+        for column, value in enumerate(task.to_fields()):
+            widths[column] = max(widths[column], len(value))
+    return [min(width, COLUMN_WIDTH_CAP) for width in widths]
+
+
+def render_task_table(rows, headers, widths):
+    """
+    Format rows as a table in the same style as tabulate's "pretty" format,
+    using fixed column widths. Values that are too wide are cut short with "...".
+    """
+    def fit(value, width):
+        value = str(value)
+        if len(value) > width:
+            value = value[:max(width - 3, 0)] + "..."
+        return value.center(width)
+    
+    border = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    lines = [border, "| " + " | ".join(fit(header, width) for header, width in zip(headers, widths)) + " |", border]
+    for row in rows:
+        lines.append("| " + " | ".join(fit(value, width) for value, width in zip(row, widths)) + " |")
+    lines.append(border)
+    return "\n".join(lines)
+
+
+@instrumented
+def view_due_tasks():
+    """
+    Display the incomplete tasks that are overdue, due within a number of days, or due in a date range.
+
+    The tasks come from the storage backend's due-date index one page at a
+    time, in due-date order, so only the tasks on the page are ever looked at.
+    As in the reports, a task counts as overdue from its due date onwards.
+    The tasks can be limited to one assignee.
+
+    Returns:
+        None
+    """
+    today = datetime.today().toordinal()
+    
+    # Ask which tasks to show and turn the answer into a range of due days
+    print("\no - Overdue tasks")
+    print("d - Tasks due within a number of days (0 for today, 7 for this week)")
+    print("r - Tasks due in a date range")
+    choice = read_input("Enter your choice: ").lower()
+    if choice == 'o':
+        first_day, last_day, title = None, today, "Overdue tasks"
+    elif choice == 'd':
+        try:
+            days = int(read_input("Enter the number of days: "))
+        except ValueError:
+            print("Please enter a valid number.")
+            return
+        if days < 0:
+            print("The number of days cannot be negative.")
+            return
+        first_day, last_day, title = today, today + days, f"Tasks due within {days} days"
+    elif choice == 'r':
+        try:
+            first_date = read_input("Enter the first due date (YYYY-MM-DD): ")
+            last_date = read_input("Enter the last due date (YYYY-MM-DD): ")
+            first_day, last_day = date_ordinal(first_date), date_ordinal(last_date)
+        except ValueError:
+            print("Invalid date format. Please enter the date in YYYY-MM-DD format.")
+            return
+        title = f"Tasks due from {first_date} to {last_date}"
+    else:
+        print("Invalid option.")
+        return
+    username = read_input("Filter by assignee (leave blank for all): ").strip() or None
+    if username:
+        title += f" assigned to {username}"
+    
+    backend = get_storage_backend()
+    show_task_pages(
+        title, ["Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Days Left"],
+        lambda offset: backend.page_tasks_due(offset, PAGE_SIZE, first_day, last_day, username),
+        lambda task: task.to_fields()[:5] + [date_ordinal(task.due_date) - today])
+
+
+@instrumented
+def search_tasks():
+    """
+    Search the titles and descriptions of all tasks and display the matching tasks.
+
+    Every word searched for must appear in a task's title or description; a
+    word ending in * matches any word that starts with it. The search runs
+    against the storage backend's search index, so only the tasks on the page
+    shown are looked at. The results can be limited to one assignee and/or
+    completion status.
+
+    Returns:
+        None
+    """
+    query = read_input("Enter the words to search for (end a word with * to match its start): ")
+    username = read_input("Filter by assignee (leave blank for all): ").strip() or None
+    completed = read_input("Filter by completed (Yes/No, leave blank for all): ").strip().capitalize() or None
+    
+    if not SearchIndex.words(query):
+        print("Enter at least one word to search for.")
+        return
+    
+    backend = get_storage_backend()
+    show_task_pages(
+        f"Tasks matching '{query}'", ["Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Completed"],
+        lambda offset: backend.search_tasks(query, offset, PAGE_SIZE, username, completed),
+        Task.to_fields)
+
+
+def show_task_pages(title, headers, fetch_page, to_row):
+    """
+    Display tasks PAGE_SIZE at a time, letting the user move between pages.
+
+    Parameters:
+    title (str): Shown above each page.
+    headers (list): The table headers.
+    fetch_page (function): Called with the offset of a page; returns (the page's tasks, the total number of tasks).
+    to_row (function): Turns a task into its table row.
+    """
+    page = 1
+    while True:
+        # Fetch just the tasks of the current page
+        tasks, total = fetch_page((page - 1) * PAGE_SIZE)
+        page_count = max(1, -(-total // PAGE_SIZE))
+        print(f"\n{title} (page {page} of {page_count}, {total} tasks):")
+        if tasks:
+            with instrument_phase('render'):
+                table = tabulate([to_row(task) for task in tasks], headers=headers, tablefmt="pretty")
+            print(table)
+        else:
+            print("No tasks on this page.")
+        
+        choice = read_input("n - next page, p - previous page, q - return to menu: ").lower()
+        if choice == 'n':
+            if page < page_count:
+                page += 1
+            else:
+                print("This is the last page.")
+        elif choice == 'p':
+            if page > 1:
+                page -= 1
+            else:
+                print("This is the first page.")
+        elif choice == 'q':
+            return
+        else:
+            print("Invalid option. Please try again.")
+
+
+def iter_archived_tasks(query='', username=None):
+    """
+    Stream the archived tasks, optionally only those containing every word of a search.
+
+    Parameters:
+    query (str): Words to search for, as in search_tasks() (blank for every task).
+    username (str): Only yield tasks assigned to this user (None for everyone).
+
+    Raises:
+        ValueError: If the query is not blank but has no words in it.
+    """
+    terms = SearchIndex.terms(query) if query.strip() else None
+    tasks = get_task_archive().iter_tasks(username)
+    if terms is None:
+        return tasks
+    return (task for task in tasks if SearchIndex.matches(terms, task))
+
+
+@instrumented
+def view_archived_tasks():
+    """
+    Display archived tasks PAGE_SIZE at a time, optionally for one assignee and/or matching some words.
+
+    The archive is compressed and has no indexes, so the tasks are read from
+    its segments as the pages are shown and the pages can only be moved
+    through forwards.
+
+    Returns:
+        None
+    """
+    username = read_input("Filter by assignee (leave blank for all): ").strip() or None
+    query = read_input("Words to search for (end a word with * to match its start, leave blank for all): ")
+    try:
+        tasks = iter_archived_tasks(query, username)
+    except ValueError as error:
+        print(error)
+        return
+    
+    headers = ["Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Completed"]
+    page = 1
+    while True:
+        page_tasks = list(itertools.islice(tasks, PAGE_SIZE))
+        if not page_tasks:
+            print("\nNo more archived tasks." if page > 1 else "\nNo archived tasks found.")
+            return
+        print(f"\nArchived tasks (page {page}):")
+        with instrument_phase('render'):
+            table = tabulate([task.to_fields() for task in page_tasks], headers=headers, tablefmt="pretty")
+        print(table)
+        if len(page_tasks) < PAGE_SIZE or read_input("n - next page, q - return to menu: ").lower() != 'n':
+            return
+        page += 1
+
+
+@instrumented
+def archive_tasks(before=None):
+    """
+    Move completed tasks due before a date out of the task file and into a compressed archive segment.
+
+    Parameters:
+    before (str): The YYYY-MM-DD date (ARCHIVE_AFTER_DAYS days ago by default).
+
+    Returns:
+        None
+    """
+    if before is None:
+        before_day = datetime.today().toordinal() - ARCHIVE_AFTER_DAYS
+    else:
+        try:
+            before_day = date_ordinal(before)
+        except ValueError:
+            print("Invalid date format. Please enter the date in YYYY-MM-DD format.")
+            return
+    try:
+        count = get_storage_backend().archive_tasks(before_day)
+    except NotImplementedError:
+        print("Archiving is only supported with the flat-file backend.")
+        return
+    before = datetime.fromordinal(before_day).strftime("%Y-%m-%d")
+    if count:
+        print(f"Archived {count} completed tasks due before {before}.")
+    else:
+        print(f"No completed tasks due before {before} to archive.")
+
+
+def make_task_filter(username=None, due_from=None, due_to=None, title=None, completed=None):
+    """
+    Build a TaskFilter from text typed in the menu or given on the command line.
+
+    Blank values match any task.
+
+    Parameters:
+    username (str): The assignee.
+    due_from (str): The earliest due date, as YYYY-MM-DD.
+    due_to (str): The latest due date, as YYYY-MM-DD.
+    title (str): Text the title has to contain, ignoring case.
+    completed (str): 'Yes' or 'No'.
+
+    Returns:
+        TaskFilter: The filter.
+
+    Raises:
+        ValueError: If a date or the completion status is not valid.
+    """
+    try:
+        first_day = date_ordinal(due_from.strip()) if due_from and due_from.strip() else None
+        last_day = date_ordinal(due_to.strip()) if due_to and due_to.strip() else None
+    except ValueError:
+        raise ValueError("Invalid date format. Please enter the date in YYYY-MM-DD format.")
+    if completed and completed.strip():
+        completed = completed.strip().capitalize()
+        if completed not in ('Yes', 'No'):
+            raise ValueError("The completion status must be Yes or No.")
+    else:
+        completed = None
+    return TaskFilter((username or '').strip() or None, first_day, last_day, title or None, completed)
+
+
+def check_bulk_changes(backend, changes):
+    """
+    Check the changes a bulk update would make, as "Edit task" checks a single edit.
+
+    Parameters:
+    backend (StorageBackend): The storage backend the users are kept in.
+    changes (dict): The new 'username', 'due_date' and/or 'completed' values.
+
+    Returns:
+        str: A message saying what is wrong, or None if the changes can be made.
+    """
+    if 'username' in changes and backend.password_for(changes['username']) is None:
+        return f"User {changes['username']} does not exist."
+    if 'due_date' in changes:
         try:
-            # Validate the date format
-            datetime.strptime(due_date, "%Y-%m-%d")
-            break  # Exit loop if date format is correct
+            if datetime.strptime(changes['due_date'], "%Y-%m-%d") < datetime.now():
+                return "Due date cannot be in the past."
         except ValueError:
-            # Print an error message if the date format is incorrect
-            print("Invalid date format. Please enter the date in YYYY-MM-DD format.")
-    
-    # Get the current date for the assigned date
-    assigned_date = datetime.today().strftime("%Y-%m-%d")
-    # Set the initial completion status to 'No'
-    completion_status = 'No'
-    
-    # Append the new task details to TASK_FILE
-    with open(TASK_FILE, 'a') as file:
-        file.write(f"{username}, {title}, {description}, {assigned_date}, {due_date}, {completion_status}\n")
-    
-    # Print a success message after the task is added
-    print("Task added successfully!")
+            return "Invalid date format. Please enter the date in YYYY-MM-DD format."
+    return None
 
 
-def view_all_tasks():
+@instrumented
+def bulk_update_tasks():
     """
-    Display all tasks in TASK_FILE.
+    Reassign, mark as complete or move the due date of every task matching a filter (admin only).
 
-    This function reads tasks from TASK_FILE and displays them in a tabular format. 
-    It ensures that the file exists, reads the tasks from the file, and formats 
-    them for a user-friendly display.
+    The matching tasks are counted and the change has to be confirmed. They are
+    then all changed by one atomic write of the storage backend.
 
     Returns:
         None
     """
+    print("Select the tasks to change (leave a field blank to match any task).")
+    try:
+        task_filter = make_task_filter(read_input("Assigned to: "),
+                                       read_input("Due on or after (YYYY-MM-DD): "),
+                                       read_input("Due on or before (YYYY-MM-DD): "),
+                                       read_input("Title contains: "),
+                                       read_input("Completed (Yes/No): "))
+    except ValueError as error:
+        print(error)
+        return
     
-    # Ensure that the TASK_FILE exists; if it doesn't, create an empty file
-    ensure_file_exists(TASK_FILE)
-    
-    # Initialize an empty list to store all tasks read from the file
-    tasks = []
-    
-    # Open TASK_FILE in read mode
-    with open(TASK_FILE, 'r') as file:
-        # Read each line from the file
-        for line in file:
-            # Remove leading/trailing whitespace and split the line into task details
-            task_details = line.strip().split(', ')
-            # Append the task details to the tasks list
-            tasks.append(task_details)
-    
-    # Define headers for the table to describe each column of the task details
-    headers = ["Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Completed"]
+    print("\n1 - Reassign to another user")
+    print("2 - Mark as complete")
+    print("3 - Change due date")
+    action = read_input("Enter the action number: ").strip()
+    if action == '1':
+        changes = {'username': read_input("Enter new username: ").strip()}
+    elif action == '2':
+        changes = {'completed': 'Yes'}
+    elif action == '3':
+        changes = {'due_date': read_input("Enter new due date (YYYY-MM-DD): ").strip()}
+    else:
+        print("Invalid action number.")
+        return
     
-    # Print a header for the output
-    print("\nAll Tasks:")
-    # Use tabulate to display the tasks in a formatted table with headers
-    print(tabulate(tasks, headers=headers, tablefmt="pretty"))
+    backend = get_storage_backend()
+    error = check_bulk_changes(backend, changes)
+    if error:
+        print(f"{error} No tasks changed.")
+        return
+    count = backend.count_matching(task_filter)
+    if count == 0:
+        print("No tasks match.")
+        return
+    if read_input(f"Change {count} tasks? (y/n): ").strip().lower() != 'y':
+        print("No tasks changed.")
+        return
+    print(f"{backend.bulk_update(task_filter, **changes)} tasks updated.")
 
 
 
 
+@instrumented
 def view_my_tasks(username):
     """
     Display tasks assigned to the logged-in user and allow them to mark tasks as complete 
@@ -228,25 +4356,12 @@ def view_my_tasks(username):
     Parameters:
     username (str): The username of the logged-in user.
     """
-    # Ensure the task file exists before trying to read from it
-    ensure_file_exists(TASK_FILE)
-    
-    all_tasks = []   # List to store all tasks from the file
-    user_tasks = []  # List to store only the tasks assigned to the logged-in user
-    
     try:
-        # Open the task file in read mode
-        with open(TASK_FILE, 'r') as file:
-            for line in file:
-                # Split each line into task details and remove any extra spaces
-                task_details = line.strip().split(', ')
-                
-                # Add the task to the list of all tasks
-                all_tasks.append(task_details)
-                
-                # If the task is assigned to the logged-in user, add it to user_tasks
-                if task_details[0] == username:
-                    user_tasks.append(task_details)
+        # Look up the user's tasks through the storage backend (an index lookup, not a full scan),
+        # noting first which generation of task ids they are from
+        backend = get_storage_backend()
+        generation = backend.generation()
+        user_tasks = backend.tasks_for(username)
     except FileNotFoundError:
         # This block runs if the task file is not found
         print("Tasks file not found. Please ensure that tasks are available.")
@@ -261,17 +4376,22 @@ def view_my_tasks(username):
         # Define table headers for displaying tasks
         headers = ["No.", "Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Completed"]
         
+        # Remember each task as it is shown, so edits can be refused if someone else changes it meanwhile
+        shown_tasks = [task.to_fields() for task in user_tasks]
+        
         # Create a numbered list of tasks for the user
-        numbered_tasks = [[i + 1] + task for i, task in enumerate(user_tasks)]
+        numbered_tasks = [[i + 1] + fields for i, fields in enumerate(shown_tasks)]
         
         # Display the tasks in a table format using the tabulate module
         print(f"\nTasks assigned to {username}:")
-        print(tabulate(numbered_tasks, headers=headers, tablefmt="pretty"))
+        with instrument_phase('render'):
+            table = tabulate(numbered_tasks, headers=headers, tablefmt="pretty")
+        print(table)
         
         while True:
             try:
                 # Prompt the user to select a task by number, or return to the main menu
-                task_no = int(input("Enter the task number to select a task, or -1 to return to the main menu: "))
+                task_no = int(read_input("Enter the task number to select a task, or -1 to return to the main menu: "))
                 
                 if task_no == -1:
                     # If the user enters -1, exit the loop and return to the main menu
@@ -283,20 +4403,24 @@ def view_my_tasks(username):
                     # Display options to either mark the task as complete or edit it
                     print("\n1 - Mark as complete")
                     print("2 - Edit task")
-                    action = int(input("Enter the action number: "))
+                    action = int(read_input("Enter the action number: "))
                     
                     if action == 1:
                         # Mark the selected task as complete by setting the "Completed" field to 'Yes'
-                        selected_task[5] = 'Yes'
-                        
-                        # Update the task file with the modified task list
-                        update_task_in_file(all_tasks)
-                        print("Task marked as complete.")
+                        # (a single small journal append or row update, never a full rewrite)
+                        updated_task = mark_task_complete(backend, selected_task, shown_tasks[task_no - 1],
+                                                          username, generation)
+                        if updated_task is None:
+                            print("This task has been reassigned or archived by someone else. Task not updated.")
+                        else:
+                            user_tasks[task_no - 1] = updated_task
+                            shown_tasks[task_no - 1] = updated_task.to_fields()
+                            print("Task marked as complete.")
                     
                     elif action == 2:
                         # Prompt the user for a new username and due date
-                        new_username = input(f"Enter new username (current: {selected_task[0]}): ")
-                        new_due_date = input(f"Enter new due date (YYYY-MM-DD) (current: {selected_task[4]}): ")
+                        new_username = read_input(f"Enter new username (current: {selected_task.username}): ")
+                        new_due_date = read_input(f"Enter new due date (YYYY-MM-DD) (current: {selected_task.due_date}): ")
                         
                         # Validate the date format and ensure the due date is not in the past
                         try:
@@ -305,15 +4429,26 @@ def view_my_tasks(username):
                                 print("Due date cannot be in the past. Task not updated.")
                                 continue  # Skip the rest of the loop and prompt the user again
                             
-                            # Find and update the selected task in the all_tasks list
-                            for task in all_tasks:
-                                if task == selected_task:
-                                    task[0] = new_username  # Update the username
-                                    task[4] = new_due_date  # Update the due date
-                                    break
-                            
-                            # Write the updated task list back to the file
-                            update_task_in_file(all_tasks)
+                            # Update the username and due date of the selected task, unless someone
+                            # else changed it since it was shown
+                            try:
+                                updated_task = backend.update_task(selected_task, shown_tasks[task_no - 1],
+                                                                   username=new_username, due_date=new_due_date)
+                            except StaleTaskError as error:
+                                print("This task was changed by someone else since it was shown. Task not updated.")
+                                current_task = current_version(backend, error, shown_tasks[task_no - 1], generation)
+                                if current_task is None:
+                                    # The ids shown may now belong to other tasks, so the list has to be read again
+                                    print("The task file has been reorganized since your tasks were shown "
+                                          "(for example, old tasks were archived). Please open 'View my tasks' again.")
+                                    return
+                                # Show the current details so the edit can be retried
+                                user_tasks[task_no - 1] = current_task
+                                shown_tasks[task_no - 1] = current_task.to_fields()
+                                print(tabulate([[task_no] + shown_tasks[task_no - 1]], headers=headers, tablefmt="pretty"))
+                                continue
+                            user_tasks[task_no - 1] = updated_task
+                            shown_tasks[task_no - 1] = updated_task.to_fields()
                             print("Task updated successfully.")
                         except ValueError:
                             # Handle invalid date format input
@@ -332,19 +4467,110 @@ def view_my_tasks(username):
         # If there are no tasks assigned to the user, inform them
         print("No tasks assigned to you.")
 
+def mark_task_complete(backend, task, expected, username, generation):
+    """
+    Mark a task as complete, retrying on the current version if another session changed it.
+
+    Marking a task complete is safe to repeat on the latest version of the task,
+    as long as it is still the same task (see current_version()) and still
+    assigned to the same user.
+
+    Parameters:
+    backend (StorageBackend): The storage backend to update.
+    task (Task): The task to mark.
+    expected (list): The task's fields as they were shown to the user.
+    username (str): The user the task must still be assigned to.
+    generation (int): backend.generation() from before the task was read.
+
+    Returns:
+        Task: The updated task, or None if it is no longer assigned to username or cannot be found by its id.
+    """
+    shown = expected
+    for _ in range(STALE_RETRIES):
+        try:
+            return backend.update_task(task, expected, completed='Yes')
+        except StaleTaskError as error:
+            task = current_version(backend, error, shown, generation)
+            if task is None or task.username != username:
+                return None
+            expected = task.to_fields()
+    return None
+
+
+def current_version(backend, error, shown, generation):
+    """
+    Return the task an edit was refused for, as it is now, if it is still the task that was shown.
+
+    The task now stored under the shown task's id is only taken to be the same
+    task if the ids are still of the same generation (archiving gives tasks
+    new ids) and it has the same title, description and assigned date, which
+    no edit changes.
+
+    Parameters:
+    backend (StorageBackend): The storage backend the edit was made through.
+    error (StaleTaskError): The error the edit was refused with.
+    shown (list): The task's fields as they were shown to the user.
+    generation (int): backend.generation() from before the task was read.
+
+    Returns:
+        Task: The current version of the task, or None if it can no longer be found by its id.
+    """
+    task = error.task
+    if task is None or backend.generation() != generation:
+        return None
+    if task.to_fields()[1:4] != list(shown[1:4]):
+        return None
+    return task
+
+
+def write_tasks_atomically(file_name, tasks):
+    """
+    Write tasks to file_name through a temporary file and an atomic rename.
+
+    Parameters:
+    file_name (str): The file to replace.
+    tasks (list): A list of tasks, either Task records or lists of task details.
+    """
+    temp_file = file_name + '.tmp'
+    write_tasks_file(temp_file, tasks)
+    os.replace(temp_file, file_name)
+
+
+def write_tasks_file(file_name, tasks):
+    """
+    Write tasks to a new file_name and make sure they are on disk.
+
+    Parameters:
+    file_name (str): The file to create or overwrite.
+    tasks (list): A list of tasks, either Task records or lists of task details.
+    """
+    with instrument_phase('write'), open(file_name, 'w') as file:
+        for task in tasks:
+            if isinstance(task, Task):
+                task = task.to_fields()
+            # Write each task as one line of comma-separated fields, quoting any that need it
+            file.write(encode_task_line(task))
+        # Make sure the data is on disk before a rename makes it visible
+        file.flush()
+        os.fsync(file.fileno())
+        record_io(bytes_written=file.tell())
+
+
+@instrumented
 def update_task_in_file(tasks):
     """
-    Write the updated list of tasks back to the task file.
+    Write the updated list of tasks back to the storage backend, replacing all tasks.
+    
+    For flat files the tasks are written to a temporary file first, which then 
+    replaces the task file in one atomic rename, so a crash never leaves a 
+    truncated file behind. For SQLite the tasks are replaced in one transaction.
     
     Parameters:
-    tasks (list): A list of tasks where each task is a list of its details.
+    tasks (list): A list of tasks, either Task records or lists of task details.
     """
     try:
-        # Open the task file in write mode to overwrite the existing content
-        with open(TASK_FILE, 'w') as file:
-            for task in tasks:
-                # Write each task as a comma-separated string followed by a newline
-                file.write(', '.join(task) + '\n')
+        # Replace every stored task with the given list
+        get_storage_backend().replace_tasks(tasks)
     except Exception as e:
         # Handle any errors that occur during file writing
         print(f"An error occurred while updating the tasks: {e}")
@@ -353,12 +4579,29 @@ def update_task_in_file(tasks):
 
 
 
+@instrumented
 def display_statistics():
     """
-    Read and display statistics from the 'task_overview.txt' and 'user_overview.txt' report files.
+    Read and display the statistics of the last generated reports.
     The statistics are displayed in a clear tabular format for easy readability.
+
+    The counts are loaded from REPORT_DATA_FILE, which generate_reports saves
+    next to the text reports. Reports generated before it existed are read
+    back from 'task_overview.txt' and 'user_overview.txt' instead.
+
+    With ANALYTICS_SNAPSHOT set, the statistics are computed directly from the 
+    storage backend (the columnar snapshot for flat files) instead.
     """
 
+    if ANALYTICS_SNAPSHOT:
+        display_live_statistics()
+        return
+
+    report = load_report_data()
+    if report is not None:
+        show_report(report['totals'], {entry['user']: entry for entry in report['users']})
+        return
+
     # Ensure that both report files exist before proceeding
     ensure_file_exists('task_overview.txt')
     ensure_file_exists('user_overview.txt')
@@ -366,7 +4609,9 @@ def display_statistics():
     # Display the content of 'task_overview.txt'
     print("\nTask Overview:")
     with open('task_overview.txt', 'r') as file:
-        print(file.read())  # Simply read and print the entire file content
+        task_overview_content = file.read()
+    record_io(bytes_read=len(task_overview_content))
+    print(task_overview_content)  # Simply print the entire file content
 
     # Initialize a list to store user statistics and a dictionary for the current user's stats
     print("\nUser Overview:")
@@ -376,6 +4621,7 @@ def display_statistics():
     # Read and process the content of 'user_overview.txt'
     with open('user_overview.txt', 'r') as file:
         for line in file:
+            record_io(bytes_read=len(line))
             line = line.strip()  # Remove any leading/trailing whitespace from the line
             if line.startswith("User:"):
                 # If we've started a new user section, save the previous user's stats (if any)
@@ -396,6 +4642,47 @@ def display_statistics():
             # Add the last user's stats to the list
             user_stats.append(current_user_stats)
     
+    # Display the user statistics in a table format
+    print_user_statistics(user_stats)
+
+
+def display_live_statistics():
+    """Compute the report statistics from the storage backend and display them like display_statistics."""
+    show_report(*report_counts(get_storage_backend().report_statistics()))
+
+
+def show_report(totals, user_task_counts):
+    """
+    Display report counts like display_statistics.
+
+    Parameters:
+    totals (dict): The 'total', 'completed', 'incomplete' and 'overdue' task counts.
+    user_task_counts (dict): username -> the same counts for that user's tasks, in report order.
+    """
+    task_overview_content, _ = format_reports(totals, user_task_counts)
+    
+    print("\nTask Overview:")
+    print(task_overview_content)
+    
+    print("\nUser Overview:")
+    user_stats = [{
+        "User": user,
+        "Total tasks": counts['total'],
+        "Task percentage": f"{counts['total'] / totals['total'] * 100:.2f}%",
+        "Completed tasks": counts['completed'],
+        "Incomplete tasks": counts['incomplete'],
+        "Overdue tasks": counts['overdue'],
+    } for user, counts in user_task_counts.items()]
+    print_user_statistics(user_stats)
+
+
+def print_user_statistics(user_stats):
+    """
+    Display per-user statistics as a table.
+
+    Parameters:
+    user_stats (list): One dictionary per user, keyed by the labels used in 'user_overview.txt'.
+    """
     # Prepare table headers and data for displaying user statistics
     headers = ["User", "Total tasks", "Task percentage", "Completed tasks", "Incomplete tasks", "Overdue tasks"]
     table_data = [[
@@ -407,55 +4694,170 @@ def display_statistics():
         stat.get("Overdue tasks", "")
     ] for stat in user_stats]
     
-    # Display the user statistics in a table format
-    print(tabulate(table_data, headers=headers, tablefmt="pretty"))
+    with instrument_phase('render'):
+        table = tabulate(table_data, headers=headers, tablefmt="pretty")
+    print(table)
 
 
 
-def generate_reports():
+@instrumented
+def generate_reports(workers=None, force=False):
     """
     Generate reports summarizing the tasks and users' task-related statistics.
-    The reports are saved to 'task_overview.txt' and 'user_overview.txt'.
+    The reports are saved to 'task_overview.txt' and 'user_overview.txt', and
+    their counts to REPORT_DATA_FILE as JSON.
+
+    REPORT_DATA_FILE also records the day the reports were generated for and
+    the size and modification time of the files the counts came from (see
+    report_source()). If none of that has changed, the reports are left as
+    they are. If only modification times changed, the files may just have been
+    touched, so they are hashed and compared with the SHA-256 hash saved then.
+    Files whose size changed are never hashed, as they certainly changed.
+
+    For flat files the counts come from the incrementally maintained
+    TaskStatistics, so no task has to be re-read unless the saved counters are
+    out of date, and a recount of a very large task file can be spread over
+    several processes. For SQLite they come from one aggregate query. Tasks
+    moved to the archive are added from its segment summaries.
+
+    Parameters:
+    workers (int): Worker processes for a recount (REPORT_WORKERS by default, 0 for one per core).
+    force (bool): Generate the reports even if nothing has changed.
+
+    Returns:
+        bool: True if the reports were generated, False if they were already up to date.
     """
 
-    # Initialize counters for task statistics
-    total_tasks = 0
-    completed_tasks = 0
-    incomplete_tasks = 0
-    overdue_tasks = 0
+    # Leave the reports alone if they were generated from the same data on the same day
+    source = report_source()
+    report = load_report_data()
+    file_hash = None  # Only known if the files had to be hashed to tell whether they changed
+    if not force and report is not None and os.path.exists('task_overview.txt') and os.path.exists('user_overview.txt'):
+        if report['source'] == source:
+            return False
+        if report_sizes_match(report, source):
+            # Hashed before counting, so a change made while counting leaves the reports out of date
+            file_hash = hash_report_source(source)
+            if file_hash == report['hash']:
+                # Only modification times moved on: remember them so the files are not hashed next time
+                report['source'] = source
+                save_report_data(report)
+                return False
     
-    # Dictionary to track task statistics per user
-    user_task_counts = defaultdict(lambda: {'total': 0, 'completed': 0, 'incomplete': 0, 'overdue': 0})
+    # Get the report counters, brought forward to today, and add the archived tasks
+    statistics = get_storage_backend().report_statistics(workers)
+    totals, user_task_counts = report_counts(statistics)
     
-    # Get the current date to compare with task due dates
-    today = datetime.today()
+    # Write both report files from the counters, and the counts themselves as JSON
+    write_reports(totals, user_task_counts)
+    save_report_data({
+        'generated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'source': source,
+        'hash': file_hash,  # None unless the files had to be hashed above
+        'totals': totals,
+        'users': [{'user': user, **{key: counts[key] for key in ('total', 'completed', 'incomplete', 'overdue')}}
+                  for user, counts in user_task_counts.items()],
+    })
+    return True
+
+
+def report_source():
+    """
+    Describe the data the reports would be generated from, without reading it.
+
+    Returns:
+        dict: The day the overdue counts are for, the storage backend, and the
+        [size, mtime_ns] of each existing file among its report_source_files()
+        and the archive manifest.
+    """
+    files = {}
+    for file_name in get_storage_backend().report_source_files() + [get_task_archive().manifest_name]:
+        if os.path.exists(file_name):
+            stat = os.stat(file_name)
+            files[file_name] = [stat.st_size, stat.st_mtime_ns]
+    return {
+        'as_of': datetime.today().strftime("%Y-%m-%d"),
+        'backend': STORAGE_BACKEND,
+        'files': files,
+    }
+
+
+def report_sizes_match(report, source):
+    """Return True if source differs from the one report was generated from at most in modification times."""
+    old = report['source']
+    if (old['as_of'], old['backend']) != (source['as_of'], source['backend']):
+        return False
+    return {name: size for name, (size, _) in old['files'].items()} == {name: size for name, (size, _) in source['files'].items()}
+
+
+def hash_report_source(source):
+    """Return the SHA-256 hash of the contents of the files in a report_source(), in order."""
+    digest = hashlib.sha256()
+    for file_name in source['files']:
+        with open(file_name, 'rb') as file:
+            while True:
+                chunk = file.read(1024 * 1024)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                record_io(bytes_read=len(chunk))
+    return digest.hexdigest()
+
+
+def load_report_data():
+    """Return the report data saved in REPORT_DATA_FILE, or None if there is none or it is unreadable."""
+    try:
+        with open(REPORT_DATA_FILE, 'r') as file:
+            report = json.load(file)
+            record_io(bytes_read=file.tell())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(report, dict) or not {'source', 'hash', 'totals', 'users'} <= report.keys():
+        return None
+    return report
+
+
+def save_report_data(report):
+    """Write report data to REPORT_DATA_FILE through an atomic rename."""
+    temp_file = REPORT_DATA_FILE + '.tmp'
+    with instrument_phase('write'), open(temp_file, 'w') as file:
+        json.dump(report, file, indent=1)
+        record_io(bytes_written=file.tell())
+    os.replace(temp_file, REPORT_DATA_FILE)
 
-    # Read the task file and process each task
-    with open(TASK_FILE, 'r') as file:
-        for line in file:
-            total_tasks += 1  # Increment the total task count
-            task_details = line.strip().split(', ')
-            username, _, _, _, due_date_str, completion_status = task_details
-            
-            # Convert the due date string to a datetime object for comparison
-            due_date = datetime.strptime(due_date_str, "%Y-%m-%d")
-            
-            # Update the user's total task count
-            user_task_counts[username]['total'] += 1
-            
-            if completion_status == 'Yes':
-                # If the task is completed, increment the completed tasks count
-                completed_tasks += 1
-                user_task_counts[username]['completed'] += 1
-            else:
-                # If the task is incomplete, increment the incomplete tasks count
-                incomplete_tasks += 1
-                user_task_counts[username]['incomplete'] += 1
-                
-                if due_date < today:
-                    # If the task is overdue, increment the overdue tasks count
-                    overdue_tasks += 1
-                    user_task_counts[username]['overdue'] += 1
+
+def write_reports(totals, user_task_counts):
+    """
+    Write 'task_overview.txt' and 'user_overview.txt' from task counts.
+
+    Parameters:
+    totals (dict): The 'total', 'completed', 'incomplete' and 'overdue' task counts.
+    user_task_counts (dict): username -> the same counts for that user's tasks, in report order.
+    """
+    task_overview_content, user_overview_content = format_reports(totals, user_task_counts)
+    
+    with instrument_phase('write'):
+        # Write the task overview to 'task_overview.txt'
+        with open('task_overview.txt', 'w') as file:
+            file.write(task_overview_content)
+        
+        # Write the user overview to 'user_overview.txt'
+        with open('user_overview.txt', 'w') as file:
+            file.write(user_overview_content)
+    record_io(bytes_written=len(task_overview_content) + len(user_overview_content))
+
+
+def format_reports(totals, user_task_counts):
+    """
+    Format the contents of 'task_overview.txt' and 'user_overview.txt' from task counts.
+
+    Returns:
+        tuple: (task overview text, user overview text)
+    """
+    total_tasks = totals['total']
+    completed_tasks = totals['completed']
+    incomplete_tasks = totals['incomplete']
+    overdue_tasks = totals['overdue']
 
     # Calculate statistics and prepare the content for 'task_overview.txt'
     total_users = len(user_task_counts)
@@ -468,10 +4870,6 @@ def generate_reports():
         f"Overdue tasks percentage: {overdue_tasks / total_tasks * 100:.2f}%\n"
     )
     
-    # Write the task overview to 'task_overview.txt'
-    with open('task_overview.txt', 'w') as file:
-        file.write(task_overview_content)
-    
     # Prepare the content for 'user_overview.txt'
     user_overview_content = (
         f"Total users: {total_users}\n"
@@ -490,41 +4888,675 @@ def generate_reports():
             f"Overdue tasks: {counts['overdue']}\n\n"
         )
     
-    # Write the user overview to 'user_overview.txt'
-    with open('user_overview.txt', 'w') as file:
-        file.write(user_overview_content)
+    return task_overview_content, user_overview_content
 
 
-def main():
-    read_tasks()
-    users = read_users()
-    current_user = login(users)
+@instrumented
+def verify_statistics():
+    """
+    Check the incrementally maintained report counters against a full recount
+    and display any differences.
+    """
+    differences = get_storage_backend().verify_statistics()
+    if differences:
+        print("Statistics differ from a full recount:")
+        for difference in differences:
+            print(f"  {difference}")
+    else:
+        print("Statistics match a full recount.")
+
+
+@instrumented
+def display_workload(weeks=WORKLOAD_WEEKS):
+    """
+    Display each user's incomplete tasks by the week they are due in, busiest users first.
+
+    Weeks start on Mondays, from the current week on. "Earlier" counts the tasks
+    due before the current week and "Later" those due after the last week shown.
+
+    Parameters:
+    weeks (int): The number of weeks shown one by one.
+    """
+    today = datetime.today()
+    first_day = today.toordinal() - today.weekday()  # Monday of the current week
+    workload = get_storage_backend().workload(first_day, weeks)
+    if not workload:
+        print("No incomplete tasks.")
+        return
+    
+    headers = (["User", "Earlier"] + [datetime.fromordinal(first_day + 7 * week).strftime("%Y-%m-%d")
+                                      for week in range(weeks)] + ["Later", "Total"])
+    rows = sorted(([username] + counts + [sum(counts)] for username, counts in workload.items()),
+                  key=lambda row: (-row[-1], row[0]))
+    rows.append(["All users"] + [sum(column) for column in zip(*(row[1:] for row in rows))])
+    print("\nIncomplete tasks by the week they are due in (weeks starting on the dates shown):")
+    with instrument_phase('render'):
+        table = tabulate(rows, headers=headers, tablefmt="pretty")
+    print(table)
+
+
+class ApiError(Exception):
+    """An error answered by the JSON API server with an HTTP status and a JSON message."""
+
+    def __init__(self, status, message, **details):
+        super().__init__(message)
+        self.status = status
+        self.payload = {'error': message, **details}
+
+
+class TaskServer:
+    """
+    Headless JSON API over the task operations, served over HTTP with asyncio.
+
+    Every request is answered from one warm copy of the users and tasks (the
+    storage backend's in-memory caches), instead of each session re-reading the
+    data files. The backend is never called on the event loop, so it keeps
+    accepting connections and parsing requests while one is answered. Up to
+    SERVER_READ_WORKERS reads run at once, each in a reader thread. The caches
+    are brought up to date by one thread at a time, and a TaskStore that has to
+    be reloaded is replaced rather than emptied, so a read never sees it half
+    loaded. Writes are queued for a single writer task, which takes everything
+    queued so far and applies it as one batch in a writer thread, made durable
+    by one group commit. A batch waits for the reads already running to finish,
+    and new reads wait while it is applied, so they never see a half-made
+    change.
+
+    Login tokens expire SERVER_TOKEN_TTL seconds after they were issued.
+
+    Endpoints (all but /login need an "Authorization: Bearer <token>" header):
+        POST /login                     {"username", "password"} -> {"token"}
+        GET  /tasks                     ?offset=&limit=&username=&completed= -> one page of tasks
+        GET  /tasks/due                 ?from=&to=&username=&offset=&limit= -> incomplete tasks by due date
+        GET  /tasks/search              ?q=&username=&completed=&offset=&limit= -> tasks containing every word of q
+        POST /tasks                     {"username", "title", "description", "due_date"}
+        GET  /users/<assignee>/tasks    -> the user's tasks
+        POST /tasks/<id>/complete       {"expected"?, "generation"?} -> the completed task (assignee only)
+        POST /tasks/<id>/reassign       {"username", "due_date"?, "expected"?, "generation"?} -> the task (assignee only)
+        GET  /report                    -> the report counts, also written to the report files (admin only)
+
+    Task lists are returned with the generation of their task ids (see
+    StorageBackend.generation()), which writes can send back to be refused if
+    the ids have changed since.
+    """
+
+    ROUTES = [
+        ('POST', re.compile(r'/login'), '_login'),
+        ('GET', re.compile(r'/tasks'), '_list_tasks'),
+        ('POST', re.compile(r'/tasks'), '_add_task'),
+        ('GET', re.compile(r'/tasks/due'), '_due_tasks'),
+        ('GET', re.compile(r'/tasks/search'), '_search_tasks'),
+        ('GET', re.compile(r'/users/(?P<assignee>[^/]+)/tasks'), '_user_tasks'),
+        ('POST', re.compile(r'/tasks/(?P<task_id>\d+)/complete'), '_complete_task'),
+        ('POST', re.compile(r'/tasks/(?P<task_id>\d+)/reassign'), '_reassign_task'),
+        ('GET', re.compile(r'/report'), '_report'),
+    ]
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.sessions = {}  # token -> (username, time.monotonic() when it expires)
+        self.token_expiry = deque()  # (time.monotonic() when it expires, token), in the order issued
+        self.writes = None  # asyncio.Queue of (write function, future), created in the event loop
+        self.idle = None  # asyncio.Event, set while no write batch is being applied
+        self.reads_running = 0  # Reads started in the reader threads and not finished yet
+        self.reads_done = None  # asyncio.Event, set while no read is running
+        self.reader_threads = concurrent.futures.ThreadPoolExecutor(max_workers=SERVER_READ_WORKERS)
+        self.writer_thread = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, unix_socket=None):
+        """Listen on host:port (or a Unix socket) and answer requests until cancelled."""
+        self.writes = asyncio.Queue()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.reads_done = asyncio.Event()
+        self.reads_done.set()
+        writer = asyncio.create_task(self._apply_writes())
+        if unix_socket:
+            server = await asyncio.start_unix_server(self._handle_connection, path=unix_socket)
+            address = unix_socket
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            address = "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+        print(f"Serving the task API on {address}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer.cancel()
+
+    async def _handle_connection(self, reader, writer):
+        """Answer the HTTP/1.1 requests sent on one connection, keeping it open between requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    body = await reader.readexactly(int(headers.get('content-length') or 0))
+                except ValueError:
+                    status, payload, keep_alive = 400, {'error': "Malformed request."}, False
+                else:
+                    status, payload = await self._dispatch(method, target, headers, body)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                
+                data = json.dumps(payload).encode('utf-8')
+                head = (f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n")
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode('latin-1') + b'\r\n' + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # The client went away
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target, headers, body):
+        """Route one request to its handler and return (HTTP status, JSON payload)."""
+        url = urllib.parse.urlsplit(target)
+        query = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query).items()}
+        try:
+            path_found = False
+            for route_method, pattern, handler_name in self.ROUTES:
+                match = pattern.fullmatch(url.path)
+                if match is None:
+                    continue
+                path_found = True
+                if route_method != method:
+                    continue
+                
+                try:
+                    data = json.loads(body) if body else {}
+                except ValueError:
+                    raise ApiError(400, "The request body is not valid JSON.")
+                if not isinstance(data, dict):
+                    raise ApiError(400, "The request body must be a JSON object.")
+                username = None if handler_name == '_login' else self._authenticate(headers)
+                arguments = {name: urllib.parse.unquote(value) for name, value in match.groupdict().items()}
+                return 200, await getattr(self, handler_name)(username, data, query, **arguments)
+            if path_found:
+                raise ApiError(405, "Method not allowed.")
+            raise ApiError(404, "Not found.")
+        except ApiError as error:
+            return error.status, error.payload
+        except Exception as error:
+            return 500, {'error': f"An error occurred: {error}"}
+
+    def _authenticate(self, headers):
+        """Return the user a request's bearer token belongs to."""
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        self._forget_expired_tokens()
+        username, expires = self.sessions.get(token, (None, 0))
+        if scheme.lower() != 'bearer' or username is None or expires <= time.monotonic():
+            raise ApiError(401, "Log in first and send the token as 'Authorization: Bearer <token>'. "
+                                "Tokens expire after a while, so log in again if you already have.")
+        return username
+
+    def _forget_expired_tokens(self):
+        """Remove the tokens that have expired."""
+        # Every token lives as long, so they expire in the order they were issued
+        now = time.monotonic()
+        while self.token_expiry and self.token_expiry[0][0] <= now:
+            self.sessions.pop(self.token_expiry.popleft()[1], None)
+
+    async def _readable(self):
+        """Wait until no write batch is being applied, so the in-memory data can be read."""
+        while not self.idle.is_set():
+            await self.idle.wait()
+
+    async def _read(self, function):
+        """Run a read of the backend in a reader thread once no write batch is being applied, and return its result."""
+        await self._readable()
+        self.reads_running += 1
+        self.reads_done.clear()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.reader_threads, function)
+        finally:
+            self.reads_running -= 1
+            if self.reads_running == 0:
+                self.reads_done.set()
+
+    async def _write(self, function):
+        """Queue a write for the writer task and return its result once it is applied."""
+        future = asyncio.get_running_loop().create_future()
+        await self.writes.put((function, future))
+        return await future
+
+    async def _apply_writes(self):
+        """The single writer: apply queued writes in batches, one batch at a time."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.writes.get()]
+            while len(batch) < SERVER_WRITE_BATCH and not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+            
+            self.idle.clear()
+            try:
+                await self.reads_done.wait()  # New reads wait now, but those already running must finish first
+                outcomes = await loop.run_in_executor(self.writer_thread, self._run_batch,
+                                                      [function for function, _ in batch])
+            finally:
+                self.idle.set()
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if future.cancelled():
+                    continue  # The client went away
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    @staticmethod
+    def _run_batch(functions):
+        """
+        Run a batch of write functions as one group commit, returning (result, error) pairs.
+
+        The whole batch runs under one data file lock, and its appends are made
+        durable with one fsync per data file at the end (see group_commit()).
+        If that fails, no write of the batch is reported as done.
+        """
+        outcomes = []
+        try:
+            with group_commit():
+                for function in functions:
+                    try:
+                        outcomes.append((function(), None))
+                    except Exception as error:
+                        outcomes.append((None, error))
+        except OSError as error:
+            return [(None, error)] * len(functions)
+        return outcomes
+
+    @staticmethod
+    def _number(query, name, default, maximum=None):
+        """Read a non-negative whole number from the query string."""
+        try:
+            value = int(query.get(name, default))
+        except ValueError:
+            raise ApiError(400, f"{name} must be a whole number.")
+        if value < 0:
+            raise ApiError(400, f"{name} cannot be negative.")
+        return value if maximum is None else min(value, maximum)
+
+    def _generation(self, data):
+        """
+        Return the generation of task ids a write request's task id is from.
+
+        A client can send the "generation" returned with the tasks it read. If
+        the tasks have been given new ids since, the request is refused. Must
+        be called from a write, which runs under the data file lock.
+        """
+        generation = self.backend.generation()
+        if data.get('generation') is not None:
+            if not isinstance(data['generation'], int):
+                raise ApiError(400, "generation must be a whole number.")
+            if data['generation'] != generation:
+                raise ApiError(409, "Tasks have been archived or renumbered since they were read. Read them again.",
+                               generation=generation)
+        return generation
+
+    @staticmethod
+    def _expected(data, task):
+        """Return the task fields the client last saw (the current ones if it sent none)."""
+        expected = data.get('expected')
+        if expected is None:
+            return task.to_fields()
+        if not isinstance(expected, list) or len(expected) != 6:
+            raise ApiError(400, "expected must be the list of the task's six fields.")
+        return expected
+
+    async def _login(self, _, data, query):
+        if not isinstance(data.get('username'), str):
+            raise ApiError(401, "Invalid username or password.")
+        stored_password = await self._read(lambda: self.backend.password_for(data['username']))
+        if stored_password is None or data.get('password') != stored_password:
+            raise ApiError(401, "Invalid username or password.")
+        token = secrets.token_hex(16)
+        self._forget_expired_tokens()
+        expires = time.monotonic() + SERVER_TOKEN_TTL
+        self.sessions[token] = (data['username'], expires)
+        self.token_expiry.append((expires, token))
+        return {'token': token, 'username': data['username']}
+
+    async def _list_tasks(self, username, data, query):
+        offset = self._number(query, 'offset', 0)
+        limit = self._number(query, 'limit', PAGE_SIZE, SERVER_PAGE_LIMIT)
+        
+        def read():
+            generation = self.backend.generation()
+            tasks, total = self.backend.page_tasks(offset, limit, query.get('username'), query.get('completed'))
+            return {'total': total, 'offset': offset, 'generation': generation,
+                    'tasks': [task.to_dict() for task in tasks]}
+        return await self._read(read)
+
+    async def _due_tasks(self, username, data, query):
+        offset = self._number(query, 'offset', 0)
+        limit = self._number(query, 'limit', PAGE_SIZE, SERVER_PAGE_LIMIT)
+        try:
+            first_day, last_day = (date_ordinal(query[name]) if query.get(name) else None for name in ('from', 'to'))
+        except ValueError:
+            raise ApiError(400, "from and to must be dates in YYYY-MM-DD format.")
+        
+        def read():
+            generation = self.backend.generation()
+            tasks, total = self.backend.page_tasks_due(offset, limit, first_day, last_day, query.get('username'))
+            return {'total': total, 'offset': offset, 'generation': generation,
+                    'tasks': [task.to_dict() for task in tasks]}
+        return await self._read(read)
+
+    async def _search_tasks(self, username, data, query):
+        offset = self._number(query, 'offset', 0)
+        limit = self._number(query, 'limit', PAGE_SIZE, SERVER_PAGE_LIMIT)
+        
+        def read():
+            generation = self.backend.generation()
+            try:
+                tasks, total = self.backend.search_tasks(query.get('q', ''), offset, limit,
+                                                         query.get('username'), query.get('completed'))
+            except ValueError as error:
+                raise ApiError(400, str(error))
+            return {'total': total, 'offset': offset, 'generation': generation,
+                    'tasks': [task.to_dict() for task in tasks]}
+        return await self._read(read)
+
+    async def _user_tasks(self, username, data, query, assignee):
+        
+        def read():
+            generation = self.backend.generation()
+            return {'generation': generation, 'tasks': [task.to_dict() for task in self.backend.tasks_for(assignee)]}
+        return await self._read(read)
+
+    async def _add_task(self, username, data, query):
+        # The same checks as a bulk import, but the task is always assigned today and incomplete
+        row = {field: data.get(field) for field in ('username', 'title', 'description', 'due_date')}
+        
+        def add():
+            task, reason, value = validate_import_row(row, self.backend.read_users(),
+                                                      datetime.today().strftime("%Y-%m-%d"))
+            if task is None:
+                raise ApiError(400, f"Task not added: {reason}.", value=value)
+            self.backend.add_task(*task)
+            return {'task': dict(zip(Task.__slots__[1:], task))}
+        return await self._write(add)
+
+    def _own_task(self, username, task_id):
+        """Return a task of username's for an edit, checking that it exists and is theirs."""
+        task = self.backend.get_task(int(task_id))
+        if task is None:
+            raise ApiError(404, "No such task.")
+        if task.username != username:
+            raise ApiError(403, "Only the user a task is assigned to can change it.")
+        return task
+
+    async def _complete_task(self, username, data, query, task_id):
+        def complete():
+            generation = self._generation(data)
+            task = self._own_task(username, task_id)
+            updated_task = mark_task_complete(self.backend, task, self._expected(data, task), username, generation)
+            if updated_task is None:
+                raise ApiError(409, "This task has been reassigned or archived by someone else.")
+            return {'task': updated_task.to_dict()}
+        return await self._write(complete)
+
+    async def _reassign_task(self, username, data, query, task_id):
+        changes = {'username': data.get('username')}
+        if not isinstance(changes['username'], str):
+            raise ApiError(400, "username is required.")
+        if data.get('due_date') is not None:
+            # The same rules as editing a task in "View my tasks"
+            try:
+                if datetime.strptime(data['due_date'], "%Y-%m-%d") < datetime.now():
+                    raise ApiError(400, "Due date cannot be in the past.")
+            except (TypeError, ValueError):
+                raise ApiError(400, "Invalid date format. Use YYYY-MM-DD.")
+            changes['due_date'] = data['due_date']
+        
+        def reassign():
+            if self.backend.password_for(changes['username']) is None:
+                raise ApiError(400, "Username not found.")
+            generation = self._generation(data)
+            task = self._own_task(username, task_id)
+            expected = self._expected(data, task)
+            try:
+                updated_task = self.backend.update_task(task, expected, **changes)
+            except StaleTaskError as error:
+                # Only send the task back if it is still the one the client meant
+                current_task = current_version(self.backend, error, expected, generation)
+                raise ApiError(409, "This task was changed by someone else.",
+                               task=current_task.to_dict() if current_task is not None else None)
+            return {'task': updated_task.to_dict()}
+        return await self._write(reassign)
+
+    async def _report(self, username, data, query):
+        if username != 'admin':
+            raise ApiError(403, "Only admin can generate reports.")
+        
+        def report():
+            # The same as "Generate reports", which also brings the saved counters up to date
+            generate_reports()
+            report = load_report_data()
+            return {
+                'totals': report['totals'],
+                'users': {entry['user']: {key: entry[key] for key in ('total', 'completed', 'incomplete', 'overdue')}
+                          for entry in report['users']},
+            }
+        return await self._write(report)
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, unix_socket=None):
+    """
+    Run the JSON API server until it is interrupted with Ctrl+C.
+
+    Parameters:
+    host (str): Address to listen on (localhost by default).
+    port (int): TCP port to listen on.
+    unix_socket (str): Listen on this Unix socket instead of a TCP port.
+    """
+    backend = get_storage_backend()
+    backend.prepare()  # Load the users and tasks once, up front
+    try:
+        asyncio.run(TaskServer(backend).serve(host, port, unix_socket))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+def run_command(arguments):
+    """
+    Run the non-interactive command given on the command line, or the menu if none is given.
+
+    Parameters:
+    arguments (list): The command-line arguments, without the program name.
+    """
+    parser = argparse.ArgumentParser(description="Task Management Application")
+    parser.add_argument('--profile', metavar='FILE', default=PROFILE_FILE,
+                        help="record per-operation timings and I/O and write them to this JSON file on exit")
+    parser.add_argument('--profile-operation', metavar='NAME', default=PROFILE_OPERATION,
+                        help="with --profile, also capture the first call of this operation "
+                             "(e.g. view_all_tasks) with cProfile and tracemalloc")
+    commands = parser.add_subparsers(dest='command')
+    migrate = commands.add_parser('migrate-sqlite', help="copy user.txt and tasks.txt into an SQLite database")
+    migrate.add_argument('--database', default=SQLITE_FILE, help="database file to create (default: %(default)s)")
+    migrate_shards = commands.add_parser('migrate-shards', help="copy tasks.txt into one shard file per bucket of assignees")
+    migrate_shards.add_argument('--shards', type=int, default=SHARD_COUNT,
+                                help="number of shard files (default: %(default)s)")
+    import_parser = commands.add_parser('import-tasks', help="add tasks from a CSV or JSONL file without prompts")
+    import_parser.add_argument('file', help="CSV (with a header row) or JSONL file of tasks")
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'], help="file format (default: from the extension)")
+    import_parser.add_argument('--rejects', help="write every rejected row to this file")
+    search_parser = commands.add_parser('search', help="list the tasks whose title and description contain every word given")
+    search_parser.add_argument('words', nargs='+', help="words to search for; end a word with * to match its start")
+    search_parser.add_argument('--username', help="only tasks assigned to this user")
+    search_parser.add_argument('--completed', choices=['Yes', 'No'], help="only tasks with this completion status")
+    search_parser.add_argument('--limit', type=int, default=PAGE_SIZE, help="most tasks listed (default: %(default)s)")
+    commands.add_parser('rebuild-search-index', help="index the words of every task again from scratch")
+    archive_parser = commands.add_parser('archive', help="move old completed tasks into a compressed archive segment")
+    archive_parser.add_argument('--before', metavar='YYYY-MM-DD',
+                                help=f"archive completed tasks due before this date (default: {ARCHIVE_AFTER_DAYS} days ago)")
+    archived_parser = commands.add_parser('archived', help="list archived tasks")
+    archived_parser.add_argument('words', nargs='*', help="only tasks containing every word; end a word with * to match its start")
+    archived_parser.add_argument('--username', help="only tasks assigned to this user")
+    archived_parser.add_argument('--limit', type=int, default=PAGE_SIZE, help="most tasks listed (default: %(default)s)")
+    bulk_parser = commands.add_parser('bulk-update', help="change every task matching a filter with one write")
+    bulk_parser.add_argument('--username', help="only tasks assigned to this user")
+    bulk_parser.add_argument('--due-from', metavar='YYYY-MM-DD', help="only tasks due on or after this date")
+    bulk_parser.add_argument('--due-to', metavar='YYYY-MM-DD', help="only tasks due on or before this date")
+    bulk_parser.add_argument('--title', help="only tasks whose title contains this text (ignoring case)")
+    bulk_parser.add_argument('--completed', choices=['Yes', 'No'], help="only tasks with this completion status")
+    bulk_parser.add_argument('--reassign-to', metavar='USER', help="assign the tasks to this user")
+    bulk_parser.add_argument('--mark-complete', action='store_true', help="mark the tasks as complete")
+    bulk_parser.add_argument('--set-due-date', metavar='YYYY-MM-DD', help="change the tasks' due date")
+    bulk_parser.add_argument('--dry-run', action='store_true', help="only count the matching tasks")
+    workload_parser = commands.add_parser('workload', help="show each user's incomplete tasks by the week they are due in")
+    workload_parser.add_argument('--weeks', type=int, default=WORKLOAD_WEEKS,
+                                 help="number of weeks shown one by one (default: %(default)s)")
+    serve_parser = commands.add_parser('serve', help="serve the task operations as a JSON API over HTTP")
+    serve_parser.add_argument('--host', default=SERVER_HOST, help="address to listen on (default: %(default)s)")
+    serve_parser.add_argument('--port', type=int, default=SERVER_PORT, help="port to listen on (default: %(default)s)")
+    serve_parser.add_argument('--unix-socket', help="listen on this Unix socket instead of a TCP port")
+    options = parser.parse_args(arguments)
+    
+    if options.profile:
+        start_instrumentation(options.profile, options.profile_operation)
+    
+    if options.command is None:
+        run_menu()
+    elif options.command == 'migrate-sqlite':
+        user_count, task_count = import_flat_files_to_sqlite(options.database)
+        print(f"Imported {user_count} users and {task_count} tasks into {options.database}.")
+        print("Set TASK_MANAGER_BACKEND=sqlite to use it.")
+    elif options.command == 'migrate-shards':
+        task_count = import_flat_files_to_shards(SHARD_DIR, options.shards)
+        print(f"Copied {task_count} tasks into {options.shards} shards in {SHARD_DIR}/.")
+        print("Set TASK_MANAGER_BACKEND=sharded to use it.")
+    elif options.command == 'import-tasks':
+        import_tasks(options.file, options.format, options.rejects)
+    elif options.command == 'search':
+        try:
+            tasks, total = get_storage_backend().search_tasks(' '.join(options.words), 0, options.limit,
+                                                              options.username, options.completed)
+        except ValueError as error:
+            parser.error(str(error))
+        headers = ["Id", "Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Completed"]
+        print(tabulate([[task.task_id] + task.to_fields() for task in tasks], headers=headers, tablefmt="pretty"))
+        print(f"{total} matching tasks" + (f", the first {len(tasks)} shown." if len(tasks) < total else "."))
+    elif options.command == 'rebuild-search-index':
+        started = time.perf_counter()
+        count = get_storage_backend().rebuild_search_index()
+        print(f"Indexed {count} tasks in {time.perf_counter() - started:.2f} s.")
+    elif options.command == 'archive':
+        archive_tasks(options.before)
+    elif options.command == 'archived':
+        try:
+            tasks = list(itertools.islice(iter_archived_tasks(' '.join(options.words), options.username),
+                                          options.limit))
+        except ValueError as error:
+            parser.error(str(error))
+        headers = ["Assigned To", "Title", "Description", "Assigned Date", "Due Date", "Completed"]
+        print(tabulate([task.to_fields() for task in tasks], headers=headers, tablefmt="pretty"))
+        print(f"{len(tasks)} archived tasks shown.")
+    elif options.command == 'bulk-update':
+        changes = {}
+        if options.reassign_to:
+            changes['username'] = options.reassign_to
+        if options.set_due_date:
+            changes['due_date'] = options.set_due_date
+        if options.mark_complete:
+            changes['completed'] = 'Yes'
+        if not changes:
+            parser.error("give --reassign-to, --set-due-date and/or --mark-complete")
+        try:
+            task_filter = make_task_filter(options.username, options.due_from, options.due_to,
+                                           options.title, options.completed)
+        except ValueError as error:
+            parser.error(str(error))
+        backend = get_storage_backend()
+        error = check_bulk_changes(backend, changes)
+        if error:
+            parser.error(error)
+        if options.dry_run:
+            print(f"{backend.count_matching(task_filter)} tasks match.")
+        else:
+            started = time.perf_counter()
+            count = backend.bulk_update(task_filter, **changes)
+            print(f"{count} tasks updated in {time.perf_counter() - started:.2f} s.")
+    elif options.command == 'workload':
+        display_workload(options.weeks)
+    elif options.command == 'serve':
+        serve(options.host, options.port, options.unix_socket)
+    
+    # Leave the parsed tasks behind for the next session, if this one had to parse many of them
+    if _storage_backend is not None:
+        _storage_backend.finish()
+
+
+def run_menu():
+    """
+    Log a user in and run the interactive menu until they exit.
+
+    Tasks are not loaded up front: the menu actions that need them load them
+    on first use, so the login prompt appears straight away.
+    """
+    current_user = login()
     
     while True:
         print("\nMenu:")
         print("a - Add task")
         print("va - View all tasks")
         print("vm - View my tasks")
+        print("vd - View overdue and due tasks")
+        print("s - Search tasks")
+        print("vr - View archived tasks")
         if current_user == 'admin':
             print("r - Register new user")
             print("ds - Display statistics")
             print("gr - Generate reports")
+            print("vs - Verify statistics")
+            print("ar - Archive old completed tasks")
+            print("bu - Bulk update tasks")
+            print("wl - Workload by week")
         print("e - Exit")
         
-        option = input("Enter your choice: ").lower()
+        option = read_input("Enter your choice: ").lower()
         if option == 'a':
             add_task()
         elif option == 'va':
             view_all_tasks()
         elif option == 'vm':
             view_my_tasks(current_user)
+        elif option == 'vd':
+            view_due_tasks()
+        elif option == 's':
+            search_tasks()
+        elif option == 'vr':
+            view_archived_tasks()
         elif option == 'r' and current_user == 'admin':
-            register_user(users)
+            register_user()
         elif option == 'ds' and current_user == 'admin':
             display_statistics()
         elif option == 'gr' and current_user == 'admin':
-            generate_reports()
-            print("Reports generated successfully.")
+            if generate_reports():
+                print("Reports generated successfully.")
+            else:
+                print("Reports are already up to date.")
+        elif option == 'vs' and current_user == 'admin':
+            verify_statistics()
+        elif option == 'ar' and current_user == 'admin':
+            before = read_input(f"Archive completed tasks due before (YYYY-MM-DD, leave blank for "
+                           f"{ARCHIVE_AFTER_DAYS} days ago): ").strip()
+            archive_tasks(before or None)
+        elif option == 'bu' and current_user == 'admin':
+            bulk_update_tasks()
+        elif option == 'wl' and current_user == 'admin':
+            display_workload()
         elif option == 'e':
             print("Goodbye!")
             break
@@ -532,5 +5564,10 @@ def main():
             print("Invalid option. Please try again.")
 
 
+def main():
+    # Command-line arguments select a non-interactive command; without one the menu is shown
+    run_command(sys.argv[1:])
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,62 @@
+"""
+Shared fixtures for the task manager tests.
+
+Every test runs in its own temporary directory, on a small data set written
+by benchmark.generate_dataset(). The task manager script is loaded as a
+fresh module for each session a test starts, so two sessions in one test
+behave like two separate runs of the program on the same files.
+"""
+
+import os
+import sys
+
+import pytest
+
+# The task manager, task_codec and benchmark live in the directory above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark
+
+TASKS = 300  # Tasks in the generated data set
+USERS = 12  # Users in the generated data set, including admin
+SHARDS = 4  # Shard files used by the sharded backend
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Generate user.txt and tasks.txt in a temporary directory and run the test there."""
+    benchmark.generate_dataset(str(tmp_path), TASKS, USERS, 1.1, 0.5, seed=1)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TASK_MANAGER_SHARDS', str(SHARDS))
+    return tmp_path
+
+
+@pytest.fixture
+def new_session(data_dir, monkeypatch):
+    """
+    Return a function that starts a new session: a freshly loaded task manager module.
+
+    The function takes the storage backend to use ('flat' by default). For
+    'sqlite' and 'sharded', the flat files are copied into that backend the
+    first time it is used.
+    """
+    def start(backend='flat'):
+        monkeypatch.setenv('TASK_MANAGER_BACKEND', backend)
+        app = benchmark.load_app()
+        if backend == 'sqlite' and not os.path.exists(app.SQLITE_FILE):
+            app.import_flat_files_to_sqlite()
+        elif backend == 'sharded' and not os.path.exists(app.SHARD_DIR):
+            app.import_flat_files_to_shards()
+        return app
+    return start
+
+
+@pytest.fixture
+def app(new_session):
+    """A session on the flat-file backend."""
+    return new_session()
+
+
+def task_rows(tasks):
+    """Return tasks as (task_id, fields...) tuples, for comparing task lists."""
+    return [(task.task_id, *task.to_fields()) for task in tasks]
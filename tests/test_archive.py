@@ -0,0 +1,148 @@
+"""Tests for moving old completed tasks into the compressed archive."""
+
+import asyncio
+import builtins
+import json
+from datetime import date
+
+from conftest import task_rows
+
+
+def all_tasks(app):
+    """Return the fields of every stored and archived task, in a fixed order."""
+    return sorted(task.to_fields() for task in
+                  list(app.get_storage_backend().iter_tasks()) + list(app.get_task_archive().iter_tasks()))
+
+
+def reports(app):
+    """Generate the reports and return their text."""
+    app.generate_reports()
+    with open('task_overview.txt', 'r') as task_overview, open('user_overview.txt', 'r') as user_overview:
+        return task_overview.read() + user_overview.read()
+
+
+def test_archiving_moves_old_completed_tasks(app):
+    backend = app.get_storage_backend()
+    before = reports(app)
+    tasks_before = all_tasks(app)
+    cutoff = date.today().toordinal() - 200
+    
+    count = backend.archive_tasks(cutoff)
+    archived = list(app.get_task_archive().iter_tasks())
+    assert count == len(archived) > 0
+    assert all(task.completed == 'Yes' and app.date_ordinal(task.due_date) < cutoff for task in archived)
+    assert not any(task.completed == 'Yes' and app.date_ordinal(task.due_date) < cutoff
+                   for task in backend.iter_tasks())
+    
+    # Nothing is lost, and the reports still count the archived tasks
+    assert all_tasks(app) == tasks_before
+    assert reports(app) == before
+    assert backend.verify_statistics() == []
+    assert backend.archive_tasks(cutoff) == 0
+
+
+def test_archive_is_read_by_a_new_session(new_session):
+    app = new_session()
+    app.get_storage_backend().archive_tasks(date.today().toordinal() - 200)
+    remaining = task_rows(app.get_storage_backend().iter_tasks())
+    archived = task_rows(app.get_task_archive().iter_tasks('user1'))
+    
+    app = new_session()
+    assert task_rows(app.get_storage_backend().iter_tasks()) == remaining
+    assert task_rows(app.get_task_archive().iter_tasks('user1')) == archived
+    assert [task.to_fields() for task in app.iter_archived_tasks('', 'user1')] == [list(row[1:]) for row in archived]
+
+
+ARCHIVED_TASKS = [
+    "user1, Old task, Done long ago, 2020-01-01, 2020-01-02, Yes\n",
+    "user1, Task A, The task that was shown, 2024-01-01, 2031-01-01, No\n",
+    "user1, Task B, Gets Task A's id once the old task is archived, 2024-01-01, 2031-01-01, No\n",
+]
+
+
+def archive_under_open_session(new_session):
+    """
+    Start a session showing user1's tasks, then archive in another session so the ids move down by one.
+
+    Returns:
+        tuple: (the first session, its backend, the generation it read, Task A as it was shown)
+    """
+    with open('tasks.txt', 'w') as file:
+        file.writelines(ARCHIVED_TASKS)
+    app = new_session()
+    backend = app.get_storage_backend()
+    generation = backend.generation()
+    task_a = backend.get_task(1)
+    
+    other = new_session()
+    assert other.get_storage_backend().archive_tasks(date(2021, 1, 1).toordinal()) == 1
+    assert backend.generation() != generation
+    return app, backend, generation, task_a
+
+
+def assert_nothing_completed(new_session):
+    tasks = new_session().get_storage_backend().tasks_for('user1')
+    assert [(task.title, task.completed) for task in tasks] == [('Task A', 'No'), ('Task B', 'No')]
+
+
+def test_mark_complete_does_not_follow_an_id_to_another_task(new_session):
+    app, backend, generation, task_a = archive_under_open_session(new_session)
+    assert app.mark_task_complete(backend, task_a, task_a.to_fields(), 'user1', generation) is None
+    assert_nothing_completed(new_session)
+
+
+def test_mark_complete_compares_the_task_not_just_its_assignee(new_session):
+    app, backend, _, task_a = archive_under_open_session(new_session)
+    # Even with the generation read after the archive, Task B is not taken for Task A
+    assert app.mark_task_complete(backend, task_a, task_a.to_fields(), 'user1', backend.generation()) is None
+    assert_nothing_completed(new_session)
+
+
+def test_edit_after_archiving_asks_for_the_list_again(new_session, monkeypatch, capsys):
+    with open('tasks.txt', 'w') as file:
+        file.writelines(ARCHIVED_TASKS)
+    app = new_session()
+    
+    answers = iter(['2', '2', 'user2', '2031-02-02'])
+    
+    def answer(prompt=''):
+        if prompt.startswith("Enter the task number"):
+            # Another session archives while the list is on screen
+            new_session().get_storage_backend().archive_tasks(date(2021, 1, 1).toordinal())
+        return next(answers)
+    monkeypatch.setattr(builtins, 'input', answer)
+    
+    app.view_my_tasks('user1')
+    assert "Please open 'View my tasks' again." in capsys.readouterr().out
+    tasks = new_session().get_storage_backend().tasks_for('user1')
+    assert [(task.title, task.username, task.due_date) for task in tasks] == [
+        ('Task A', 'user1', '2031-01-01'), ('Task B', 'user1', '2031-01-01')]
+
+
+def test_api_refuses_ids_from_before_an_archive(new_session):
+    app, backend, generation, task_a = archive_under_open_session(new_session)
+    
+    async def run():
+        server = app.TaskServer(backend)
+        server.writes = asyncio.Queue()
+        server.idle = asyncio.Event()
+        server.idle.set()
+        server.reads_done = asyncio.Event()
+        server.reads_done.set()
+        writer = asyncio.create_task(server._apply_writes())
+        
+        async def post(target, body, token=None):
+            headers = {'authorization': f'Bearer {token}'} if token else {}
+            return await server._dispatch('POST', target, headers, json.dumps(body).encode('utf-8'))
+        _, login = await post('/login', {'username': 'user1', 'password': 'pass'})
+        token = login['token']
+        
+        status, payload = await post('/tasks/1/complete', {'generation': generation}, token)
+        assert status == 409 and payload['generation'] == generation + 1
+        status, payload = await post('/tasks/1/complete', {'expected': task_a.to_fields()}, token)
+        assert status == 409
+        status, payload = await post('/tasks/1/reassign', {'username': 'user2', 'expected': task_a.to_fields()}, token)
+        assert status == 409 and payload['task'] is None
+        writer.cancel()
+    asyncio.run(run())
+    assert_nothing_completed(new_session)
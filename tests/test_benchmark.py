@@ -0,0 +1,42 @@
+"""Tests for the synthetic data generator in benchmark.py."""
+
+import benchmark
+from task_codec import decode_task_line
+
+
+def read_lines(directory, file_name):
+    """Return the lines of a generated file."""
+    with open(directory / file_name, 'r') as file:
+        return file.read().splitlines()
+
+
+def test_data_set_has_the_requested_size(tmp_path):
+    benchmark.generate_dataset(str(tmp_path), 250, 7, 1.1, 0.5, seed=3)
+    users = [line.split(', ')[0] for line in read_lines(tmp_path, 'user.txt')]
+    tasks = [decode_task_line(line) for line in read_lines(tmp_path, 'tasks.txt')]
+
+    assert users[0] == 'admin'
+    assert len(users) == 7
+    assert len(tasks) == 250
+    assert all(len(fields) == 6 for fields in tasks)
+    assert {fields[0] for fields in tasks} <= set(users)
+    assert all(fields[3] <= fields[4] for fields in tasks)  # Due on or after the day it was assigned
+
+
+def test_same_seed_gives_the_same_data_set(tmp_path):
+    benchmark.generate_dataset(str(tmp_path / 'a'), 100, 5, 1.1, 0.5, seed=8)
+    benchmark.generate_dataset(str(tmp_path / 'b'), 100, 5, 1.1, 0.5, seed=8)
+    benchmark.generate_dataset(str(tmp_path / 'c'), 100, 5, 1.1, 0.5, seed=9)
+
+    assert read_lines(tmp_path / 'a', 'tasks.txt') == read_lines(tmp_path / 'b', 'tasks.txt')
+    assert read_lines(tmp_path / 'a', 'tasks.txt') != read_lines(tmp_path / 'c', 'tasks.txt')
+
+
+def test_skew_and_completion_ratio(tmp_path):
+    benchmark.generate_dataset(str(tmp_path), 2000, 10, 2.0, 0.25, seed=1)
+    tasks = [decode_task_line(line) for line in read_lines(tmp_path, 'tasks.txt')]
+    admin_tasks = sum(1 for fields in tasks if fields[0] == 'admin')
+    completed = sum(1 for fields in tasks if fields[5] == 'Yes')
+
+    assert admin_tasks > len(tasks) / 2  # The first user gets most tasks with a steep skew
+    assert 0.2 < completed / len(tasks) < 0.3
@@ -0,0 +1,69 @@
+"""Tests for selecting tasks with a TaskFilter and changing them all in one bulk update."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import task_rows
+
+# Filters as they would be typed in the menu: username, due from, due to, title, completed
+FILTERS = [
+    ('user5', '', '', '', 'no'),
+    ('', (date.today() - timedelta(days=200)).isoformat(), (date.today() - timedelta(days=100)).isoformat(), '', ''),
+    ('', '', '', 'REVIEW', ''),
+    ('user2', '', date.today().isoformat(), 'e', 'Yes'),
+    ('nobody', '', '', '', ''),
+]
+
+CHANGES = [
+    dict(username='user6'),
+    dict(completed='Yes'),
+    dict(due_date='2031-01-01'),
+    dict(username='user9', due_date='2031-02-02', completed='No'),
+    dict(completed='Yes'),
+]
+
+
+def test_make_task_filter(app):
+    task_filter = app.make_task_filter(' user1 ', '2024-01-01', '', 'Plan', 'yes')
+    assert (task_filter.username, task_filter.first_day, task_filter.last_day, task_filter.title,
+            task_filter.completed) == ('user1', date(2024, 1, 1).toordinal(), None, 'Plan', 'Yes')
+    
+    task = app.Task(0, 'user1', 'Team planning', 'Plan it', '2024-01-01', '2024-03-01', 'Yes')
+    assert task_filter.matches(task)
+    assert not app.make_task_filter(due_to='2024-02-29').matches(task)
+    assert not app.make_task_filter(title='meeting').matches(task)
+    assert app.make_task_filter().matches(task)  # A blank filter matches every task
+    with pytest.raises(ValueError):
+        app.make_task_filter(due_from='01/01/2024')
+    with pytest.raises(ValueError):
+        app.make_task_filter(completed='maybe')
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite', 'sharded'])
+def test_bulk_updates_change_exactly_the_matching_tasks(new_session, backend_name):
+    app = new_session(backend_name)
+    backend = app.get_storage_backend()
+    backend.prepare()
+    backend.report_statistics(1)
+    backend.update_task(backend.get_task(0), completed='No')  # A journaled edit for the update to take in
+    expected = list(backend.iter_tasks())
+    
+    for fields, changes in zip(FILTERS, CHANGES):
+        task_filter = app.make_task_filter(*fields)
+        selected = [task for task in expected if task_filter.matches(task)]
+        assert backend.count_matching(task_filter) == len(selected)
+        assert backend.bulk_update(task_filter, **changes) == len(selected)
+        for task in selected:
+            for field, value in changes.items():
+                setattr(task, field, value)
+        assert task_rows(backend.iter_tasks()) == task_rows(expected)
+    
+    assert backend.verify_statistics() == []
+    statistics = backend.report_statistics(1)
+    recount = app.TaskStatistics.from_tasks(expected, statistics.as_of)
+    assert statistics.totals == recount.totals
+    
+    # Another session sees every change
+    other = new_session(backend_name).get_storage_backend()
+    assert task_rows(other.iter_tasks()) == task_rows(expected)
@@ -0,0 +1,67 @@
+"""Tests for finding the incomplete tasks due in a range of days, in due-date order."""
+
+import pytest
+
+from conftest import task_rows
+
+
+def due_in_order(app, tasks, first_day=None, last_day=None, username=None):
+    """Select and sort the incomplete tasks due between two days, one task at a time."""
+    return task_rows(sorted((task for task in tasks
+                             if task.completed != 'Yes'
+                             and (username is None or task.username == username)
+                             and (first_day is None or app.date_ordinal(task.due_date) >= first_day)
+                             and (last_day is None or app.date_ordinal(task.due_date) <= last_day)),
+                            key=lambda task: (app.date_ordinal(task.due_date), task.task_id)))
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite', 'sharded'])
+def test_pages_of_due_tasks_match_a_sort_of_every_task(new_session, backend_name):
+    app = new_session(backend_name)
+    backend = app.get_storage_backend()
+    everything = list(backend.iter_tasks())
+    today = app.datetime.today().toordinal()
+    
+    for first_day, last_day, username in [(None, None, None), (today - 30, today + 30, None),
+                                          (today, None, 'user3'), (None, today, 'user3'), (today + 1, today, None)]:
+        expected = due_in_order(app, everything, first_day, last_day, username)
+        rows, offset = [], 0
+        while True:
+            tasks, total = backend.page_tasks_due(offset, 7, first_day, last_day, username)
+            assert total == len(expected)
+            if not tasks:
+                break
+            rows += task_rows(tasks)
+            offset += 7
+        assert rows == expected
+
+
+def test_due_range_follows_edits(app):
+    backend = app.get_storage_backend()
+    store = app.get_task_store()
+    task = next(task for task in store.tasks if task.completed != 'Yes')
+    today = app.datetime.today().toordinal()
+    
+    backend.update_task(task, due_date=app.datetime.fromordinal(today + 400).strftime("%Y-%m-%d"))
+    entries, start, end = store.due_range(today + 400, today + 400)
+    assert entries[start:end] == [(today + 400, task.task_id)]
+    
+    backend.update_task(backend.get_task(task.task_id), completed='Yes')
+    entries, start, end = store.due_range(today + 400, today + 400)
+    assert start == end
+    assert task_rows(backend.page_tasks_due(0, 1000)[0]) == due_in_order(app, store.tasks)
+
+
+def test_sharded_due_indexes_are_rebuilt_only_for_changed_shards(new_session):
+    app = new_session('sharded')
+    backend = app.get_storage_backend()
+    backend.page_tasks_due(0, 10)
+    indexes = dict(backend._due_indexes)
+    
+    task = next(task for task in backend.iter_tasks('user1') if task.completed != 'Yes')
+    backend.update_task(task, completed='Yes')
+    tasks, total = backend.page_tasks_due(0, 1000)
+    changed = backend._shard_of('user1')
+    assert task.task_id not in [other.task_id for other in tasks]
+    assert [index for index in indexes if backend._due_indexes[index] is not indexes[index]] == [changed]
+    assert task_rows(tasks) == due_in_order(app, list(backend.iter_tasks()))
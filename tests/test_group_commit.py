@@ -0,0 +1,76 @@
+"""Tests for making a batch of appends durable with one fsync per data file."""
+
+import functools
+import os
+
+import pytest
+
+from conftest import TASKS
+
+
+@pytest.fixture
+def fsyncs(app, monkeypatch):
+    """
+    Record every os.fsync() call, in a session with the tasks loaded.
+
+    Each call is recorded as the name of the data file it synced (found by
+    inode), or as 'other'.
+    """
+    app.get_storage_backend().prepare()
+    inodes = {os.stat(name).st_ino: name for name in (app.TASK_FILE, app.JOURNAL_FILE)}
+    calls = []
+    fsync = os.fsync
+    
+    def recording(fd):
+        calls.append(inodes.get(os.fstat(fd).st_ino, 'other'))
+        return fsync(fd)
+    monkeypatch.setattr(os, 'fsync', recording)
+    return calls
+
+
+def test_a_server_batch_is_synced_once(app, fsyncs):
+    backend = app.get_storage_backend()
+    server = app.TaskServer(backend)
+    functions = [functools.partial(backend.update_task, backend.get_task(task_id), completed='Yes')
+                 for task_id in range(10)]
+    
+    outcomes = server._run_batch(functions)
+    assert [error for _, error in outcomes] == [None] * 10
+    assert fsyncs == [app.JOURNAL_FILE]
+
+
+def test_writes_to_two_files_are_synced_once_each(app, fsyncs):
+    backend = app.get_storage_backend()
+    with app.group_commit():
+        for task_id in range(5):
+            backend.update_task(backend.get_task(task_id), due_date='2031-05-05')
+            backend.add_task('user1', f'Added {task_id}', 'In a group', '2024-01-01', '2031-05-05', 'No')
+        backend.add_tasks([('user2', 'Imported', 'In the same group', '2024-01-01', '2031-05-05', 'No')])
+    
+    assert sorted(fsyncs) == sorted([app.JOURNAL_FILE, app.TASK_FILE])
+    assert [task.due_date for task in backend.iter_tasks()][:5] == ['2031-05-05'] * 5
+    assert len(list(backend.iter_tasks())) == TASKS + 6
+
+
+def test_writes_outside_a_group_are_synced_one_by_one(app, fsyncs):
+    backend = app.get_storage_backend()
+    for task_id in range(3):
+        backend.update_task(backend.get_task(task_id), completed='Yes')
+    assert fsyncs == [app.JOURNAL_FILE] * 3
+
+
+def test_refused_writes_do_not_stop_the_rest_of_the_batch(new_session):
+    app = new_session()
+    backend = app.get_storage_backend()
+    backend.prepare()
+    other = new_session().get_storage_backend()
+    task = backend.get_task(4)
+    other.update_task(other.get_task(4), title='Changed elsewhere')
+    
+    outcomes = app.TaskServer(backend)._run_batch([
+        functools.partial(backend.update_task, task, task.to_fields(), completed='Yes'),
+        functools.partial(backend.update_task, backend.get_task(5), completed='Yes'),
+    ])
+    assert isinstance(outcomes[0][1], app.StaleTaskError)
+    assert outcomes[1][1] is None
+    assert new_session().get_storage_backend().get_task(5).completed == 'Yes'
@@ -0,0 +1,50 @@
+"""Tests for the non-interactive bulk task import."""
+
+import json
+
+import pytest
+
+from conftest import TASKS, task_rows
+
+CSV_ROWS = """username,title,description,due_date,assigned_date,completed
+user1,Write report,"First, the summary",2030-01-31,2030-01-02,yes
+user2,Call back,Ask about the invoice,2030-02-01,,
+ghost,Nobody,Unknown user,2030-02-01,,
+user3,Bad date,Not a day,2030-02-30,,
+user4,,Missing a title,2030-02-01,,
+user5,Odd status,Completed is wrong,2030-02-01,,maybe
+"""
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite', 'sharded'])
+def test_csv_import_adds_valid_rows_and_rejects_the_rest(new_session, backend_name, tmp_path):
+    app = new_session(backend_name)
+    (tmp_path / 'new.csv').write_text(CSV_ROWS)
+    
+    added, rejected = app.import_tasks(str(tmp_path / 'new.csv'), rejects_file=str(tmp_path / 'rejects.txt'))
+    assert added == 2
+    assert rejected == [(4, 'unknown user', 'ghost'), (5, 'invalid due_date', '2030-02-30'),
+                        (6, 'missing title', ''), (7, 'invalid completed value', 'Maybe')]
+    assert len((tmp_path / 'rejects.txt').read_text().splitlines()) == 4
+    
+    tasks = task_rows(new_session(backend_name).get_storage_backend().iter_tasks())
+    today = app.datetime.today().strftime("%Y-%m-%d")
+    assert len(tasks) == TASKS + 2
+    assert [row[1:] for row in tasks[-2:]] == [
+        ('user1', 'Write report', 'First, the summary', '2030-01-02', '2030-01-31', 'Yes'),
+        ('user2', 'Call back', 'Ask about the invoice', today, '2030-02-01', 'No')]
+
+
+def test_jsonl_import_and_the_report_counters(new_session, tmp_path):
+    app = new_session()
+    backend = app.get_storage_backend()
+    backend.report_statistics(1)  # Saved counters, which the import keeps up to date
+    lines = [json.dumps({'username': 'user1', 'title': f'Imported {number}', 'description': 'From JSONL',
+                         'due_date': '2030-03-03'}) for number in range(50)]
+    lines.insert(10, '{not json')
+    (tmp_path / 'new.jsonl').write_text('\n'.join(lines) + '\n')
+    
+    added, rejected = app.import_tasks(str(tmp_path / 'new.jsonl'))
+    assert added == 50
+    assert rejected == [(11, 'not a valid record', '')]
+    assert new_session().get_storage_backend().verify_statistics() == []
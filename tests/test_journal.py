@@ -0,0 +1,129 @@
+"""Tests for the task journal: edits are appended to JOURNAL_FILE, replayed on load and compacted into TASK_FILE."""
+
+from task_codec import decode_task_line
+
+from conftest import TASKS, task_rows
+
+
+def read_task_file(app):
+    """Return the fields of every line in TASK_FILE."""
+    with open(app.TASK_FILE, 'r') as file:
+        return [decode_task_line(line) for line in file]
+
+
+def test_edits_are_journaled_and_replayed(new_session):
+    app = new_session()
+    backend = app.get_storage_backend()
+    original_lines = read_task_file(app)
+    
+    backend.update_task(backend.get_task(3), completed='Yes')
+    backend.update_task(backend.get_task(7), username='user2', due_date='2031-01-01')
+    backend.update_task(backend.get_task(3), completed='No')  # The later record wins
+    
+    assert read_task_file(app) == original_lines  # TASK_FILE itself is not rewritten
+    with open(app.JOURNAL_FILE, 'r') as file:
+        assert len(file.readlines()) == 3
+    
+    edited = task_rows(backend.iter_tasks())
+    assert edited[3][6] == 'No'
+    assert edited[7][1] == 'user2' and edited[7][5] == '2031-01-01'
+    
+    # A new session starts from TASK_FILE and replays the journal on top of it
+    app = new_session()
+    assert task_rows(app.get_storage_backend().iter_tasks()) == edited
+    assert [task.task_id for task in app.get_storage_backend().tasks_for('user2')] == \
+        [row[0] for row in edited if row[1] == 'user2']
+
+
+def test_other_sessions_edits_are_picked_up(new_session):
+    first = new_session()
+    second = new_session()
+    first_backend = first.get_storage_backend()
+    second_backend = second.get_storage_backend()
+    first_backend.prepare()
+    second_backend.prepare()
+    
+    second_backend.update_task(second_backend.get_task(5), completed='Yes', due_date='2032-02-02')
+    second_backend.add_task('user3', 'New task', 'Added elsewhere', '2024-01-01', '2032-03-03', 'No')
+    
+    assert task_rows(first_backend.iter_tasks()) == task_rows(second_backend.iter_tasks())
+    assert first_backend.get_task(5).due_date == '2032-02-02'
+
+
+def test_compaction_folds_the_journal_into_the_task_file(new_session, monkeypatch):
+    app = new_session()
+    monkeypatch.setattr(app, 'JOURNAL_COMPACT_THRESHOLD', 10)
+    backend = app.get_storage_backend()
+    backend.report_statistics(1)  # Saves the report counters, which compaction has to keep current
+    
+    for task_id in range(12):
+        backend.update_task(backend.get_task(task_id), completed='Yes', description=f'Edited {task_id}')
+    edited = task_rows(backend.iter_tasks())
+    
+    # The tenth edit compacted the journal, leaving the last two in it
+    with open(app.JOURNAL_FILE, 'r') as file:
+        assert len(file.readlines()) == 2
+    assert read_task_file(app)[:10] == [list(row[1:]) for row in edited[:10]]
+    assert read_task_file(app)[10][2] != 'Edited 10'
+    
+    app.get_task_store().compact()
+    with open(app.JOURNAL_FILE, 'r') as file:
+        assert file.read() == ''
+    assert read_task_file(app) == [list(row[1:]) for row in edited]
+    assert new_session().get_storage_backend().verify_statistics() == []
+    assert task_rows(new_session().get_storage_backend().iter_tasks()) == edited
+
+
+def test_session_open_during_compaction_reloads(new_session):
+    first = new_session()
+    first_backend = first.get_storage_backend()
+    first_backend.prepare()
+    
+    second = new_session()
+    second_backend = second.get_storage_backend()
+    second_backend.update_task(second_backend.get_task(1), completed='Yes', title='Compacted')
+    second.get_task_store().compact()
+    second_backend.update_task(second_backend.get_task(2), title='After compaction')
+    
+    assert task_rows(first_backend.iter_tasks()) == task_rows(second_backend.iter_tasks())
+    assert first_backend.get_task(1).title == 'Compacted'
+
+
+def test_record_cut_off_by_a_crash_is_not_merged_with_the_next(new_session):
+    app = new_session()
+    backend = app.get_storage_backend()
+    backend.update_task(backend.get_task(1), completed='Yes')
+    with open(app.JOURNAL_FILE, 'ab') as file:
+        file.write(b'{"id": 2, "compl')  # What a crash part way through an append leaves behind
+    
+    backend.update_task(backend.get_task(3), due_date='2033-03-03')
+    with open(app.JOURNAL_FILE, 'r') as file:
+        assert file.read().endswith('}\n{"id": 3, "due_date": "2033-03-03"}\n')
+    
+    backend = new_session().get_storage_backend()
+    assert backend.get_task(1).completed == 'Yes'
+    assert backend.get_task(3).due_date == '2033-03-03'
+
+
+def test_damaged_journal_lines_are_reported(new_session, capsys):
+    app = new_session()
+    backend = app.get_storage_backend()
+    with open(app.JOURNAL_FILE, 'ab') as file:
+        file.write(b'{"id": 2, "compl{"id": 3}\n')
+    backend.update_task(backend.get_task(4), title='Still replayed')
+    
+    backend = new_session().get_storage_backend()
+    assert backend.get_task(4).title == 'Still replayed'
+    assert 'skipped a damaged line in tasks_journal' in capsys.readouterr().out
+
+
+def test_edit_of_a_task_added_after_the_last_read_is_replayed(new_session, capsys):
+    store = new_session().get_task_store()
+    other = new_session().get_storage_backend()
+    other.add_task('user2', 'Added elsewhere', 'Then edited', '2024-01-01', '2031-01-01', 'No')
+    other.update_task(other.get_task(TASKS), completed='Yes')
+    
+    store._replay_journal()  # As if both were written between refresh() reading TASK_FILE and the journal
+    assert store.tasks[TASKS].completed == 'Yes'
+    assert store.by_status['Yes'][-1] == TASKS
+    assert 'damaged' not in capsys.readouterr().out
@@ -0,0 +1,35 @@
+"""Tests for counting the report statistics over chunks of TASK_FILE in a process pool."""
+
+import pytest
+
+
+def sequential_count(app):
+    """Count the session's tasks one by one, as generate_reports did before."""
+    return app.TaskStatistics.from_tasks(app.get_task_store().tasks, app.datetime.today().toordinal())
+
+
+@pytest.mark.parametrize('chunk_bytes', [64, 1000, 1 << 20])
+def test_parallel_count_matches_the_sequential_count(app, chunk_bytes):
+    parallel = app.count_tasks_in_parallel(3, chunk_bytes=chunk_bytes)
+    sequential = sequential_count(app)
+    
+    assert parallel.difference(sequential) == []
+    assert list(parallel.users) == list(sequential.users)  # Users are listed in the same order
+
+
+def test_parallel_count_applies_journaled_edits(app):
+    backend = app.get_storage_backend()
+    for task_id in (0, 5, 150, 299):
+        backend.update_task(backend.get_task(task_id), username='user9', completed='Yes')
+    backend.update_task(backend.get_task(7), due_date='2000-01-01', completed='No')
+    
+    assert app.count_tasks_in_parallel(4, chunk_bytes=500).difference(sequential_count(app)) == []
+
+
+def test_empty_task_file(app):
+    with open(app.TASK_FILE, 'w'):
+        pass
+    
+    statistics = app.count_tasks_in_parallel(2)
+    assert statistics.totals['total'] == 0
+    assert statistics.users == {}
@@ -0,0 +1,72 @@
+"""Tests for profiling mode's per-operation timings."""
+
+import atexit
+import builtins
+import time
+import tracemalloc
+
+import pytest
+
+
+def test_time_at_prompts_is_not_counted_as_latency(app, monkeypatch, tmp_path):
+    instrumentation = app.start_instrumentation(str(tmp_path / 'profile.json'))
+    atexit.unregister(instrumentation.dump)
+    
+    def slow_user(prompt=''):
+        time.sleep(0.2)
+        return 'answer'
+    monkeypatch.setattr(builtins, 'input', slow_user)
+    
+    @app.instrumented
+    def ask():
+        return app.read_input("Question: ")
+    assert ask() == 'answer'
+    
+    operation = instrumentation.summary()['operations']['ask']
+    assert operation['phases_ms']['input'] >= 200
+    assert operation['latency_ms']['total'] < 100
+    assert 'input' not in vars(app)  # The module's input() is left alone
+
+
+def test_prompt_inside_another_phase_is_only_counted_as_input(app, monkeypatch, tmp_path):
+    instrumentation = app.start_instrumentation(str(tmp_path / 'profile.json'))
+    atexit.unregister(instrumentation.dump)
+    
+    def slow_user(prompt=''):
+        time.sleep(0.2)
+        return 'answer'
+    monkeypatch.setattr(builtins, 'input', slow_user)
+    
+    @app.instrumented
+    def ask_while_reading():
+        with app.instrument_phase('read'):
+            return app.read_input("Question: ")
+    
+    @app.instrumented
+    def outer():
+        return ask_while_reading()
+    assert outer() == 'answer'
+    
+    for name in ('outer', 'ask_while_reading'):
+        operation = instrumentation.summary()['operations'][name]
+        assert operation['phases_ms']['input'] >= 200
+        assert operation['phases_ms']['read'] < 100
+        assert operation['latency_ms']['total'] < 100
+
+
+@pytest.mark.parametrize('tracing_before', [False, True])
+def test_capture_leaves_tracemalloc_as_it_found_it(app, tmp_path, tracing_before):
+    instrumentation = app.start_instrumentation(str(tmp_path / 'profile.json'), capture_operation='allocate')
+    atexit.unregister(instrumentation.dump)
+    
+    @app.instrumented
+    def allocate():
+        return [str(number) for number in range(1000)]
+    if tracing_before:
+        tracemalloc.start()
+    try:
+        allocate()
+        assert tracemalloc.is_tracing() == tracing_before
+        assert instrumentation.capture['operation'] == 'allocate'
+    finally:
+        tracemalloc.stop()
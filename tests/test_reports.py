@@ -0,0 +1,57 @@
+"""Tests for deciding whether the reports have to be generated again."""
+
+import os
+
+import pytest
+
+from conftest import TASKS
+
+
+@pytest.fixture
+def hashes(app, monkeypatch):
+    """Count the calls of hash_report_source(), in a session that has loaded the tasks."""
+    app.get_storage_backend().prepare()
+    calls = []
+    hash_report_source = app.hash_report_source
+    
+    def counting(source):
+        calls.append(source)
+        return hash_report_source(source)
+    monkeypatch.setattr(app, 'hash_report_source', counting)
+    return calls
+
+
+def test_unchanged_files_are_not_hashed(app, hashes):
+    assert app.generate_reports()
+    assert not app.generate_reports()
+    assert hashes == []
+
+
+def test_changed_files_are_counted_without_hashing(app, hashes):
+    assert app.generate_reports()
+    backend = app.get_storage_backend()
+    backend.add_task('user1', 'New task', 'Added later', '2024-01-01', '2031-01-01', 'No')
+    backend.update_task(backend.get_task(0), completed='No')
+    assert app.generate_reports()
+    assert hashes == []
+    assert app.load_report_data()['totals']['total'] == TASKS + 1
+
+
+def test_touched_files_are_hashed_to_check(app, hashes):
+    assert app.generate_reports()
+    stat = os.stat(app.TASK_FILE)
+    os.utime(app.TASK_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    
+    # The first check has no saved hash to compare with, so the reports are generated and the hash saved
+    assert app.generate_reports()
+    assert len(hashes) == 1
+    os.utime(app.TASK_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    assert not app.generate_reports()
+    assert len(hashes) == 2
+    
+    # The same size with different contents is still noticed
+    with open(app.TASK_FILE, 'r+b') as file:
+        first = file.read(1)
+        file.seek(0)
+        file.write(b'x' if first != b'x' else b'y')
+    assert app.generate_reports()
@@ -0,0 +1,71 @@
+"""Tests for searching task titles and descriptions through the word index."""
+
+import pytest
+
+from conftest import TASKS, task_rows
+
+
+def matching(app, tasks, query, username=None, completed=None):
+    """Select the tasks containing every word of query, one task at a time."""
+    terms = app.SearchIndex.terms(query)
+    return task_rows(task for task in tasks
+                     if app.SearchIndex.matches(terms, task)
+                     and (username is None or task.username == username)
+                     and (completed is None or task.completed == completed))
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite', 'sharded'])
+def test_searches_match_a_scan_of_every_task(new_session, backend_name):
+    app = new_session(backend_name)
+    backend = app.get_storage_backend()
+    everything = list(backend.iter_tasks())
+    words = sorted(app.SearchIndex.words(f"{everything[0].title} {everything[0].description}"))
+    
+    for query, username, completed in [(words[0], None, None), (' '.join(words[:2]), None, None),
+                                       (words[-1][:2] + '*', None, 'No'), (words[0], 'user2', None)]:
+        expected = matching(app, everything, query, username, completed)
+        tasks, total = backend.search_tasks(query, 0, TASKS, username, completed)
+        assert task_rows(tasks) == expected and total == len(expected)
+        assert task_rows(backend.search_tasks(query, 1, 2, username, completed)[0]) == expected[1:3]
+    
+    assert backend.search_tasks('nosuchwordanywhere', 0, 10) == ([], 0)
+    with pytest.raises(ValueError):
+        backend.search_tasks(' *, ', 0, 10)
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite'])
+def test_tasks_added_by_another_session_are_found(new_session, backend_name):
+    app = new_session(backend_name)
+    backend = app.get_storage_backend()
+    backend.search_tasks('anything', 0, 10)  # Indexes the tasks there are now
+    
+    new_session(backend_name).get_storage_backend().add_task(
+        'user4', 'Quarterly zebra audit', 'Count the zebras', '2024-01-01', '2031-01-01', 'No')
+    tasks, total = backend.search_tasks('zebra* audit', 0, 10)
+    assert total == 1 and tasks[0].title == 'Quarterly zebra audit' and tasks[0].task_id == TASKS
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite'])
+def test_rebuild_indexes_every_task_again(new_session, backend_name):
+    app = new_session(backend_name)
+    backend = app.get_storage_backend()
+    word = sorted(app.SearchIndex.words(backend.get_task(0).title))[0]
+    tasks, total = backend.search_tasks(word, 0, TASKS)
+    
+    assert backend.rebuild_search_index() == TASKS
+    rebuilt_tasks, rebuilt_total = backend.search_tasks(word, 0, TASKS)
+    assert task_rows(rebuilt_tasks) == task_rows(tasks) and rebuilt_total == total > 0
+
+
+def test_index_starts_again_when_the_task_file_is_replaced(app):
+    backend = app.get_storage_backend()
+    backend.search_tasks('anything', 0, 10)
+    with open(app.TASK_FILE, 'r') as file:
+        lines = file.readlines()
+    with open('tasks.new', 'w') as file:
+        file.writelines(lines[:5] + ["user1, Lone heron, Only here, 2024-01-01, 2031-01-01, No\n"])
+    app.os.replace('tasks.new', app.TASK_FILE)  # Fewer tasks than the index knows of
+    
+    tasks, total = backend.search_tasks('heron', 0, 10)
+    assert total == 1 and tasks[0].task_id == 5
+    assert app.get_search_index(catch_up=False).last_task_id() == 5
@@ -0,0 +1,120 @@
+"""Tests for the JSON API server's handling of login tokens and backend calls."""
+
+import asyncio
+import json
+import threading
+
+
+def request(server, method, target, body=None, token=None):
+    """Dispatch one request to a TaskServer and return (status, payload)."""
+    headers = {'authorization': f'Bearer {token}'} if token else {}
+    return server._dispatch(method, target, headers, json.dumps(body).encode('utf-8') if body else b'')
+
+
+async def started(app):
+    """Return a TaskServer on the flat-file backend, ready to dispatch requests."""
+    server = app.TaskServer(app.get_storage_backend())
+    server.writes = asyncio.Queue()
+    server.idle = asyncio.Event()
+    server.idle.set()
+    server.reads_done = asyncio.Event()
+    server.reads_done.set()
+    server.writer = asyncio.create_task(server._apply_writes())
+    return server
+
+
+async def log_in(server):
+    status, payload = await request(server, 'POST', '/login', {'username': 'user1', 'password': 'pass'})
+    assert status == 200
+    return payload['token']
+
+
+def test_tokens_expire(app, monkeypatch):
+    async def run():
+        server = await started(app)
+        token = await log_in(server)
+        assert (await request(server, 'GET', '/tasks?limit=1', token=token))[0] == 200
+        
+        monkeypatch.setattr(app, 'SERVER_TOKEN_TTL', 0)
+        expired_token = await log_in(server)
+        status, payload = await request(server, 'GET', '/tasks?limit=1', token=expired_token)
+        assert status == 401
+        assert (await request(server, 'GET', '/tasks?limit=1', token=token))[0] == 200
+        server.writer.cancel()
+    asyncio.run(run())
+
+
+def test_expired_tokens_are_forgotten(app, monkeypatch):
+    monkeypatch.setattr(app, 'SERVER_TOKEN_TTL', 0)
+    
+    async def run():
+        server = await started(app)
+        for _ in range(5):
+            await log_in(server)
+        assert len(server.sessions) == 1  # Each login removes the tokens that expired before it
+        server.writer.cancel()
+    asyncio.run(run())
+
+
+def test_backend_reads_do_not_block_the_event_loop(app, monkeypatch):
+    async def run():
+        server = await started(app)
+        token = await log_in(server)
+        backend = server.backend
+        release = threading.Event()
+        page_tasks = backend.page_tasks
+        
+        def slow_page_tasks(*args):
+            release.wait(5)
+            return page_tasks(*args)
+        monkeypatch.setattr(backend, 'page_tasks', slow_page_tasks)
+        
+        slow = asyncio.create_task(request(server, 'GET', '/tasks?limit=2', token=token))
+        await asyncio.sleep(0.05)
+        assert not slow.done()  # Still waiting in the reader thread, while the loop goes on
+        
+        # A write waits for the read to finish, so it never changes tasks being read
+        write = asyncio.create_task(request(server, 'POST', '/tasks/0/complete', token=token))
+        await asyncio.sleep(0.05)
+        assert not write.done()
+        release.set()
+        status, payload = await slow
+        assert status == 200 and len(payload['tasks']) == 2
+        assert (await write)[0] in (200, 403)
+        server.writer.cancel()
+    asyncio.run(run())
+
+
+def test_reads_run_at_once(app, monkeypatch):
+    async def run():
+        server = await started(app)
+        token = await log_in(server)
+        backend = server.backend
+        both_reading = threading.Barrier(2, timeout=5)
+        page_tasks = backend.page_tasks
+        
+        def meeting_page_tasks(*args):
+            both_reading.wait()  # Broken (and the request fails) unless the other read runs meanwhile
+            return page_tasks(*args)
+        monkeypatch.setattr(backend, 'page_tasks', meeting_page_tasks)
+        
+        first, second = await asyncio.gather(request(server, 'GET', '/tasks?limit=2', token=token),
+                                             request(server, 'GET', '/tasks?offset=2&limit=2', token=token))
+        assert first[0] == second[0] == 200
+        assert [task['task_id'] for task in first[1]['tasks'] + second[1]['tasks']] == [0, 1, 2, 3]
+        server.writer.cancel()
+    asyncio.run(run())
+
+
+def test_reloaded_store_replaces_the_one_being_read(app):
+    store = app.get_task_store()
+    tasks = list(store.tasks)
+    with open(app.TASK_FILE, 'r') as file:
+        lines = file.readlines()
+    with open('tasks.new', 'w') as file:
+        file.writelines(lines[:10])
+    app.os.replace('tasks.new', app.TASK_FILE)  # As another session's compaction would
+    
+    assert len(app.get_task_store().tasks) == 10
+    assert app.get_task_store() is not store
+    assert store.tasks == tasks  # A read still holding the old store is not disturbed
@@ -0,0 +1,128 @@
+"""Tests for starting a session from the tasks and indexes saved by an earlier one."""
+
+import json
+import os
+
+from conftest import task_rows
+
+
+def store_state(store):
+    """Return everything a TaskStore holds, for comparing two stores."""
+    indexes = [store.by_assignee, store.by_due_date, store.by_status, store.open_by_due_for]
+    # Edits can leave empty lists behind in the indexes, which are the same as no entry
+    return [task_rows(store.tasks), store.open_by_due] + [{key: ids for key, ids in index.items() if ids}
+                                                          for index in indexes]
+
+
+def start_from_snapshot(new_session):
+    """
+    Start a new session's store from SESSION_FILE.
+
+    Returns:
+        bool: True if the snapshot was used. Either way, the store must end up
+        the same as one parsed from the data files.
+    """
+    app = new_session()
+    store = app.TaskStore()
+    loaded = store.load_snapshot(app.SESSION_FILE)
+    store.refresh()
+    parsed = app.TaskStore()
+    parsed.refresh()
+    assert store_state(store) == store_state(parsed)
+    return loaded
+
+
+def save_snapshot(new_session):
+    """Run a session that loads the tasks and saves a snapshot when it finishes."""
+    app = new_session()
+    backend = app.get_storage_backend()
+    backend.prepare()
+    app._task_store._snapshot_offset = None  # Saved even if an earlier snapshot was recent enough
+    backend.finish()
+    return app
+
+
+def reuse_inode(app):
+    """Make the saved snapshot name the inode TASK_FILE has now, as if the file system had reused it."""
+    with open(app.SESSION_FILE, 'r') as file:
+        state = json.load(file)
+    state['base_stamp'] = [os.stat(app.TASK_FILE).st_ino] + state['base_stamp'][1:]
+    with open(app.SESSION_FILE, 'w') as file:
+        json.dump(state, file)
+
+
+def test_snapshot_is_used_by_the_next_session(new_session):
+    save_snapshot(new_session)
+    assert start_from_snapshot(new_session)
+
+
+def test_snapshot_is_plain_json(new_session):
+    app = save_snapshot(new_session)
+    with open(app.SESSION_FILE, 'r') as file:
+        state = json.load(file)
+    assert state['version'] == app.TaskStore.SNAPSHOT_VERSION
+    assert state['columns'][0] == [task.username for task in app.get_task_store().tasks]
+
+
+def test_snapshot_is_used_after_appends_and_edits(new_session):
+    save_snapshot(new_session)
+    backend = new_session().get_storage_backend()
+    for number in range(20):
+        backend.add_task('user2', f'Task {number}', 'Added later', '2024-01-01', '2031-01-01', 'No')
+    for task_id in range(0, 300, 7):
+        backend.update_task(backend.get_task(task_id), completed='Yes', due_date='2031-02-02')
+    assert start_from_snapshot(new_session)
+
+
+def test_snapshot_is_not_used_after_compaction(new_session):
+    save_snapshot(new_session)
+    app = new_session()
+    backend = app.get_storage_backend()
+    backend.update_task(backend.get_task(4), title='Before compaction')
+    app.get_task_store().compact()
+    assert not start_from_snapshot(new_session)
+    
+    save_snapshot(new_session)
+    assert start_from_snapshot(new_session)
+
+
+def test_snapshot_is_not_used_after_a_rewrite_in_place(new_session):
+    save_snapshot(new_session)
+    with open('tasks.txt', 'r+b') as file:
+        # Rename the first task's assignee, leaving the file as long as it was
+        first = file.read(1)
+        file.seek(0)
+        file.write(b'x' if first != b'x' else b'y')
+    assert not start_from_snapshot(new_session)
+
+
+def test_damaged_snapshot_is_ignored(new_session):
+    app = save_snapshot(new_session)
+    with open(app.SESSION_FILE, 'wb') as file:
+        file.write(b'not a snapshot')
+    assert not start_from_snapshot(new_session)
+
+
+def test_snapshot_is_not_used_after_the_task_file_was_rewritten_twice(new_session):
+    # Each compaction replaces TASK_FILE, and a file system may give the new file the inode of
+    # the one the snapshot was taken of, at the same size
+    save_snapshot(new_session)
+    for due_date in ('2030-01-01', '2030-09-09'):
+        app = new_session()
+        backend = app.get_storage_backend()
+        backend.update_task(backend.get_task(1), due_date=due_date)
+        app.get_task_store().compact()
+    backend.add_task('user2', 'Added after', 'The last compaction', '2024-01-01', '2031-01-01', 'No')
+    for task_id in range(100, 160, 10):
+        backend.update_task(backend.get_task(task_id), title=f'Edited {task_id}')
+    
+    reuse_inode(app)
+    assert not start_from_snapshot(new_session)
+    assert new_session().get_storage_backend().get_task(1).due_date == '2030-09-09'
+
+
+def test_snapshot_is_not_used_after_a_bulk_update(new_session):
+    save_snapshot(new_session)
+    app = new_session()
+    app.get_storage_backend().bulk_update(app.make_task_filter(username='user1'), completed='Yes')
+    assert not start_from_snapshot(new_session)
@@ -0,0 +1,80 @@
+"""Tests that the sharded backend stores and reports the same tasks as the flat files it was copied from."""
+
+import random
+from datetime import date
+
+import pytest
+
+from conftest import SHARDS, task_rows
+
+
+@pytest.fixture
+def backends(new_session):
+    """The flat-file backend and a sharded backend holding a copy of the same tasks."""
+    app = new_session('sharded')
+    sharded = app.get_storage_backend()
+    sharded.prepare()
+    assert sharded.shard_count == SHARDS
+    return app.FlatFileBackend(), sharded
+
+
+def assert_same_tasks(flat, sharded):
+    """Check that both backends answer every kind of query the same way."""
+    assert task_rows(sharded.iter_tasks()) == task_rows(flat.iter_tasks())
+    for username in sorted({task.username for task in flat.iter_tasks()}):
+        assert task_rows(sharded.tasks_for(username)) == task_rows(flat.tasks_for(username))
+        assert task_rows(sharded.iter_tasks(username, 'No')) == task_rows(flat.iter_tasks(username, 'No'))
+    today = date.today().toordinal()
+    for first_day, last_day, username in [(None, None, None), (today - 60, today + 30, None), (None, today, 'user1')]:
+        flat_page, flat_total = flat.page_tasks_due(3, 25, first_day, last_day, username)
+        sharded_page, sharded_total = sharded.page_tasks_due(3, 25, first_day, last_day, username)
+        assert (task_rows(sharded_page), sharded_total) == (task_rows(flat_page), flat_total)
+    for query in ('meeting', 'rep*', 'plan design'):
+        flat_page, flat_total = flat.search_tasks(query, 0, 50)
+        sharded_page, sharded_total = sharded.search_tasks(query, 0, 50)
+        assert (task_rows(sharded_page), sharded_total) == (task_rows(flat_page), flat_total)
+    
+    flat_statistics = flat.report_statistics(1)
+    for workers in (1, 2):
+        statistics = sharded.report_statistics(workers)
+        assert statistics.totals == flat_statistics.totals
+        assert list(statistics.user_counts()) == list(flat_statistics.user_counts())
+    first_day = date.today().toordinal()
+    assert sharded.workload(first_day, 4) == flat.workload(first_day, 4)
+
+
+def test_copied_tasks_match(backends):
+    flat, sharded = backends
+    assert_same_tasks(flat, sharded)
+    assert sharded.get_task(0).to_fields() == flat.get_task(0).to_fields()
+    assert sharded.get_task(10 ** 6) is None
+
+
+def test_same_changes_give_the_same_tasks(backends):
+    flat, sharded = backends
+    rng = random.Random(4)
+    usernames = sorted(flat.read_users())
+    for _ in range(60):
+        task_id = rng.randrange(300)
+        changes = rng.choice([dict(completed='Yes'), dict(completed='No'),
+                              dict(username=rng.choice(usernames), due_date=f'2031-01-{rng.randint(10, 28)}')])
+        flat.update_task(flat.get_task(task_id), **changes)
+        updated = sharded.update_task(sharded.get_task(task_id), **changes)
+        assert updated.task_id == task_id
+    for backend in (flat, sharded):
+        backend.add_task('user3', 'New task', 'Added to both', '2024-01-01', '2031-03-03', 'No')
+        assert backend.add_tasks([('user8', 'Batch task', 'Added to both', '2024-01-01', '2031-04-04', 'No')] * 3) == 3
+    assert_same_tasks(flat, sharded)
+
+
+def test_moving_a_task_between_shards_is_seen_by_other_sessions(backends, new_session):
+    flat, sharded = backends
+    task = sharded.tasks_for('user1')[0]
+    other_user = next(username for username in flat.read_users()
+                      if sharded._shard_of(username) != sharded._shard_of('user1'))
+    sharded.update_task(task, task.to_fields(), username=other_user)
+    
+    other = new_session('sharded').get_storage_backend()
+    assert other.get_task(task.task_id).username == other_user
+    assert task.task_id not in [task.task_id for task in other.tasks_for('user1')]
+    assert task.task_id in [task.task_id for task in other.tasks_for(other_user)]
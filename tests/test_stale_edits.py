@@ -0,0 +1,79 @@
+"""Tests for refusing edits to tasks that another session changed after they were shown."""
+
+import pytest
+
+
+@pytest.fixture(params=['flat', 'sqlite', 'sharded'])
+def two_sessions(request, new_session):
+    """Two sessions on the same backend, each with the tasks loaded."""
+    first = new_session(request.param)
+    second = new_session(request.param)
+    first.get_storage_backend().prepare()
+    second.get_storage_backend().prepare()
+    return first, second
+
+
+def test_edit_of_a_changed_task_is_refused(two_sessions):
+    first, second = two_sessions
+    first_backend = first.get_storage_backend()
+    second_backend = second.get_storage_backend()
+    shown = first_backend.get_task(10)
+    expected = shown.to_fields()
+    
+    second_backend.update_task(second_backend.get_task(10), due_date='2033-03-03')
+    with pytest.raises(first.StaleTaskError) as raised:
+        first_backend.update_task(shown, expected, username='user7')
+    
+    # The error carries the task as it is now, and nothing was changed
+    assert raised.value.task.to_fields() == second_backend.get_task(10).to_fields()
+    assert raised.value.task.due_date == '2033-03-03'
+    assert second_backend.get_task(10).username == expected[0]
+
+
+def test_edit_of_an_unchanged_task_goes_through(two_sessions):
+    first, second = two_sessions
+    first_backend = first.get_storage_backend()
+    shown = first_backend.get_task(10)
+    
+    second_backend = second.get_storage_backend()
+    second_backend.update_task(second_backend.get_task(11), completed='Yes')  # A different task
+    updated = first_backend.update_task(shown, shown.to_fields(), username='user7')
+    assert updated.username == 'user7'
+    assert second_backend.get_task(10).username == 'user7'
+
+
+def test_mark_complete_retries_on_the_current_version(two_sessions):
+    first, second = two_sessions
+    first_backend = first.get_storage_backend()
+    second_backend = second.get_storage_backend()
+    generation = first_backend.generation()
+    shown = first_backend.get_task(20)
+    expected = shown.to_fields()
+    
+    second_backend.update_task(second_backend.get_task(20), due_date='2034-04-04')
+    updated = first.mark_task_complete(first_backend, shown, expected, expected[0], generation)
+    assert updated.completed == 'Yes' and updated.due_date == '2034-04-04'
+    assert second_backend.get_task(20).completed == 'Yes'
+
+
+def test_mark_complete_gives_up_on_a_reassigned_task(two_sessions):
+    first, second = two_sessions
+    first_backend = first.get_storage_backend()
+    second_backend = second.get_storage_backend()
+    generation = first_backend.generation()
+    shown = first_backend.get_task(20)
+    expected = shown.to_fields()
+    
+    second_backend.update_task(second_backend.get_task(20), username='someone else', completed='No')
+    assert first.mark_task_complete(first_backend, shown, expected, expected[0], generation) is None
+    assert second_backend.get_task(20).completed == 'No'
+
+
+def test_replacing_every_task_starts_a_new_generation(two_sessions):
+    first, second = two_sessions
+    first_backend = first.get_storage_backend()
+    second_backend = second.get_storage_backend()
+    generation = first_backend.generation()
+    
+    second_backend.replace_tasks(list(second_backend.iter_tasks())[1:])  # Every task moves down one id
+    assert first_backend.generation() == second_backend.generation() != generation
@@ -0,0 +1,91 @@
+"""Tests for the saved report counters, which are kept up to date as tasks change instead of recounted."""
+
+import pytest
+
+
+def recount(app, backend):
+    """Count the backend's tasks from scratch, as the reports would without saved counters."""
+    today = app.datetime.today().toordinal()
+    statistics = app.TaskStatistics.from_tasks(list(backend.iter_tasks()), today)
+    return statistics.totals, list(statistics.user_counts())
+
+
+def make_changes(backend):
+    """Add, complete and reassign some tasks."""
+    backend.add_task('user4', 'Fresh task', 'Added today', '2024-01-01', '2031-05-05', 'No')
+    backend.add_task('newcomer', 'First task', 'A user with no tasks yet', '2024-01-01', '2020-05-05', 'No')
+    for task in list(backend.tasks_for('user1'))[:5]:
+        backend.update_task(task, completed='Yes')
+    for task in list(backend.tasks_for('user2'))[:5]:
+        backend.update_task(task, username='user3', due_date='2020-01-01', completed='No')
+    task = backend.tasks_for('admin')[0]
+    backend.update_task(task, username='user5')  # admin's first task moves on to another
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite', 'sharded'])
+def test_counters_match_a_recount_after_changes(new_session, backend_name):
+    app = new_session(backend_name)
+    backend = app.get_storage_backend()
+    backend.prepare()
+    statistics = backend.report_statistics(1)
+    assert (statistics.totals, list(statistics.user_counts())) == recount(app, backend)
+    
+    make_changes(backend)
+    assert backend.verify_statistics() == []
+    statistics = backend.report_statistics(1)
+    assert (statistics.totals, list(statistics.user_counts())) == recount(app, backend)
+    
+    # A new session uses the saved counters and gets the same answer
+    app = new_session(backend_name)
+    backend = app.get_storage_backend()
+    statistics = backend.report_statistics(1)
+    assert (statistics.totals, list(statistics.user_counts())) == recount(app, backend)
+
+
+def test_edits_are_logged_without_rewriting_the_counters(app):
+    backend = app.get_storage_backend()
+    backend.report_statistics(1)
+    with open(app.STATS_FILE, 'r') as file:
+        saved = file.read()
+    
+    make_changes(backend)
+    with open(app.STATS_FILE, 'r') as file:
+        assert file.read() == saved
+    with open(app.STATS_LOG_FILE, 'r') as file:
+        assert len(file.readlines()) == 13
+    assert app.verify_task_statistics() == []
+    
+    # Generating the reports folds the log into the saved counters
+    backend.report_statistics(1)
+    with open(app.STATS_LOG_FILE, 'r') as file:
+        assert file.read() == ''
+    assert app.verify_task_statistics() == []
+
+
+def test_a_long_log_is_folded(app, monkeypatch):
+    monkeypatch.setattr(app, 'STATS_LOG_FOLD_BYTES', 2000)
+    backend = app.get_storage_backend()
+    backend.report_statistics(1)
+    for task_id in range(40):
+        backend.update_task(backend.get_task(task_id), completed='Yes')
+    
+    with open(app.STATS_LOG_FILE, 'rb') as file:
+        assert len(file.read()) < 2000
+    assert app.verify_task_statistics() == []
+
+
+def test_changes_made_without_logging_force_a_recount(new_session):
+    app = new_session()
+    backend = app.get_storage_backend()
+    backend.report_statistics(1)
+    
+    # Another program appends a task, so the log does not describe it
+    with open(app.TASK_FILE, 'a') as file:
+        file.write("user6, Hand written, Added with an editor, 2024-01-01, 2020-01-01, No\n")
+    
+    app = new_session()
+    backend = app.get_storage_backend()
+    assert app.verify_task_statistics() != []
+    statistics = backend.report_statistics(1)
+    assert (statistics.totals, list(statistics.user_counts())) == recount(app, backend)
+    assert app.verify_task_statistics() == []
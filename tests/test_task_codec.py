@@ -0,0 +1,66 @@
+"""Tests for reading and writing task file lines (task_codec)."""
+
+import pytest
+
+from task_codec import decode_task_line, encode_field, encode_task_line
+
+# Field values that cannot be written as they are
+AWKWARD_VALUES = [
+    '',
+    ' ',
+    '  leading spaces',
+    'trailing tab\t',
+    'comma, then a space',
+    '"starts with a quote',
+    'a "quoted" word',
+    'back\\slash',
+    'line\nbreak',
+    'carriage\r\nreturn',
+    '\\n is not a line break',
+    '", "',
+]
+
+
+@pytest.mark.parametrize('value', AWKWARD_VALUES)
+def test_awkward_fields_round_trip(value):
+    fields = ['user1', value, value, '2024-01-01', '2024-02-01', 'No']
+    line = encode_task_line(fields)
+    assert line.endswith('\n') and line.count('\n') == 1
+    assert decode_task_line(line) == fields
+
+
+@pytest.mark.parametrize('position', range(6))
+def test_empty_field_in_any_position(position):
+    fields = ['user1', 'Title', 'Description', '2024-01-01', '2024-02-01', 'No']
+    fields[position] = ''
+    assert decode_task_line(encode_task_line(fields)) == fields
+
+
+def test_old_format_lines_are_unchanged():
+    fields = ['user1', 'Plan team meeting', 'Schedule the next meeting', '2024-07-19', '2024-07-25', 'Yes']
+    line = encode_task_line(fields)
+    assert line == ', '.join(fields) + '\n'
+    assert decode_task_line(line) == fields
+    assert decode_task_line(line.rstrip('\n')) == fields
+
+
+def test_only_fields_that_need_it_are_quoted():
+    assert encode_field('plain text') == 'plain text'
+    assert encode_field('') == '""'
+    assert encode_field('a, b') == '"a, b"'
+    assert encode_field('say "hi"') == 'say "hi"'  # A quote inside a field is not ambiguous
+    assert encode_field('"hi"') == '"\\"hi\\""'
+
+
+@pytest.mark.parametrize('backend', ['flat', 'sharded'])
+def test_awkward_tasks_survive_a_new_session(new_session, backend):
+    app = new_session(backend)
+    expected = []
+    for value in AWKWARD_VALUES:
+        fields = ['user1', value, value + ' description', '2024-01-01', '2024-02-01', 'No']
+        app.get_storage_backend().add_task(*fields)
+        expected.append(fields)
+    
+    app = new_session(backend)
+    tasks = list(app.get_storage_backend().iter_tasks())
+    assert [task.to_fields() for task in tasks[-len(expected):]] == expected
@@ -0,0 +1,45 @@
+"""Tests for reading and showing the task list one page at a time."""
+
+import builtins
+
+import pytest
+
+from conftest import TASKS, task_rows
+
+
+@pytest.mark.parametrize('backend_name', ['flat', 'sqlite', 'sharded'])
+def test_pages_add_up_to_every_task(new_session, backend_name):
+    app = new_session(backend_name)
+    everything = task_rows(app.get_storage_backend().iter_tasks())
+    
+    rows, page = [], 1
+    while True:
+        tasks, has_more = app.read_task_page(page, 32, 'user1', None)
+        rows += task_rows(tasks)
+        if not has_more:
+            break
+        page += 1
+    assert rows == [row for row in everything if row[1] == 'user1']
+    assert page == (len(rows) + 31) // 32
+    
+    tasks, has_more = app.read_task_page(1, TASKS, None, 'Yes')
+    assert task_rows(tasks) == [row for row in everything if row[6] == 'Yes'] and not has_more
+    assert app.read_task_page(100, 32) == ([], False)
+
+
+def test_view_all_tasks_moves_between_pages(app, monkeypatch, capsys):
+    monkeypatch.setattr(app, 'PAGE_SIZE', 100)
+    answers = iter(['n', 'n', 'n', 'p', 'g', '1', 'f', '', 'yes', 'q'])
+    monkeypatch.setattr(builtins, 'input', lambda prompt='': next(answers))
+    
+    app.view_all_tasks()
+    output = capsys.readouterr().out
+    pages = [line for line in output.splitlines() if line.startswith('All Tasks')]
+    assert pages == ['All Tasks (page 1):', 'All Tasks (page 2):', 'All Tasks (page 3):',
+                     'All Tasks (page 3):', 'All Tasks (page 2):', 'All Tasks (page 1):', 'All Tasks (page 1, completed: Yes):']
+    assert 'This is the last page.' in output
+
+
+def test_long_values_are_cut_to_the_column_width(app):
+    table = app.render_task_table([['user1', 'x' * 100]], ['Assigned To', 'Title'], [11, 10])
+    assert '| xxxxxxx... |' in table.splitlines()[3]
@@ -0,0 +1,63 @@
+"""Tests for the columnar task snapshot and the statistics computed from its columns."""
+
+import pytest
+
+
+@pytest.fixture(params=['numpy', 'loops'])
+def snapshot_app(app, monkeypatch, request):
+    """A flat-file session computing statistics from SNAPSHOT_FILE, with or without NumPy."""
+    if request.param == 'loops':
+        monkeypatch.setattr(app, 'optional_numpy', lambda: None)
+    monkeypatch.setattr(app, 'ANALYTICS_SNAPSHOT', True)
+    return app
+
+
+def counted_from_the_store(app):
+    """Count the statistics from the TaskStore's records, one task at a time."""
+    return app.TaskStatistics.from_tasks(app.get_task_store().tasks, app.datetime.today().toordinal())
+
+
+def test_statistics_match_a_count_of_the_tasks(snapshot_app):
+    app = snapshot_app
+    statistics = app.get_storage_backend().report_statistics()
+    expected = counted_from_the_store(app)
+    
+    assert statistics.difference(expected) == []
+    assert [counts['first'] for counts in statistics.users.values()] == \
+        [counts['first'] for counts in expected.users.values()]
+
+
+def test_workload_matches_the_due_date_index(snapshot_app, monkeypatch):
+    app = snapshot_app
+    backend = app.get_storage_backend()
+    first_day = app.datetime.today().toordinal() - 60
+    workload = backend.workload(first_day, 12)
+    
+    monkeypatch.setattr(app, 'ANALYTICS_SNAPSHOT', False)
+    assert workload == backend.workload(first_day, 12)
+
+
+def test_snapshot_is_closed_and_rebuilt_after_a_change(snapshot_app):
+    app = snapshot_app
+    backend = app.get_storage_backend()
+    backend.report_statistics()
+    old = app._task_snapshot
+    
+    backend.update_task(backend.get_task(0), completed='Yes', username='user5')
+    statistics = backend.report_statistics()
+    assert old._mapped.closed  # Closed before SNAPSHOT_FILE was replaced
+    assert app._task_snapshot is not old
+    assert statistics.difference(counted_from_the_store(app)) == []
+
+
+def test_closed_snapshot_can_be_replaced(snapshot_app):
+    app = snapshot_app
+    app.get_storage_backend().report_statistics()
+    
+    with app.TaskSnapshot(app.SNAPSHOT_FILE) as snapshot:
+        assert snapshot.count == len(app.get_task_store().tasks)
+    assert snapshot._mapped.closed and snapshot.columns == {}
+    app._task_snapshot.close()
+    app.TaskSnapshot.build(app.SNAPSHOT_FILE, app.get_task_store().tasks[:10], [])
+    with app.TaskSnapshot(app.SNAPSHOT_FILE) as snapshot:
+        assert snapshot.count == 10
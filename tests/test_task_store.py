@@ -0,0 +1,68 @@
+"""Tests for reading TASK_FILE into the TaskStore when its lines are not all well formed."""
+
+from conftest import TASKS, task_rows
+
+
+def append_bytes(app, data):
+    """Append raw bytes to TASK_FILE, as a crash or another program might leave them."""
+    with open(app.TASK_FILE, 'ab') as file:
+        file.write(data)
+
+
+def test_append_cut_off_by_a_crash_is_not_read_and_is_cut_off(new_session):
+    app = new_session()
+    append_bytes(app, b'user1, Half written, Cut off by a cra')
+    backend = new_session().get_storage_backend()
+    assert len(list(backend.iter_tasks())) == TASKS
+    
+    backend.add_task('user2', 'After the crash', 'Appended next', '2024-01-01', '2030-01-01', 'No')
+    with open(app.TASK_FILE, 'r') as file:
+        assert 'Cut off by a cra' not in file.read()
+    backend = new_session().get_storage_backend()
+    tasks = list(backend.iter_tasks())
+    assert len(tasks) == TASKS + 1
+    assert tasks[-1].title == 'After the crash' and tasks[-1].username == 'user2'
+
+
+def test_last_task_without_a_newline_is_kept(new_session):
+    app = new_session()
+    with open(app.TASK_FILE, 'rb') as file:
+        data = file.read()
+    with open(app.TASK_FILE, 'wb') as file:
+        file.write(data.rstrip(b'\n'))
+    
+    backend = new_session().get_storage_backend()
+    last = list(backend.iter_tasks())[-1]
+    backend.add_tasks([('user3', 'Imported', 'After the last line', '2024-01-01', '2030-01-01', 'No')])
+    
+    tasks = task_rows(new_session().get_storage_backend().iter_tasks())
+    assert len(tasks) == TASKS + 1
+    assert tasks[-2] == (last.task_id, *last.to_fields())
+    assert tasks[-1][2] == 'Imported'
+
+
+def test_damaged_lines_are_reported_and_skipped(new_session, capsys):
+    app = new_session()
+    with open(app.TASK_FILE, 'r') as file:
+        lines = file.readlines()
+    # Two tasks merged into one line, as appending onto a cut-off line used to leave them
+    lines.insert(10, 'user1, Merged, ' + lines[11])
+    with open(app.TASK_FILE, 'w') as file:
+        file.writelines(lines)
+    
+    app = new_session()
+    backend = app.get_storage_backend()
+    stored = task_rows(backend.iter_tasks())
+    assert len(stored) == TASKS
+    assert 'skipped a damaged line in tasks.txt' in capsys.readouterr().out
+    
+    # Every reader skips the line the same way, so task ids agree
+    backend.update_task(backend.get_task(10), title='Edited after the damaged line', completed='Yes')
+    stored = task_rows(backend.iter_tasks())
+    assert task_rows(app.iter_tasks_from_file()) == stored
+    assert stored[10][2] == 'Edited after the damaged line'
+    
+    app = new_session()  # The parallel count needs the module its worker processes load
+    assert task_rows(app.get_storage_backend().iter_tasks()) == stored
+    recount = app.TaskStatistics.from_tasks(app.get_task_store().tasks, app.datetime.today().toordinal())
+    assert app.count_tasks_in_parallel(2, chunk_bytes=512).difference(recount) == []
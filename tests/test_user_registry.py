@@ -0,0 +1,52 @@
+"""Tests for the session-wide cache of the users in USER_FILE."""
+
+import os
+
+from conftest import USERS
+
+
+def test_registry_is_shared_and_read_once(app, monkeypatch):
+    registry = app.get_user_registry()
+    assert len(registry.users) == USERS
+    assert app.get_user_registry() is registry
+    
+    opened = []
+    real_open = open
+    
+    def recording_open(name, *args, **kwargs):
+        opened.append(name)
+        return real_open(name, *args, **kwargs)
+    monkeypatch.setattr('builtins.open', recording_open)
+    assert app.get_user_registry().users['admin'] == 'adm1n'
+    assert app.USER_FILE not in opened  # Unchanged, so not read again
+
+
+def test_appended_users_are_read_without_starting_over(app):
+    registry = app.get_user_registry()
+    offset = registry._offset
+    with open(app.USER_FILE, 'a') as file:
+        file.write("newcomer, secret\n")
+    
+    registry.refresh()
+    assert registry.users['newcomer'] == 'secret'
+    assert registry._offset == offset + len("newcomer, secret\n")
+    assert len(registry.users) == USERS + 1
+
+
+def test_replaced_file_is_read_again(app):
+    registry = app.get_user_registry()
+    with open('user.new', 'w') as file:
+        file.write("admin, changed\nonly, one\n")
+    os.replace('user.new', app.USER_FILE)
+    
+    assert registry.refresh().users == {'admin': 'changed', 'only': 'one'}
+
+
+def test_registrations_from_two_sessions(new_session):
+    first = new_session().get_user_registry()
+    second = new_session().get_user_registry()
+    
+    assert second.add('carol', 'pw1')
+    assert not first.add('carol', 'pw2')  # Registered by the other session first
+    assert first.users['carol'] == 'pw1'
+    assert new_session().read_users()['carol'] == 'pw1'